@@ -0,0 +1,128 @@
+"""Benchmark concurrent CSV batch evaluation against a fake model service.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_batch_evaluation
+
+Every ``analyze_prompt`` call of the fake service sleeps ``--delay`` seconds,
+so evaluating ``--rows`` rows one at a time takes ``rows * delay``. With
+bounded concurrency the speedup should be close to the concurrency level,
+up to ``EVALUATION_MAX_CONCURRENCY``. The evaluation memo is disabled for
+this table so that every level calls the model.
+
+``--distinct`` then evaluates a CSV of ``--rows`` rows holding only that many
+distinct prompts, twice, with a temporary memo: the first run evaluates each
+distinct prompt once, and the re-run is served from the memo.
+
+``--ingest-rows`` then streams CSV files of growing size from disk through
+``EvaluationService.iter_csv_prompts`` and reports the peak memory allocated
+while parsing, which should stay flat as the file grows.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from loguru import logger
+
+from ai_prompt_enhancement.core.config import get_settings
+from ai_prompt_enhancement.services.evaluation.evaluation_memo import evaluation_memo
+from ai_prompt_enhancement.services.evaluation.evaluation_service import EvaluationService
+
+CRITERIA = [
+    {"name": "clarity", "weight": 0.5, "description": "Measures clarity", "threshold": 0.7},
+    {"name": "specificity", "weight": 0.5, "description": "Measures specificity"},
+]
+
+
+class FakeModelService:
+    """Answer every analysis with fixed metrics after a fixed delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def analyze_prompt(self, prompt: str, context=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"metrics": {"clarity": 0.8, "specificity": 0.7}, "suggestions": []}
+
+
+async def _run_level(service: EvaluationService, csv: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    result = await service.evaluate_prompts_batch(csv, CRITERIA, concurrency)
+    assert result["failed_prompts"] == 0
+    return time.perf_counter() - start
+
+
+async def _run_reuse(service: EvaluationService, csv: str, concurrency: int) -> tuple:
+    calls = service.model_service.calls
+    start = time.perf_counter()
+    result = await service.evaluate_prompts_batch(csv, CRITERIA, concurrency)
+    elapsed = time.perf_counter() - start
+    return elapsed, service.model_service.calls - calls, result["llm_calls_saved"]
+
+
+async def _ingest_peak_mb(service: EvaluationService, rows: int) -> tuple:
+    with tempfile.TemporaryFile() as f:
+        f.write(b"prompt,notes\n")
+        for i in range(rows):
+            f.write(f"Benchmark prompt {i} with some filler text,{'x' * 80}\n".encode())
+        size_mb = f.tell() / 1e6
+        f.seek(0)
+        tracemalloc.start()
+        parsed = 0
+        async for _ in service.iter_csv_prompts(f):
+            parsed += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert parsed == rows
+    return size_mb, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=256)
+    parser.add_argument("--delay", type=float, default=0.05, help="Model latency per row in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--distinct", type=int, default=32, help="Distinct prompts in the reuse table")
+    parser.add_argument("--ingest-rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+    logger.remove()
+
+    cap = get_settings().evaluation_max_concurrency
+    service = EvaluationService(model_service=FakeModelService(args.delay))
+    csv = "prompt\n" + "\n".join(f"Benchmark prompt {i}" for i in range(args.rows))
+
+    print(f"{args.rows} rows, {args.delay * 1000:.0f} ms per model call, concurrency cap {cap}")
+    print(f"{'concurrency':>12} {'elapsed (s)':>12} {'rows/s':>10} {'speedup':>8} {'ideal':>8}")
+    baseline = None
+    evaluation_memo.enabled = False
+    for level in args.levels:
+        elapsed = asyncio.run(_run_level(service, csv, level))
+        baseline = baseline or elapsed
+        print(f"{level:>12} {elapsed:>12.3f} {args.rows / elapsed:>10.1f} "
+              f"{baseline / elapsed:>7.1f}x {min(level, cap):>7}x")
+
+    level = args.levels[-1]
+    repeated = "prompt\n" + "\n".join(f"Benchmark prompt {i % args.distinct}" for i in range(args.rows))
+    with tempfile.TemporaryDirectory() as memo_dir:
+        evaluation_memo.path = os.path.join(memo_dir, "evaluation_memo.db")
+        evaluation_memo.enabled = True
+        print(f"\n{args.rows} rows, {args.distinct} distinct prompts, concurrency {level}")
+        print(f"{'run':>12} {'elapsed (s)':>12} {'llm calls':>10} {'calls saved':>12}")
+        for run in ("first", "re-run"):
+            elapsed, calls, saved = asyncio.run(_run_reuse(service, repeated, level))
+            print(f"{run:>12} {elapsed:>12.3f} {calls:>10} {saved:>12}")
+        evaluation_memo.close()
+
+    print(f"\n{'csv rows':>12} {'file (MB)':>10} {'peak parse memory (MB)':>24}")
+    for rows in args.ingest_rows:
+        size_mb, peak_mb = asyncio.run(_ingest_peak_mb(service, rows))
+        print(f"{rows:>12} {size_mb:>10.1f} {peak_mb:>24.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark concurrent throughput of DeepseekService against a local fake provider.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_concurrent_calls
+
+Every call takes ``--delay`` seconds upstream. With a non-blocking client the
+throughput should grow roughly linearly with the number of in-flight calls,
+while a blocking client stays pinned at ``1 / delay`` requests per second.
+"""
+import argparse
+import asyncio
+import time
+
+from loguru import logger
+
+from ai_prompt_enhancement.core.config import get_settings
+from ai_prompt_enhancement.services.model.deepseek_service import DeepseekService
+from ai_prompt_enhancement.services.model.rate_limiter import rate_limiters
+
+from .fake_provider import run_fake_provider
+
+
+async def _run_level(service: DeepseekService, in_flight: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        service.analyze_prompt(f"Benchmark prompt {i}") for i in range(in_flight)
+    ))
+    return time.perf_counter() - start
+
+
+async def _bench_mode(base_url: str, mode: str, levels, delay: float) -> None:
+    settings = get_settings().model_copy(update={
+        "deepseek_base_url": base_url,
+        "model_client_mode": mode,
+        # Start the limiter wide open so the client, not the scheduler, is measured
+        "model_initial_concurrency": max(levels),
+        "model_max_concurrency": max(levels),
+        "model_default_rpm": 1_000_000,
+        "model_latency_ratio": float("inf"),
+    })
+    rate_limiters.settings = settings
+    service = DeepseekService(settings=settings)
+    try:
+        print(f"\nmode={mode}")
+        print(f"{'in-flight':>10} {'elapsed (s)':>12} {'req/s':>10} {'ideal req/s':>12}")
+        for level in levels:
+            elapsed = await _run_level(service, level)
+            print(f"{level:>10} {elapsed:>12.3f} {level / elapsed:>10.1f} {level / delay:>12.1f}")
+    finally:
+        await service.client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.2, help="Upstream latency per call in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--modes", nargs="+", default=["async", "thread"])
+    args = parser.parse_args()
+    logger.remove()
+
+    with run_fake_provider(delay=args.delay) as base_url:
+        for mode in args.modes:
+            asyncio.run(_bench_mode(base_url, mode, args.levels, args.delay))
+
+
+if __name__ == "__main__":
+    main()
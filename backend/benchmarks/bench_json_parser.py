@@ -0,0 +1,89 @@
+"""Benchmark the tolerant JSON parser against the legacy ``_clean_json`` path.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_json_parser
+
+The corpus is built from the saved ``data/analysis_history`` and
+``data/comparison_history`` records, re-serialized the way models return them:
+plain, wrapped in a markdown fence, with trailing commas and truncated. For each
+variant the benchmark reports how many documents each parser recovers and the
+mean parse time per document.
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from ai_prompt_enhancement.services.model.json_parser import parse_model_json
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+def legacy_clean_json(data: str) -> Dict:
+    """The string branch of ``_clean_json`` before the tolerant parser."""
+    data = data.replace("\n", "").replace("    ", "").strip()
+    data = json.loads(data)
+    cleaned_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    cleaned_str = re.sub(r'\s*"([^"]+)"\s*:', r'"\1":', cleaned_str)
+    return json.loads(cleaned_str)
+
+
+def _load_documents(data_dir: Path) -> List[str]:
+    documents = []
+    for folder in ("analysis_history", "comparison_history"):
+        for path in sorted((data_dir / folder).glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                documents.append(json.dumps(json.load(f), indent=2, ensure_ascii=False))
+    return documents
+
+
+def _variants(documents: List[str]) -> Dict[str, List[str]]:
+    return {
+        "plain": documents,
+        "fenced": [f"```json\n{doc}\n```" for doc in documents],
+        "trailing_comma": [re.sub(r'(\]|\}|"|\d)\n', r'\1,\n', doc, count=3) for doc in documents],
+        "truncated": [doc[:int(len(doc) * 0.9)] for doc in documents],
+    }
+
+
+def _bench(parse: Callable[[str], Dict], documents: List[str], repeat: int):
+    parsed = 0
+    for doc in documents:
+        try:
+            parse(doc)
+            parsed += 1
+        except ValueError:
+            pass
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc in documents:
+            try:
+                parse(doc)
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - start
+    return parsed, elapsed / (repeat * len(documents)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    documents = _load_documents(args.data_dir)
+    if not documents:
+        raise SystemExit(f"No history records found under {args.data_dir}")
+    print(f"{len(documents)} documents, mean size {sum(map(len, documents)) // len(documents)} chars")
+    print(f"{'variant':>15} {'parser':>8} {'parsed':>8} {'us/doc':>10}")
+    for name, docs in _variants(documents).items():
+        for label, parse in (("legacy", legacy_clean_json), ("tolerant", parse_model_json)):
+            parsed, per_doc = _bench(parse, docs, args.repeat)
+            print(f"{name:>15} {label:>8} {parsed:>4}/{len(docs):<3} {per_doc:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
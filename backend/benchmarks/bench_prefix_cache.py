@@ -0,0 +1,117 @@
+"""Estimate the input-token cost of the analysis message layouts under provider prefix caching.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_prefix_cache
+
+The benchmark replays a stream of analyze requests through a simulated prefix
+cache that behaves like DeepSeek context caching: the request is split into
+64-token units and the longest run of leading units seen in an earlier request
+is billed at the cached input price. Tokens are approximated as 4 characters.
+
+The "legacy" layout interpolates the prompt near the top of the instructions,
+as the analysis template used to; the "prefix" layout is the one built by
+``prompt_messages.analysis_messages``. Prompts come from the saved
+``data/analysis_history`` records, padded with generated ones.
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Set
+
+from ai_prompt_enhancement.services.model.prompt_messages import NO_CONTEXT, analysis_messages
+from ai_prompt_enhancement.services.model.usage_ledger import DEFAULT_PRICES, UsageLedger
+from ai_prompt_enhancement.services.prompt_refinement.prompt_templates import (
+    ANALYSIS_INPUT_TEMPLATE,
+    ANALYSIS_TEMPLATE,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+CHARS_PER_TOKEN = 4
+UNIT_TOKENS = 64
+
+LEGACY_SYSTEM_PROMPT = """You are an expert prompt engineer specializing in analyzing and improving prompts.
+                You must ALWAYS respond with ONLY valid JSON, no other text or explanations.
+                Your response must exactly match the structure specified in the user's message.
+                Do not include any markdown formatting, only pure JSON."""
+
+
+def legacy_messages(prompt: str, context: str = None) -> List[Dict[str, str]]:
+    """The analysis messages before the prefix-first layout: input after the title lines."""
+    user_input = ANALYSIS_INPUT_TEMPLATE.format(prompt=prompt, context=context or NO_CONTEXT)
+    content = ANALYSIS_TEMPLATE.replace(
+        "The original prompt and any context are provided in the user message.  \n", f"{user_input}  \n"
+    )
+    return [{"role": "system", "content": LEGACY_SYSTEM_PROMPT}, {"role": "user", "content": content}]
+
+
+class PrefixCacheSimulator:
+    """Bill the leading 64-token units already seen in an earlier request as cached."""
+
+    def __init__(self):
+        self._seen: Set[str] = set()
+
+    def send(self, messages: List[Dict[str, str]]) -> Dict[str, int]:
+        text = "".join(f"<|{message['role']}|>{message['content']}" for message in messages)
+        unit = UNIT_TOKENS * CHARS_PER_TOKEN
+        digest = hashlib.sha256()
+        cached_units, hit = 0, True
+        for start in range(0, len(text) - unit + 1, unit):
+            digest.update(text[start:start + unit].encode())
+            key = digest.copy().hexdigest()
+            if hit and key in self._seen:
+                cached_units += 1
+            else:
+                hit = False
+                self._seen.add(key)
+        return {
+            "prompt_tokens": len(text) // CHARS_PER_TOKEN,
+            "cached_tokens": cached_units * UNIT_TOKENS,
+        }
+
+
+def _load_prompts(data_dir: Path, count: int) -> List[str]:
+    prompts = []
+    for path in sorted((data_dir / "analysis_history").glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        # Bulk requests save a list of analyses in one file
+        for record in records if isinstance(records, list) else [records]:
+            if record.get("original_prompt"):
+                prompts.append(record["original_prompt"])
+    topics = ["a product description", "a SQL query", "a cover letter", "unit tests", "a travel plan"]
+    while len(prompts) < count:
+        i = len(prompts)
+        prompts.append(f"Write {topics[i % len(topics)]} for case #{i}, keeping it under {100 + i} words.")
+    return prompts[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--model", default="deepseek-chat")
+    args = parser.parse_args()
+
+    prompts = _load_prompts(args.data_dir, args.requests)
+    ledger = UsageLedger(prices=DEFAULT_PRICES)
+    print(f"{len(prompts)} analyze requests, prices of {args.model}")
+    print(f"{'layout':>8} {'prompt tok':>11} {'cached tok':>11} {'hit rate':>9} {'input $/1k req':>15}")
+    for label, build in (("legacy", legacy_messages), ("prefix", analysis_messages)):
+        cache = PrefixCacheSimulator()
+        prompt_tokens = cached_tokens = 0
+        cost = 0.0
+        for prompt in prompts:
+            usage = cache.send(build(prompt))
+            prompt_tokens += usage["prompt_tokens"]
+            cached_tokens += usage["cached_tokens"]
+            cost += ledger.cost(args.model, usage["prompt_tokens"], 0, usage["cached_tokens"])
+        print(
+            f"{label:>8} {prompt_tokens:>11} {cached_tokens:>11} {cached_tokens / prompt_tokens:>9.1%}"
+            f" {cost / len(prompts) * 1000:>15.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the local diff engine that renders ``highlighted_prompt``.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_prompt_diff
+
+Original/enhanced prompt pairs come from the saved ``data/analysis_history``
+and ``data/comparison_history`` records. For each pair the benchmark reports
+the diff time and the size of the highlighted enhanced prompt, which the model
+used to write into every comparison response (approximated as 4 characters
+per completion token).
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from ai_prompt_enhancement.services.prompt_refinement.prompt_diff import diff_prompts
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+CHARS_PER_TOKEN = 4
+
+
+def _load_pairs(data_dir: Path) -> List[Tuple[str, str]]:
+    pairs = []
+    for folder in ("analysis_history", "comparison_history"):
+        for path in sorted((data_dir / folder).glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            for record in records if isinstance(records, list) else [records]:
+                original, enhanced = record.get("original_prompt"), record.get("enhanced_prompt")
+                if isinstance(original, dict):
+                    original, enhanced = original.get("prompt"), (enhanced or {}).get("prompt")
+                if original and enhanced:
+                    pairs.append((original, enhanced))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    pairs = _load_pairs(args.data_dir)
+    if not pairs:
+        raise SystemExit(f"No prompt pairs found under {args.data_dir}")
+
+    timings, html_tokens = [], []
+    for original, enhanced in pairs:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            diff = diff_prompts(original, enhanced)
+        timings.append((time.perf_counter() - start) / args.repeat * 1e6)
+        html_tokens.append(len(diff.enhanced_html) / CHARS_PER_TOKEN)
+
+    words = [len(original.split()) + len(enhanced.split()) for original, enhanced in pairs]
+    print(f"{len(pairs)} prompt pairs, mean {statistics.mean(words):.0f} words per pair (max {max(words)})")
+    print(f"diff time: mean {statistics.mean(timings):.0f} us, max {max(timings):.0f} us")
+    print(f"highlighted prompt no longer generated: mean {statistics.mean(html_tokens):.0f} completion tokens per compare")
+
+
+if __name__ == "__main__":
+    main()
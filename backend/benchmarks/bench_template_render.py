@@ -0,0 +1,89 @@
+"""Microbenchmark of prompt construction with the precompiled template registry.
+
+Usage (from the backend directory):
+
+    PYTHONPATH=src DEEPSEEK_API_KEY=dummy python -m benchmarks.bench_template_render
+
+For each template the benchmark times the per-call path it replaces and
+``CompiledTemplate.render``:
+
+- ``analysis_input`` and the synthetic data templates: ``str.format`` on the
+  raw template string;
+- ``analysis_system`` with context: the regex normalization and context JSON
+  dump that ``DeepseekService._prepare_template`` did on every call, against
+  returning the pre-rendered system prompt and dumping the context once.
+"""
+import argparse
+import json
+import re
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from ai_prompt_enhancement.services.model.prompt_messages import ANALYSIS_INPUT, ANALYSIS_SYSTEM
+from ai_prompt_enhancement.services.prompt_refinement.prompt_templates import (
+    ANALYSIS_INPUT_TEMPLATE,
+    ANALYSIS_TEMPLATE,
+)
+from ai_prompt_enhancement.services.synthetic_data.generation_service import SIMILAR_CONTENT, SYNTHETIC_DATA
+from ai_prompt_enhancement.services.synthetic_data.prompt_templates import (
+    SIMILAR_CONTENT_TEMPLATE,
+    SYNTHETIC_DATA_TEMPLATE,
+)
+
+PROMPT = "Write a product description for a waterproof hiking boot aimed at beginners. " * 4
+CONTEXT = {"audience": "beginners", "tone": "friendly", "model": "deepseek-chat"}
+VALUES = {
+    "template": "Our {product} keeps your feet dry on every trail.",
+    "instructions": "Friendly, concise, two short paragraphs.",
+    "batch_size": 3,
+    "reference_content": "The TrailMate boot keeps water out and comfort in.",
+}
+
+
+def legacy_prepare_template(template: str, context: Dict) -> Tuple[str, str]:
+    """The per-call normalization formerly done by ``DeepseekService._prepare_template``."""
+    template = template.strip()
+    template = re.sub(r'\n\s*\n', '\n', template)
+    template = re.sub(r'\s*([,:{}])\s*', r'\1 ', template)
+    context_str = json.dumps(context, separators=(',', ':'))
+    context_str = context_str.replace("{", "{{").replace("}", "}}")
+    return template, context_str
+
+
+def _cases() -> List[Tuple[str, Callable[[], str], Callable[[], str]]]:
+    similar = {key: VALUES[key] for key in SIMILAR_CONTENT.placeholders}
+    synthetic = {key: VALUES[key] for key in SYNTHETIC_DATA.placeholders}
+    return [
+        ("analysis_input",
+         lambda: ANALYSIS_INPUT_TEMPLATE.format(prompt=PROMPT, context="Marketing copy"),
+         lambda: ANALYSIS_INPUT.render(prompt=PROMPT, context="Marketing copy")),
+        ("analysis_system",
+         lambda: legacy_prepare_template(ANALYSIS_TEMPLATE, CONTEXT),
+         lambda: (ANALYSIS_SYSTEM.render(), json.dumps(CONTEXT))),
+        ("synthetic_data",
+         lambda: SYNTHETIC_DATA_TEMPLATE.format(**synthetic),
+         lambda: SYNTHETIC_DATA.render(**synthetic)),
+        ("similar_content",
+         lambda: SIMILAR_CONTENT_TEMPLATE.format(**similar),
+         lambda: SIMILAR_CONTENT.render(**similar)),
+    ]
+
+
+def _per_call_us(func: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'template':>16} {'legacy us':>10} {'render us':>10} {'speedup':>8}")
+    for name, legacy, render in _cases():
+        legacy_us = _per_call_us(legacy, args.number)
+        render_us = _per_call_us(render, args.number)
+        print(f"{name:>16} {legacy_us:>10.2f} {render_us:>10.2f} {legacy_us / render_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
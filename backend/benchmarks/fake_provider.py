@@ -0,0 +1,109 @@
+"""Local OpenAI-compatible fake provider used by the benchmarks.
+
+The server answers ``POST /chat/completions`` after a fixed delay with a
+canned analysis payload, so benchmarks can measure how the model layer behaves
+under concurrency without touching a real upstream. Streaming requests are
+answered with the same payload split into small ``chat.completion.chunk`` deltas.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+ANALYSIS_PAYLOAD = {
+    "metrics": {
+        name: {
+            "score": 0.8,
+            "description": f"Fake {name} evaluation",
+            "suggestions": [f"Improve {name}"],
+        }
+        for name in ["clarity", "structure", "examples", "formatting", "output_spec"]
+    },
+    "suggestions": ["Add more detail"],
+    "enhanced_prompt": "Enhanced prompt",
+}
+
+
+def create_app(delay: float) -> FastAPI:
+    """Create the fake provider application answering after ``delay`` seconds."""
+    app = FastAPI()
+    app.state.requests = 0
+
+    async def stream_chunks(model: str, content: str, chunk_size: int = 16):
+        for start in range(0, len(content), chunk_size):
+            await asyncio.sleep(delay / 20)
+            chunk = {
+                "id": "chatcmpl-stream",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": content[start:start + chunk_size]},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        content = json.dumps(ANALYSIS_PAYLOAD, indent=2)
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(body.get("model", "fake-model"), content),
+                media_type="text/event-stream",
+            )
+        await asyncio.sleep(delay)
+        return {
+            "id": f"chatcmpl-{app.state.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": sum(len(m.get("content", "")) // 4 for m in body.get("messages", [])),
+                "completion_tokens": len(content) // 4,
+                "total_tokens": 0,
+            },
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_fake_provider(delay: float = 0.2) -> Iterator[str]:
+    """Run the fake provider in a background thread and yield its base URL."""
+    port = _free_port()
+    config = uvicorn.Config(
+        create_app(delay), host="127.0.0.1", port=port, log_level="warning", backlog=4096
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
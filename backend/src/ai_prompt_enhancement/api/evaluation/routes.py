@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Union
 from loguru import logger
 import json
+import os
 
 from ...services.evaluation.evaluation_service import EvaluationService
 from ...core.config import get_settings
@@ -104,27 +106,54 @@ class EvaluationResult(BaseModel):
             }
         }
 
+class BatchEvaluationItem(BaseModel):
+    """
+    Model for the result of one batch row; failed rows carry an error instead of scores.
+    """
+    overall_score: Optional[float] = Field(None, ge=0, le=1, description="Overall evaluation score (0-1)")
+    criteria_scores: Optional[Dict[str, float]] = Field(None, description="Individual scores for each criterion")
+    feedback: Optional[List[str]] = Field(None, description="List of feedback points")
+    passed_thresholds: Optional[bool] = Field(None, description="Whether all thresholds were met")
+    error: Optional[str] = Field(None, description="Why the row could not be evaluated")
+    reused: Optional[str] = Field(
+        None,
+        description="'duplicate' if copied from the same prompt in this batch, 'memo' if reused from an earlier run"
+    )
+    latency_ms: float = Field(..., description="Time taken to evaluate the row in milliseconds")
+
 class BatchEvaluationResult(BaseModel):
     """
     Model for batch evaluation results.
     """
     total_prompts: int = Field(..., description="Total number of prompts evaluated")
     passed_prompts: int = Field(..., description="Number of prompts that passed all thresholds")
-    average_score: float = Field(..., description="Average overall score across all prompts")
-    results: Dict[str, EvaluationResult] = Field(..., description="Individual results for each prompt")
+    failed_prompts: int = Field(0, description="Number of prompts that could not be evaluated")
+    average_score: float = Field(..., description="Average overall score across successfully evaluated prompts")
+    duplicate_prompts: int = Field(0, description="Rows copied from the same prompt earlier in the batch")
+    memo_hits: int = Field(0, description="Rows reused from earlier evaluations of the same prompt and criteria")
+    llm_calls_saved: int = Field(0, description="Model calls avoided by reusing rows")
+    elapsed_ms: Optional[float] = Field(None, description="Wall-clock time of the batch in milliseconds")
+    results: Dict[str, BatchEvaluationItem] = Field(..., description="Individual results for each prompt, in CSV order")
 
     class Config:
         schema_extra = {
             "example": {
                 "total_prompts": 10,
                 "passed_prompts": 8,
+                "failed_prompts": 1,
                 "average_score": 0.82,
+                "elapsed_ms": 2150.4,
                 "results": {
                     "prompt_1": {
                         "overall_score": 0.85,
                         "criteria_scores": {"clarity": 0.9},
                         "feedback": ["Well-structured prompt"],
-                        "passed_thresholds": True
+                        "passed_thresholds": True,
+                        "latency_ms": 812.3
+                    },
+                    "prompt_2": {
+                        "error": "Prompt is empty",
+                        "latency_ms": 0.1
                     }
                 }
             }
@@ -222,6 +251,53 @@ async def evaluate_prompt(
         logger.error(f"Error evaluating prompt: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _detach_upload(file: UploadFile) -> BinaryIO:
+    """
+    Return a handle on the uploaded file that outlives the request form.
+    FastAPI closes form files as soon as the endpoint returns, before a
+    streaming body runs, so the spooled file is moved to disk if needed and
+    its descriptor duplicated.
+    """
+    spooled = file.file
+    spooled.rollover()
+    detached = os.fdopen(os.dup(spooled.fileno()), "rb")
+    detached.seek(0)
+    return detached
+
+async def _stream_batch_evaluation(
+    evaluation_service: EvaluationService, file: UploadFile, criteria: List[Dict], concurrency: Optional[int],
+    force_refresh: bool
+) -> StreamingResponse:
+    """Start a batch evaluation and stream its rows and summary as NDJSON."""
+    upload = _detach_upload(file)
+    lines: AsyncIterator[Dict[str, Any]] = evaluation_service.evaluate_prompts_batch_stream(
+        upload, criteria, concurrency, force_refresh
+    )
+    try:
+        # Wait for the first line so that an invalid CSV or criteria still gets a 400
+        first = await lines.__anext__()
+    except Exception:
+        upload.close()
+        raise
+
+    async def body():
+        try:
+            yield json.dumps(first, ensure_ascii=False) + "\n"
+            async for line in lines:
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Error in streamed batch evaluation: {str(e)}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            await lines.aclose()
+            upload.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post(
     "/evaluate/batch",
     response_model=BatchEvaluationResult,
@@ -230,11 +306,23 @@ async def evaluate_prompt(
     Perform batch evaluation on multiple prompts.
     
     Upload a CSV file containing prompts to evaluate them all against
-    the same set of criteria. The CSV should have columns:
-    - prompt_id: Unique identifier for each prompt
-    - prompt_text: The prompt to evaluate
-    
-    Additional columns will be treated as context variables.
+    the same set of criteria. The CSV must have a `prompt` column.
+
+    Rows are evaluated concurrently, up to `concurrency` at a time (capped
+    by the server), and results are returned in CSV order. A row that
+    fails is reported with an `error` instead of failing the whole batch,
+    and every row reports its `latency_ms`.
+
+    Each distinct prompt is evaluated once per batch and its duplicates
+    reuse its row (`reused: "duplicate"`). Rows evaluated by earlier batches
+    with the same criteria and model are reused too (`reused: "memo"`),
+    unless `force_refresh=true`. The summary reports `llm_calls_saved`.
+
+    With `stream=true` the response is an `application/x-ndjson` stream
+    instead, with one line per row as soon as it is evaluated (in completion
+    order, with its 0-based CSV `index`), then a final `{"summary": {...}}`
+    line with the batch totals. An invalid CSV or criteria is still
+    rejected with a 400 before the stream starts.
     """,
     response_description="Batch evaluation results with individual and aggregate scores",
     responses={
@@ -245,16 +333,36 @@ async def evaluate_prompt(
                     "example": {
                         "total_prompts": 10,
                         "passed_prompts": 8,
+                        "failed_prompts": 1,
                         "average_score": 0.82,
+                        "duplicate_prompts": 3,
+                        "memo_hits": 0,
+                        "llm_calls_saved": 3,
+                        "elapsed_ms": 2150.4,
                         "results": {
                             "prompt_1": {
                                 "overall_score": 0.85,
                                 "criteria_scores": {"clarity": 0.9},
                                 "feedback": ["Well-structured prompt"],
-                                "passed_thresholds": True
+                                "passed_thresholds": True,
+                                "latency_ms": 812.3
+                            },
+                            "prompt_2": {
+                                "error": "Prompt is empty",
+                                "latency_ms": 0.1
                             }
                         }
                     }
+                },
+                "application/x-ndjson": {
+                    "example": (
+                        '{"index": 1, "error": "Prompt is empty", "latency_ms": 0.1}\n'
+                        '{"index": 0, "overall_score": 0.85, "criteria_scores": {"clarity": 0.9}, '
+                        '"feedback": ["Well-structured prompt"], "passed_thresholds": true, "latency_ms": 812.3}\n'
+                        '{"summary": {"total_prompts": 2, "passed_prompts": 1, "failed_prompts": 1, '
+                        '"average_score": 0.85, "duplicate_prompts": 0, "memo_hits": 0, "llm_calls_saved": 0, '
+                        '"elapsed_ms": 815.0}}\n'
+                    )
                 }
             }
         },
@@ -279,14 +387,22 @@ async def evaluate_prompt(
 async def evaluate_prompts_batch(
     file: UploadFile = File(...),
     criteria: str = Form(...),
+    concurrency: Optional[int] = Form(None, ge=1, description="Maximum number of rows evaluated at once"),
+    stream: bool = Form(False, description="Stream one NDJSON line per row as it completes"),
+    force_refresh: bool = Form(False, description="Re-evaluate prompts memoized by earlier batches"),
     evaluation_service: EvaluationService = Depends(lambda: EvaluationService())
-) -> BatchEvaluationResult:
+) -> Union[BatchEvaluationResult, StreamingResponse]:
     """Evaluate multiple prompts in batch mode."""
     try:
         criteria_list = json.loads(criteria)
-        return await evaluation_service.evaluate_prompts_batch(file, criteria_list)
+        if stream:
+            return await _stream_batch_evaluation(evaluation_service, file, criteria_list, concurrency, force_refresh)
+        return await evaluation_service.evaluate_prompts_batch(file, criteria_list, concurrency, force_refresh)
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid criteria JSON format")
+    except ValueError as e:
+        logger.error(f"Invalid batch evaluation request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in batch evaluation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
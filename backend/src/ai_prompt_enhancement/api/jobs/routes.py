@@ -0,0 +1,195 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Optional
+from loguru import logger
+import json
+
+from ...schemas.job import GenerationJobRequest, JobResponse
+from ...services.jobs.job_kinds import submit_evaluation_job, submit_generation_job
+from ...services.jobs.job_manager import FINAL_STATUSES, JobError, job_manager
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={
+        404: {"description": "Job not found"},
+        500: {"description": "Internal server error"}
+    }
+)
+
+# OpenAPI Tags Metadata
+tags_metadata = [
+    {
+        "name": "jobs",
+        "description": """
+        Background jobs for long-running batch evaluation and synthetic data generation.
+        These endpoints allow you to:
+        - Submit a job and get its id straight away
+        - Poll a job or subscribe to its progress with Server-Sent Events
+        - Fetch the rows completed so far
+        - Cancel a job
+        Completed rows are checkpointed, so jobs resume after a restart.
+        """
+    }
+]
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _get_job(job_id: str) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post(
+    "/evaluation",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Submit a batch evaluation job",
+    description="""
+    Background variant of `/evaluation/evaluate/batch`, taking the same form
+    fields. The CSV is stored and checked (a `prompt` column is required)
+    before the job is queued; the response is the queued job.
+
+    Each row result has the same fields as in the batch response, and the
+    job summary has the batch totals.
+    """,
+    response_description="The queued job"
+)
+async def submit_evaluation(
+    file: UploadFile = File(..., description="CSV file with a prompt column"),
+    criteria: str = Form(..., description="JSON list of evaluation criteria"),
+    concurrency: Optional[int] = Form(None, ge=1, description="Maximum number of rows evaluated at once"),
+    force_refresh: bool = Form(False, description="Re-evaluate prompts memoized by earlier batches")
+) -> JobResponse:
+    """Store an uploaded CSV and queue its evaluation."""
+    try:
+        await file.seek(0)
+        return await submit_evaluation_job(file.file, json.loads(criteria), concurrency, file.filename, force_refresh)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid criteria JSON format")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting evaluation job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/generation",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Submit a synthetic data generation job",
+    description="""
+    Make `batches` synthetic data generation calls of `batch_size` items each
+    in the background. Each row result holds the `/synthetic-data/generate`
+    response of one call, and the calls are grouped in a history session
+    named after the job id.
+    """,
+    response_description="The queued job"
+)
+async def submit_generation(request: GenerationJobRequest) -> JobResponse:
+    """Queue a synthetic data generation job."""
+    try:
+        return await submit_generation_job(request.model_dump())
+    except Exception as e:
+        logger.error(f"Error submitting generation job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get(
+    "",
+    response_model=List[JobResponse],
+    summary="List jobs",
+    description="Return the most recent jobs first, optionally filtered by status."
+)
+async def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed, failed or cancelled"),
+    limit: int = Query(100, ge=1, le=1000)
+) -> List[JobResponse]:
+    """List jobs."""
+    return job_manager.list(status=status, limit=limit)
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    summary="Get a job",
+    description="Poll the status and progress of a job."
+)
+async def get_job(job_id: str) -> JobResponse:
+    """Return a job."""
+    return _get_job(job_id)
+
+@router.get(
+    "/{job_id}/events",
+    summary="Subscribe to job progress",
+    description="""
+    Server-Sent Events stream of a job:
+    - `progress`: the job, sent on subscribing and whenever rows complete or
+      the status changes (repeated periodically as a keepalive)
+    - `done`: the job once it has completed, failed or been cancelled; the stream then ends
+    """,
+    response_description="Server-Sent Events stream of job progress",
+    responses={
+        200: {
+            "description": "Job event stream",
+            "content": {
+                "text/event-stream": {
+                    "example": 'event: progress\ndata: {"id": "3f2a...", "status": "running", "total": 2000, "completed": 1250, "failed": 3}\n\n'
+                }
+            }
+        }
+    }
+)
+async def job_events(job_id: str) -> StreamingResponse:
+    """Stream the progress of a job."""
+    _get_job(job_id)
+
+    async def event_stream():
+        try:
+            async for job in job_manager.events(job_id):
+                yield _sse_event("done" if job["status"] in FINAL_STATUSES else "progress", job)
+        except Exception as e:
+            logger.error(f"Error streaming events of job {job_id}: {str(e)}")
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get(
+    "/{job_id}/rows",
+    summary="Get the completed rows of a job",
+    description="""
+    `application/x-ndjson` stream of the rows checkpointed so far, in
+    completion order, each with its 0-based `index`. Available while the job
+    is running and after it was cancelled.
+    """,
+    response_description="NDJSON stream of completed rows"
+)
+async def job_rows(job_id: str) -> StreamingResponse:
+    """Stream the checkpointed rows of a job."""
+    try:
+        rows = job_manager.rows(job_id)
+    except JobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        (json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
+@router.post(
+    "/{job_id}/cancel",
+    response_model=JobResponse,
+    summary="Cancel a job",
+    description="Cancel a queued or running job. Rows completed so far stay available."
+)
+async def cancel_job(job_id: str) -> JobResponse:
+    """Cancel a job."""
+    _get_job(job_id)
+    try:
+        return await job_manager.cancel(job_id)
+    except JobError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,44 @@
+"""ASGI middleware shared by all routes."""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.model.usage_ledger import usage_ledger
+
+# Ledger endpoint of requests that did not match a route
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+class UsageTrackingMiddleware:
+    """Book the provider calls made while serving a request under its route's path template.
+
+    Requests for ``/jobs/{job_id}`` share one ledger entry whatever the job id,
+    so the ledger does not grow with the number of distinct URLs.
+
+    Responses whose provider calls finished before the headers were sent get
+    ``X-Usage-*`` headers with the request's token totals and cost; streamed
+    responses report usage in their payload instead.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        def endpoint() -> str:
+            # Routing adds the matched route to the scope before the endpoint runs
+            return getattr(scope.get("route"), "path", None) or UNMATCHED_ENDPOINT
+
+        with usage_ledger.track_request(endpoint) as usage:
+            async def send_with_usage(message: Message) -> None:
+                if message["type"] == "http.response.start" and usage["calls"]:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Usage-Prompt-Tokens"] = str(usage["prompt_tokens"])
+                    headers["X-Usage-Completion-Tokens"] = str(usage["completion_tokens"])
+                    headers["X-Usage-Cached-Tokens"] = str(usage["cached_tokens"])
+                    headers["X-Usage-Cost-USD"] = f"{usage['cost_usd']:.6f}"
+                await send(message)
+
+            await self.app(scope, receive, send_with_usage)
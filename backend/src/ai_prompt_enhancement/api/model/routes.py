@@ -1,9 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field, ValidationError
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from loguru import logger
 
 from ...services.model.deepseek_service import DeepseekService
+from ...services.model.model_factory import model_factory
+from ...services.model.circuit_breaker import CLOSED, circuit_breakers
+from ...services.model.health_prober import health_prober
+from ...services.model.micro_batcher import micro_batcher
+from ...services.model.hedging import hedger
+from ...services.model.telemetry import telemetry
+from ...services.model.rate_limiter import rate_limiters
+from ...services.model.usage_ledger import usage_ledger
+from ...services.core.single_flight import single_flight
 from ...core.config import get_settings
 
 router = APIRouter(
@@ -45,6 +54,20 @@ class ModelStatus(BaseModel):
     latency: float = Field(..., description="Current average latency in seconds")
     requests_per_minute: int = Field(..., description="Current requests per minute")
     error_rate: float = Field(..., description="Current error rate percentage")
+    calls: Optional[int] = Field(None, description="Calls in the telemetry window")
+    latency_p50: Optional[float] = Field(None, description="Median call latency in seconds")
+    latency_p95: Optional[float] = Field(None, description="95th percentile call latency in seconds")
+    latency_p99: Optional[float] = Field(None, description="99th percentile call latency in seconds")
+    ttft_p50: Optional[float] = Field(None, description="Median time to first token of streamed calls in seconds")
+    ttft_p95: Optional[float] = Field(None, description="95th percentile time to first token of streamed calls in seconds")
+    prompt_tokens: Optional[int] = Field(None, description="Prompt tokens sent in the telemetry window")
+    completion_tokens: Optional[int] = Field(None, description="Completion tokens received in the telemetry window")
+    cached_tokens: Optional[int] = Field(None, description="Prompt tokens served from the provider's prompt cache in the telemetry window")
+    prompt_cache_hit_rate: Optional[float] = Field(None, description="Share of prompt tokens served from the provider's prompt cache")
+    probe_status: Optional[str] = Field(None, description="Result of the latest background health probe")
+    probe_latency: Optional[float] = Field(None, description="Latency of the latest health probe in seconds")
+    checked_at: Optional[str] = Field(None, description="When the latest health probe finished")
+    circuit_state: Optional[str] = Field(None, description="Circuit breaker state of the model's provider (closed, open or half_open)")
 
     class Config:
         schema_extra = {
@@ -53,13 +76,14 @@ class ModelStatus(BaseModel):
                 "status": "healthy",
                 "latency": 0.5,
                 "requests_per_minute": 100,
-                "error_rate": 0.1
+                "error_rate": 0.1,
+                "circuit_state": "closed"
             }
         }
 
 @router.get("/capabilities", response_model=List[ModelCapabilities])
 async def get_model_capabilities(
-    deepseek_service: DeepseekService = Depends(lambda: DeepseekService())
+    deepseek_service: DeepseekService = Depends(lambda: model_factory.get_service("deepseek"))
 ) -> List[ModelCapabilities]:
     """
     Get capabilities of all available AI models.
@@ -87,11 +111,15 @@ async def get_model_capabilities(
 
 @router.get("/status", response_model=List[ModelStatus])
 async def get_model_status(
-    deepseek_service: DeepseekService = Depends(lambda: DeepseekService())
+    deepseek_service: DeepseekService = Depends(lambda: model_factory.get_service("deepseek"))
 ) -> List[ModelStatus]:
     """
     Get current status of all AI models.
 
+    Latency, throughput and error rate come from the telemetry of real
+    provider calls and availability from the background health probes, so
+    this endpoint never sends a request to a provider.
+
     Returns:
         List[ModelStatus]: List of model status information
 
@@ -101,6 +129,26 @@ async def get_model_status(
     try:
         logger.info("Retrieving model status...")
         status = await deepseek_service.get_status()
+        listed = {stat["name"] for stat in status}
+        for model in [*telemetry.models(), *health_prober.models]:
+            if model not in listed:
+                status.append(telemetry.status(model))
+                listed.add(model)
+        for stat in status:
+            probe = health_prober.status(stat["name"])
+            if probe is not None:
+                stat["probe_status"] = probe["status"]
+                stat["probe_latency"] = probe["latency"]
+                stat["checked_at"] = probe["checked_at"]
+                if stat["status"] == "idle":
+                    # Without recent traffic the probe is the best signal we have
+                    stat["status"] = probe["status"]
+            try:
+                stat["circuit_state"] = circuit_breakers.get(model_factory.get_provider(stat["name"])).state
+            except ValueError:
+                continue
+            if stat["circuit_state"] != CLOSED:
+                stat["status"] = "unavailable"
         try:
             return [ModelStatus(**stat) for stat in status]
         except ValidationError as e:
@@ -111,4 +159,52 @@ async def get_model_status(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve model status: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_model_metrics() -> Dict[str, Any]:
+    """
+    Get in-process metrics of the model call layer.
+
+    Returns:
+        Dict[str, Any]: Per-operation single-flight counters (calls made,
+        upstream requests executed, and calls collapsed into an in-flight request)
+        and, per provider model, the rate limiter's concurrency window, queue
+        depth and remaining request/token budgets, hedged requests fired and
+        won, each provider's circuit breaker state, and per model call
+        telemetry (window aggregates, latency histogram and outcome counts),
+        and micro-batching counters of analyze requests
+    """
+    return {
+        "single_flight": single_flight.stats(),
+        "rate_limits": rate_limiters.stats(),
+        "hedging": hedger.stats(),
+        "circuit_breakers": circuit_breakers.stats(),
+        "telemetry": telemetry.stats(),
+        "micro_batching": micro_batcher.stats()
+    }
+
+@router.get("/usage", response_model=Dict[str, Any])
+async def get_model_usage(
+    group_by: str = Query("endpoint,model,day", description="Comma-separated grouping fields: endpoint, model, day"),
+    start: Optional[str] = Query(None, description="First day to include (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, description="Last day to include (YYYY-MM-DD)"),
+    endpoint: Optional[str] = Query(None, description="Only include this endpoint path"),
+    model: Optional[str] = Query(None, description="Only include this model")
+) -> Dict[str, Any]:
+    """
+    Get aggregated token usage and cost of provider calls.
+
+    Returns:
+        Dict[str, Any]: Rows of call, prompt/completion/cached token and USD
+        cost totals per group, most expensive first, and the overall total
+
+    Raises:
+        HTTPException: If a grouping field is unknown
+    """
+    fields = [field.strip() for field in group_by.split(",") if field.strip()]
+    try:
+        return usage_ledger.query(fields, start=start, end=end, endpoint=endpoint, model=model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Body
 from pydantic import BaseModel, Field
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
 from loguru import logger
 
 from ...services.prompt_refinement.refinement_service import RefinementService
@@ -22,6 +22,7 @@ class AnalyzeRequest(BaseModel):
     prompt: str = Field(..., description="The prompt text to analyze", min_length=1)
     model: str = Field(..., description="The model to use for analysis")
     context: Optional[str] = Field(None, description="Optional context for analysis")
+    force_refresh: bool = Field(False, description="Bypass the result cache and call the model")
 
     class Config:
         schema_extra = {
@@ -39,6 +40,7 @@ class AnalyzeResponse(BaseModel):
     metrics: Dict = Field(..., description="Analysis metrics and scores")
     suggestions: List[str] = Field(..., description="List of improvement suggestions")
     enhanced_prompt: Optional[str] = Field(None, description="Enhanced version of the prompt")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Provider call metadata such as attempt and retry counts")
 
     class Config:
         schema_extra = {
@@ -63,6 +65,7 @@ class CompareRequest(BaseModel):
     original_prompt: str = Field(..., description="The original prompt text", min_length=1)
     enhanced_prompt: str = Field(..., description="The enhanced prompt text", min_length=1)
     context: Optional[Dict] = Field(None, description="Optional context for comparison")
+    force_refresh: bool = Field(False, description="Bypass the result cache and call the model")
 
     class Config:
         schema_extra = {
@@ -80,6 +83,7 @@ class CompareResponse(BaseModel):
     comparison_metrics: Dict = Field(..., description="Comparison metrics between prompts")
     improvements: List[str] = Field(..., description="List of identified improvements")
     recommendation: str = Field(..., description="Overall recommendation")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Provider call metadata such as attempt and retry counts")
 
     class Config:
         schema_extra = {
@@ -120,7 +124,8 @@ async def analyze_prompt(
         result = await refinement_service.analyze_prompt(
             prompt=request.prompt,
             model=request.model,
-            context=request.context
+            context=request.context,
+            force_refresh=request.force_refresh
         )
         return AnalyzeResponse(**result)
     except Exception as e:
@@ -152,7 +157,8 @@ async def compare_prompts(
         result = await refinement_service.compare_prompts(
             original_prompt=request.original_prompt,
             enhanced_prompt=request.enhanced_prompt,
-            context=request.context
+            context=request.context,
+            force_refresh=request.force_refresh
         )
         return CompareResponse(**result)
     except Exception as e:
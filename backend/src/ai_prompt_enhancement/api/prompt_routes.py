@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from typing import List, Dict, Union
+from fastapi import APIRouter, Depends, HTTPException, Body, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, List, Dict, Optional, Union
+import json
 import logging
 
+from ..core.config import get_settings
 from ..schemas.prompt import (
     PromptAnalyzeRequest,
+    PromptBatchAnalyzeRequest,
+    PromptBatchCompareRequest,
+    PromptComparisonPair,
     PromptAnalysisResponse,
     PromptComparisonRequest,
     PromptComparisonResponse,
+    PromptAnalyzeCompareResponse,
 )
 from ..services.prompt_service import PromptService
+from ..services.core.result_cache import result_cache
 
 router = APIRouter(
     prefix="/prompts",
@@ -113,6 +122,218 @@ async def analyze_prompt(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Any) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post(
+    "/analyze/stream",
+    summary="Analyze prompt quality (streaming)",
+    description="""
+    Streaming variant of `/prompts/analyze` using Server-Sent Events.
+    
+    The response is a `text/event-stream` with the following events:
+    - `token`: a raw text delta relayed from the model provider
+    - `metric`: a completed metric (clarity, structure, examples, formatting, output_spec),
+      sent as soon as its JSON object has been fully generated
+    - `result`: the final payload, identical to the `/prompts/analyze` response
+    - `error`: emitted if the analysis fails mid-stream
+    """,
+    response_description="Server-Sent Events stream of analysis progress",
+    responses={
+        200: {
+            "description": "Analysis event stream",
+            "content": {
+                "text/event-stream": {
+                    "example": 'event: metric\ndata: {"name": "clarity", "metric": {"score": 0.85, "description": "...", "suggestions": []}}\n\n'
+                }
+            }
+        },
+        400: {
+            "description": "Invalid request",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Prompt text is required"}
+                }
+            }
+        }
+    }
+)
+async def analyze_prompt_stream(
+    request: Union[PromptAnalyzeRequest, Dict] = Body(...),
+    prompt_service: PromptService = Depends()
+) -> StreamingResponse:
+    """Stream the analysis of a prompt as Server-Sent Events."""
+    try:
+        PromptService._parse_analyze_request(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def event_stream():
+        try:
+            async for event, data in prompt_service.analyze_prompt_stream(request):
+                yield _sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Error in streaming analysis: {str(e)}")
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post(
+    "/analyze-compare",
+    response_model=PromptAnalyzeCompareResponse,
+    summary="Analyze a prompt and compare it with its enhanced version",
+    description="""
+    Fused `/prompts/analyze` followed by `/prompts/compare` in one model round trip.
+    
+    Accepts the same body as `/prompts/analyze`. The model analyzes the prompt,
+    writes the enhanced version and scores it with the same metrics in a single
+    call; the comparison reuses the original prompt's analysis metrics instead
+    of scoring it again. Both results are saved to history.
+    """,
+    response_description="The analysis and the comparison of the original and enhanced prompts",
+    responses={
+        500: {
+            "description": "Internal server error",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Failed to analyze prompt"}
+                }
+            }
+        },
+        503: {
+            "description": "Model provider unavailable",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Model provider 'deepseek' is unavailable and no fallback model could be used"}
+                }
+            }
+        }
+    }
+)
+async def analyze_and_compare_prompt(
+    request: Union[PromptAnalyzeRequest, Dict] = Body(...),
+    prompt_service: PromptService = Depends()
+) -> PromptAnalyzeCompareResponse:
+    """Analyze a prompt and compare it with its enhanced version."""
+    try:
+        return await prompt_service.analyze_and_compare(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _ndjson_line(data: Any) -> str:
+    """Format a single NDJSON line."""
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+def _check_batch_size(count: int) -> None:
+    """Reject bulk requests with more items than the configured maximum."""
+    max_items = get_settings().bulk_max_items
+    if count > max_items:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {max_items} items, got {count}")
+
+async def _read_jsonl(file: UploadFile, model: Any) -> List[Any]:
+    """Parse an uploaded JSONL file into one ``model`` per non-empty line."""
+    items = []
+    content = (await file.read()).decode("utf-8")
+    for number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(model.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid item on line {number}: {e.errors()[0]['msg']}")
+    if not items:
+        raise HTTPException(status_code=400, detail="The uploaded file contains no items")
+    return items
+
+def _ndjson_response(lines: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream result dicts as NDJSON, ending with an error line if the batch fails."""
+    async def stream():
+        try:
+            async for line in lines:
+                yield _ndjson_line(line)
+        except Exception as e:
+            logger.error(f"Error in bulk request: {str(e)}")
+            yield _ndjson_line({"error": str(e)})
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+_BATCH_ANALYZE_RESPONSES = {
+    200: {
+        "description": "NDJSON stream with one line per prompt",
+        "content": {
+            "application/x-ndjson": {
+                "example": '{"index": 1, "result": {"metrics": {}, "suggestions": [], "enhanced_prompt": "...", "model_used": "deepseek-chat"}}\n'
+                           '{"index": 0, "error": "Prompt text is required"}\n'
+            }
+        }
+    },
+    400: {
+        "description": "Invalid batch",
+        "content": {
+            "application/json": {
+                "example": {"detail": "A batch may contain at most 1000 items, got 1200"}
+            }
+        }
+    }
+}
+
+@router.post(
+    "/analyze/batch",
+    summary="Analyze many prompts",
+    description="""
+    Bulk variant of `/prompts/analyze`.
+    
+    Prompts are analyzed with bounded concurrency (`concurrency`, defaulting to
+    the `BULK_CONCURRENCY` setting) and the response is an `application/x-ndjson`
+    stream with one line per prompt, in completion order:
+    - `{"index": i, "result": {...}}` with the `/prompts/analyze` response for prompt `i`
+    - `{"index": i, "error": "..."}` if that prompt failed; the other prompts are unaffected
+    
+    The successful analyses are saved to history as a single record.
+    """,
+    response_description="NDJSON stream of per-prompt analyses",
+    responses=_BATCH_ANALYZE_RESPONSES
+)
+async def analyze_prompts_batch(
+    request: PromptBatchAnalyzeRequest,
+    prompt_service: PromptService = Depends()
+) -> StreamingResponse:
+    """Analyze a list of prompts and stream the results as NDJSON."""
+    _check_batch_size(len(request.prompts))
+    return _ndjson_response(prompt_service.analyze_prompts_batch(request.prompts, request.concurrency))
+
+@router.post(
+    "/analyze/batch/upload",
+    summary="Analyze many prompts from a JSONL file",
+    description="""
+    Same as `/prompts/analyze/batch`, reading the prompts from an uploaded JSONL
+    file with one `/prompts/analyze` request object per line. Result indices are
+    the positions of the non-empty lines, starting at 0.
+    """,
+    response_description="NDJSON stream of per-prompt analyses",
+    responses=_BATCH_ANALYZE_RESPONSES
+)
+async def analyze_prompts_batch_upload(
+    file: UploadFile = File(..., description="JSONL file of analyze requests"),
+    concurrency: Optional[int] = Form(None, ge=1, description="Maximum number of prompts analyzed at once"),
+    prompt_service: PromptService = Depends()
+) -> StreamingResponse:
+    """Analyze the prompts of an uploaded JSONL file and stream the results as NDJSON."""
+    prompts = await _read_jsonl(file, PromptAnalyzeRequest)
+    _check_batch_size(len(prompts))
+    return _ndjson_response(prompt_service.analyze_prompts_batch(prompts, concurrency))
+
 @router.post(
     "/compare",
     response_model=PromptComparisonResponse,
@@ -201,6 +422,69 @@ async def compare_prompts(
         logger.exception("Full traceback:")
         raise HTTPException(status_code=500, detail=str(e))
 
+_BATCH_COMPARE_RESPONSES = {
+    200: {
+        "description": "NDJSON stream with one line per pair and a final summary",
+        "content": {
+            "application/x-ndjson": {
+                "example": '{"index": 0, "result": {"original_prompt": {...}, "enhanced_prompt": {...}, "model_used": "gpt-4o-mini"}}\n'
+                           '{"summary": {"pairs": 1, "unique_pairs": 1, "succeeded": 1, "failed": 0, '
+                           '"mean_deltas": {"clarity": 0.2, "structure": 0.15}}}\n'
+            }
+        }
+    },
+    400: _BATCH_ANALYZE_RESPONSES[400]
+}
+
+@router.post(
+    "/compare/batch",
+    summary="Compare many prompt pairs",
+    description="""
+    Bulk variant of `/prompts/compare` for regression runs.
+    
+    Identical pairs (same prompts, context and model) are compared once. Pairs
+    run with bounded concurrency and the response is an `application/x-ndjson`
+    stream, in completion order, of:
+    - `{"index": i, "result": {...}}` with the `/prompts/compare` response for pair `i`
+    - `{"index": i, "error": "..."}` if that pair failed
+    
+    followed by a final `{"summary": {...}}` line with pair counts and
+    `mean_deltas`: the mean enhanced minus original score per metric over the
+    successful pairs. The unique comparisons are saved to history as a single record.
+    """,
+    response_description="NDJSON stream of per-pair comparisons and a summary",
+    responses=_BATCH_COMPARE_RESPONSES
+)
+async def compare_prompts_batch(
+    request: PromptBatchCompareRequest,
+    prompt_service: PromptService = Depends()
+) -> StreamingResponse:
+    """Compare a list of prompt pairs and stream the results as NDJSON."""
+    _check_batch_size(len(request.pairs))
+    pairs = [{**pair.model_dump(), "force_refresh": request.force_refresh} for pair in request.pairs]
+    return _ndjson_response(prompt_service.compare_prompts_batch(pairs, request.concurrency))
+
+@router.post(
+    "/compare/batch/upload",
+    summary="Compare many prompt pairs from a JSONL file",
+    description="""
+    Same as `/prompts/compare/batch`, reading the pairs from an uploaded JSONL
+    file with one `{"original_prompt", "enhanced_prompt", "context"}` object per line.
+    Result indices are the positions of the non-empty lines, starting at 0.
+    """,
+    response_description="NDJSON stream of per-pair comparisons and a summary",
+    responses=_BATCH_COMPARE_RESPONSES
+)
+async def compare_prompts_batch_upload(
+    file: UploadFile = File(..., description="JSONL file of prompt pairs"),
+    concurrency: Optional[int] = Form(None, ge=1, description="Maximum number of pairs compared at once"),
+    prompt_service: PromptService = Depends()
+) -> StreamingResponse:
+    """Compare the prompt pairs of an uploaded JSONL file and stream the results as NDJSON."""
+    pairs = await _read_jsonl(file, PromptComparisonPair)
+    _check_batch_size(len(pairs))
+    return _ndjson_response(prompt_service.compare_prompts_batch([pair.model_dump() for pair in pairs], concurrency))
+
 @router.get(
     "/history/analysis",
     response_model=List[Dict],
@@ -303,4 +587,39 @@ async def get_comparison_history(
     try:
         return prompt_service.get_comparison_history()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/cache/stats",
+    response_model=Dict[str, Any],
+    summary="Get result cache statistics",
+    description="""
+    Report the state of the analysis/comparison result cache.
+    
+    Returns:
+    - Number of cached entries and the configured capacity and TTL
+    - Hit and miss counters and hit rate per operation
+    """,
+    response_description="Result cache size and hit/miss counters",
+    responses={
+        200: {
+            "description": "Successfully retrieved cache statistics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "entries": 12,
+                        "max_entries": 1024,
+                        "ttl_seconds": 3600.0,
+                        "operations": {
+                            "analyze": {"hits": 30, "misses": 10, "hit_rate": 0.75}
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_cache_stats() -> Dict[str, Any]:
+    """Return result cache hit/miss statistics."""
+    return result_cache.stats()
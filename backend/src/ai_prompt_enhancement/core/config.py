@@ -1,7 +1,17 @@
-from typing import List
+import os
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
+# Project data directory, the one StorageService uses; relative data paths in the settings are resolved against it
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../data"))
+
+def data_path(path: Optional[str]) -> Optional[str]:
+    """Resolve a data path setting against DATA_DIR, so it does not depend on the working directory."""
+    if not path:
+        return path
+    return os.path.join(DATA_DIR, path)
+
 class Settings(BaseSettings):
     """Application settings"""
     app_name: str = "AI Prompt Enhancement"
@@ -20,6 +30,98 @@ class Settings(BaseSettings):
     deepseek_api_key: str = Field(..., env="DEEPSEEK_API_KEY")
     deepseek_base_url: str = "https://api.deepseek.com"
     deepseek_model: str = "deepseek-chat"
+
+    # Model client configuration
+    model_client_mode: str = "async"  # "async" or "thread" (offload the sync client)
+    model_request_timeout: float = 60.0
+    model_thread_pool_size: int = 64
+    model_max_connections: int = 200
+    model_max_keepalive_connections: int = 50
+    model_keepalive_expiry: float = 60.0
+
+    # Outbound rate limits per provider model; defaults apply to models not listed.
+    # e.g. MODEL_RATE_LIMITS='{"deepseek-chat": {"rpm": 300, "tpm": 500000, "max_concurrency": 32}}'
+    model_rate_limits: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+    model_default_rpm: float = 600
+    model_default_tpm: float = 1_000_000
+    model_max_concurrency: int = 64
+    model_min_concurrency: int = 1
+    model_initial_concurrency: int = 16
+    model_latency_ratio: float = 2.5  # shrink the window when latency exceeds this multiple of the average
+
+    # Retries of transient provider errors (timeouts, connection errors, 429, 5xx)
+    model_retry_max_attempts: int = 3
+    model_retry_base_delay: float = 0.5
+    model_retry_max_delay: float = 8.0
+    model_retry_deadline: float = 90.0  # total seconds per call across all attempts
+
+    # Hedged requests (opt-in): duplicate a call still running after this latency percentile
+    model_hedging_enabled: bool = False
+    model_hedge_percentile: float = 95.0
+    model_hedge_max_rate: float = 0.05  # at most this fraction of calls is hedged
+    model_hedge_min_samples: int = 20
+    model_hedge_alternate_model: Optional[str] = None  # e.g. "gpt-4o-mini"; None hedges to the same model
+
+    # Per-provider circuit breaker and failover
+    circuit_failure_rate: float = 0.5  # open when this share of recent calls failed or was slow
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 5
+    circuit_slow_call_seconds: float = 30.0
+    circuit_open_seconds: float = 30.0  # wait before probing a tripped provider
+    model_fallback_model: Optional[str] = "gpt-4o-mini"
+
+    # Provider call telemetry
+    telemetry_window_seconds: float = 300.0  # sliding window for percentiles, RPM and error rate
+    telemetry_max_samples: int = 10000  # per model
+
+    # Micro-batching of concurrent analyze requests into packed provider calls
+    analyze_batching_enabled: bool = False
+    analyze_batch_window_ms: float = 5.0  # how long the first request waits for company
+    analyze_batch_max_size: int = 4
+    analyze_batch_max_tokens: int = 4000  # estimated prompt + context tokens per packed call
+
+    # Bulk analyze/compare endpoints
+    bulk_concurrency: int = 8  # items in flight per bulk request unless the request asks otherwise
+    bulk_max_concurrency: int = 32
+    bulk_max_items: int = 1000
+
+    # Batch CSV evaluation
+    evaluation_concurrency: int = 8  # rows in flight per batch evaluation
+    evaluation_max_concurrency: int = 32
+    evaluation_csv_chunk_rows: int = 500  # CSV rows parsed at a time
+
+    # Background jobs, checkpointed under jobs_dir and resumed on restart
+    jobs_enabled: bool = True
+    jobs_dir: str = "jobs"  # relative to DATA_DIR
+    job_workers: int = 2  # jobs run at once; rows within a job run with their own concurrency
+    job_event_keepalive_seconds: float = 15.0
+
+    # Token usage and cost ledger
+    # Prices in USD per million tokens override the built-in table, e.g.
+    # MODEL_PRICES='{"deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10}}'
+    model_prices: Dict[str, Dict[str, float]] = {}
+    usage_ledger_path: Optional[str] = "usage/usage_ledger.json"  # relative to DATA_DIR
+    usage_ledger_flush_seconds: float = 60.0
+
+    # Background provider health probes
+    health_probe_enabled: bool = True
+    health_probe_models: List[str] = ["deepseek-chat", "gpt-4o-mini"]
+    health_probe_min_interval: float = 15.0  # seconds, used while a provider is failing
+    health_probe_max_interval: float = 300.0  # seconds, reached by doubling while healthy
+    health_probe_timeout: float = 10.0
+
+    # Analysis/comparison result cache
+    result_cache_ttl_seconds: float = 3600.0
+    result_cache_max_entries: int = 1024
+
+    # Persistent memo of batch evaluation rows, reused when the same dataset is evaluated again
+    evaluation_memo_enabled: bool = True
+    evaluation_memo_path: str = "evaluation_memo.db"  # SQLite file, relative to DATA_DIR
+    evaluation_memo_ttl_seconds: float = 7 * 24 * 3600.0
+    evaluation_dedupe_rows: int = 10000  # recent rows kept in memory per batch to serve duplicates
+
+    # Coalesce identical concurrent model calls into one upstream request
+    single_flight_enabled: bool = True
     
     class Config:
         env_file = ".env"
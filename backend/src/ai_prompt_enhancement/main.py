@@ -1,12 +1,19 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 import sys
 
 from .api import router
+from .api.middleware import UsageTrackingMiddleware
 from .api.prompt_routes import tags_metadata as prompt_tags
 from .api.evaluation.routes import tags_metadata as evaluation_tags
+from .api.jobs.routes import tags_metadata as jobs_tags
 from .core.config import get_settings
+from .services.jobs.job_manager import job_manager
+from .services.model.health_prober import health_prober
+from .services.model.model_factory import model_factory
+from .services.model.usage_ledger import usage_ledger
 
 # Configure loguru
 logger.remove()  # Remove default handler
@@ -26,7 +33,23 @@ logger.add(
 settings = get_settings()
 logger.info(f"Starting application with settings: {settings.dict()}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage resources that live for the whole application lifetime."""
+    if settings.health_probe_enabled:
+        health_prober.start()
+    if settings.jobs_enabled:
+        job_manager.start()
+    yield
+    # Running jobs keep their checkpoints and resume on the next start
+    await job_manager.stop()
+    await health_prober.stop()
+    usage_ledger.flush()
+    # Release pooled provider connections
+    await model_factory.close()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="AI Prompt Enhancement API",
     description="""
     A comprehensive API for analyzing, refining, and evaluating AI prompts.
@@ -42,6 +65,11 @@ app = FastAPI(
     - Pre-defined evaluation templates
     - Custom evaluation criteria
     - Batch evaluation with CSV data
+
+    ### Background Jobs
+    - Long-running batch evaluation and synthetic data generation
+    - Progress polling and Server-Sent Events
+    - Checkpointed rows, resumed after a restart, and cancellation
     
     ### Model Management
     - Multiple model support
@@ -80,6 +108,7 @@ app = FastAPI(
     openapi_tags=[
         *prompt_tags,
         *evaluation_tags,
+        *jobs_tags,
         {
             "name": "health",
             "description": "Health check endpoints to monitor API status"
@@ -96,6 +125,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Book provider token usage per endpoint
+app.add_middleware(UsageTrackingMiddleware)
+
 # Include all routes
 app.include_router(
     router,
@@ -110,13 +142,20 @@ app.include_router(
 async def health_check():
     """
     Health check endpoint to verify API status.
+
+    Model health comes from the latest background probes; no provider is
+    contacted while serving this request.
     
     Returns:
-        dict: Status information including version and uptime
+        dict: Status information including version, environment and the
+        latest probe result of each model
     """
     logger.debug("Health check endpoint called")
+    models = health_prober.snapshot()
+    healthy = all(result["status"] == "healthy" for result in models.values())
     return {
-        "status": "healthy",
+        "status": "healthy" if healthy else "degraded",
         "version": "1.0.0",
-        "environment": "development" if settings.debug else "production"
+        "environment": "development" if settings.debug else "production",
+        "models": models
     } 
\ No newline at end of file
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+class GenerationJobRequest(BaseModel):
+    """Request model for a background synthetic data generation job."""
+    template: str = Field(..., description="The template for data generation")
+    model: str = Field(default="gpt-4o-mini", description="The model to use for generation")
+    batch_size: int = Field(default=1, ge=1, description="Number of data points per generation call")
+    batches: int = Field(..., ge=1, le=10000, description="Number of generation calls to make")
+    additional_instructions: Optional[str] = Field(default=None, description="Additional instructions for generation")
+    reference_content: Optional[str] = Field(default=None, description="Reference content to generate similar variations of")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum number of generation calls at once")
+    force_refresh: bool = Field(default=False, description="Bypass the generation cache for the first call too")
+
+class JobResponse(BaseModel):
+    """A background job and its progress."""
+    id: str = Field(..., description="Job identifier")
+    kind: str = Field(..., description="Job kind: evaluation or generation")
+    status: str = Field(..., description="queued, running, completed, failed or cancelled")
+    total: int = Field(..., description="Number of rows in the job")
+    completed: int = Field(..., description="Number of rows done and checkpointed, including failed ones")
+    failed: int = Field(..., description="Number of rows that failed")
+    spec: Dict[str, Any] = Field(..., description="Parameters the job was submitted with")
+    summary: Optional[Dict[str, Any]] = Field(default=None, description="Totals over all rows, once completed")
+    error: Optional[str] = Field(default=None, description="Why the job failed")
+    created_at: str = Field(..., description="Submission timestamp")
+    started_at: Optional[str] = Field(default=None, description="When the job first started running")
+    finished_at: Optional[str] = Field(default=None, description="When the job completed, failed or was cancelled")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from enum import Enum
 
 class ModelType(str, Enum):
@@ -18,6 +18,11 @@ class PromptAnalyzeRequest(BaseModel):
     prompt_text: str = Field(..., description="The prompt text to analyze")
     context: Optional[str] = Field(default=None, description="Optional context for the prompt")
     preferences: Optional[PromptPreferences] = Field(default_factory=PromptPreferences)
+    force_refresh: bool = Field(default=False, description="Bypass the result cache and call the model")
+
+class PromptBatchAnalyzeRequest(BaseModel):
+    prompts: List[PromptAnalyzeRequest] = Field(..., min_length=1, description="The prompts to analyze")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum number of prompts analyzed at once")
 
 class AnalysisMetric(BaseModel):
     score: float = Field(..., ge=0, le=1, description="Score between 0 and 1")
@@ -29,10 +34,22 @@ class PromptAnalysisResponse(BaseModel):
     suggestions: List[str] = Field(..., description="Overall improvement suggestions")
     enhanced_prompt: Optional[str] = Field(None, description="Enhanced version of the prompt")
     model_used: ModelType = Field(..., description="The model used for analysis")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Provider call metadata such as attempt and retry counts")
 
 class PromptComparisonRequest(BaseModel):
     analysis_result: Dict = Field(..., description="The complete analysis result from the analyze endpoint")
     preferences: Optional[PromptPreferences] = Field(default_factory=PromptPreferences)
+    force_refresh: bool = Field(default=False, description="Bypass the result cache and call the model")
+
+class PromptComparisonPair(BaseModel):
+    original_prompt: str = Field(..., description="The original prompt")
+    enhanced_prompt: str = Field(..., description="The enhanced prompt")
+    context: Optional[Dict[str, Any]] = Field(default=None, description="Comparison context; its 'model' selects the model")
+
+class PromptBatchCompareRequest(BaseModel):
+    pairs: List[PromptComparisonPair] = Field(..., min_length=1, description="The prompt pairs to compare")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Maximum number of pairs compared at once")
+    force_refresh: bool = Field(default=False, description="Bypass the result cache and call the model")
 
 class ComparisonMetrics(BaseModel):
     score: float = Field(..., ge=0, le=1, description="Score between 0 and 1")
@@ -48,4 +65,9 @@ class PromptVersion(BaseModel):
 class PromptComparisonResponse(BaseModel):
     original_prompt: PromptVersion = Field(..., description="Original prompt details")
     enhanced_prompt: PromptVersion = Field(..., description="Enhanced prompt details with comparison")
-    model_used: ModelType = Field(..., description="The model used for comparison") 
\ No newline at end of file
+    model_used: ModelType = Field(..., description="The model used for comparison")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Provider call metadata such as attempt and retry counts")
+
+class PromptAnalyzeCompareResponse(BaseModel):
+    analysis: PromptAnalysisResponse = Field(..., description="The analysis, as returned by the analyze endpoint")
+    comparison: PromptComparisonResponse = Field(..., description="The comparison, as returned by the compare endpoint")
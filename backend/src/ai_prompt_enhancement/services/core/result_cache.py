@@ -0,0 +1,122 @@
+"""In-memory result cache for prompt analysis and comparison."""
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from ...core.config import get_settings
+
+logger = logger.bind(service="result_cache")
+
+# Call metadata reported for a cached result, which made no provider call on this request
+CACHED_METADATA = {
+    "cached": True, "provider_calls": 0, "attempts": 0, "retries": 0,
+    "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+}
+
+
+def normalize_text(value: Any) -> str:
+    """Collapse all whitespace runs so formatting-only edits share a cache key."""
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return " ".join(value.split())
+
+
+def template_version(*templates: str) -> str:
+    """Return a short content hash identifying the given prompt templates."""
+    digest = hashlib.sha256()
+    for template in templates:
+        digest.update(template.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+class ResultCache:
+    """Content-addressed cache of model results with TTL and LRU eviction.
+
+    Keys are built by ``make_key`` from the operation name, model, template
+    version and whitespace-normalized inputs. Values are deep-copied on the way
+    in and out so callers can mutate what they get back. The call ``metadata``
+    of a dict value, if any, is replaced with ``CACHED_METADATA`` on a hit, so the
+    attempts and cost of the original call are not reported again.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        logger.info(f"Result cache initialized (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    @staticmethod
+    def make_key(operation: str, model: Any, version: str, *inputs: Any) -> str:
+        """Build the cache key for one operation call."""
+        model_name = getattr(model, "value", model)
+        parts = [operation, str(model_name), version] + [normalize_text(value) for value in inputs]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _count(self, operation: str, counter: str) -> None:
+        counters = self._counters.setdefault(operation, {"hits": 0, "misses": 0})
+        counters[counter] += 1
+
+    def get(self, operation: str, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self._count(operation, "misses")
+            logger.debug(f"Cache miss for {operation}: {key[:12]}")
+            return None
+        self._entries.move_to_end(key)
+        self._count(operation, "hits")
+        logger.info(f"Cache hit for {operation}: {key[:12]}")
+        value = copy.deepcopy(entry[1])
+        if isinstance(value, dict) and "metadata" in value:
+            value["metadata"] = dict(CACHED_METADATA)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries when full."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self._counters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache size and per-operation hit/miss counters."""
+        operations = {}
+        for operation, counters in self._counters.items():
+            lookups = counters["hits"] + counters["misses"]
+            operations[operation] = {
+                **counters,
+                "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "operations": operations,
+        }
+
+
+# Create and export a global instance
+_settings = get_settings()
+result_cache = ResultCache(
+    ttl_seconds=_settings.result_cache_ttl_seconds,
+    max_entries=_settings.result_cache_max_entries,
+)
@@ -0,0 +1,100 @@
+"""Single-flight coalescing of identical concurrent model calls."""
+import asyncio
+import copy
+import functools
+import hashlib
+import inspect
+from typing import Any, Awaitable, Callable, Dict
+
+from loguru import logger
+
+from ...core.config import get_settings
+from .result_cache import normalize_text
+
+logger = logger.bind(service="single_flight")
+
+# Call metadata reported to a caller that joined another caller's call, and so made no provider call of its own
+COALESCED_METADATA = {
+    "coalesced": True, "provider_calls": 0, "attempts": 0, "retries": 0,
+    "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+}
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result.
+
+    While a call for a key is in flight, later callers with the same key await
+    that call instead of starting their own. Every caller receives its own deep
+    copy of the result, and a caller being cancelled does not cancel the shared
+    call for the others. The call ``metadata`` of a dict result, if any, is
+    replaced with ``COALESCED_METADATA`` for the callers that joined, so the
+    usage and cost of the one provider call are reported once.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(operation: str, *inputs: Any) -> str:
+        """Build the coalescing key from the operation and normalized inputs."""
+        parts = [operation] + [normalize_text(value) for value in inputs]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _count(self, operation: str, counter: str) -> None:
+        counters = self._counters.setdefault(operation, {"calls": 0, "executed": 0, "collapsed": 0})
+        counters[counter] += 1
+
+    async def do(self, operation: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``call``, sharing it with identical in-flight callers."""
+        if not self.enabled:
+            return await call()
+
+        self._count(operation, "calls")
+        task = self._inflight.get(key)
+        joined = task is not None
+        if not joined:
+            self._count(operation, "executed")
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count(operation, "collapsed")
+            logger.debug(f"Joining in-flight {operation} call: {key[:12]}")
+        result = copy.deepcopy(await asyncio.shield(task))
+        if joined and isinstance(result, dict) and "metadata" in result:
+            result["metadata"] = dict(COALESCED_METADATA)
+        return result
+
+    def coalesce(self, operation: str) -> Callable:
+        """Decorate a model service method so identical concurrent calls share one request.
+
+        The key covers the service instance (and therefore its model) and the
+        normalized call arguments.
+        """
+        def decorator(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            signature = inspect.signature(method)
+
+            @functools.wraps(method)
+            async def wrapper(service: Any, *args: Any, **kwargs: Any) -> Any:
+                # Bind so positional and keyword calls with the same values share a key
+                bound = signature.bind(service, *args, **kwargs)
+                bound.apply_defaults()
+                arguments = [value for name, value in bound.arguments.items() if name != "self"]
+                key = self.make_key(operation, id(service), *arguments)
+                return await self.do(operation, key, lambda: method(service, *args, **kwargs))
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-operation call, execution and collapse counters."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "operations": {operation: dict(counters) for operation, counters in self._counters.items()},
+        }
+
+
+# Create and export a global instance
+single_flight = SingleFlight(enabled=get_settings().single_flight_enabled)
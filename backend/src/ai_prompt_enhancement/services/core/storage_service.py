@@ -32,6 +32,22 @@ class StorageService:
             logger.error(f"Failed data: {analysis_result}")
             raise
 
+    def save_analysis_history_batch(self, analysis_results: List[Dict]) -> None:
+        """Save the analysis results of a bulk request to history as one file."""
+        self._save_history_batch(self.analysis_history_dir, "analysis_batch", analysis_results)
+
+    def _save_history_batch(self, directory: str, prefix: str, results: List[Dict]) -> None:
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filepath = os.path.join(directory, f"{prefix}_{timestamp}.json")
+            logger.info(f"Saving {len(results)} history records to: {filepath}")
+
+            with open(filepath, 'w') as f:
+                json.dump(results, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save history batch: {e}")
+            raise
+
     def save_comparison_history(self, comparison_result: Dict) -> None:
         """Save comparison result to history."""
         try:
@@ -43,6 +59,10 @@ class StorageService:
             logger.error(f"Failed to save comparison history: {e}")
             raise
 
+    def save_comparison_history_batch(self, comparison_results: List[Dict]) -> None:
+        """Save the comparison results of a bulk request to history as one file."""
+        self._save_history_batch(self.comparison_history_dir, "comparison_batch", comparison_results)
+
     def save_evaluation_result(self, evaluation_data: Dict[str, Any]) -> str:
         """Save evaluation result."""
         timestamp = datetime.now().isoformat()
@@ -67,6 +87,14 @@ class StorageService:
         logger.info(f"Saved dataset to {path}")
         return path
 
+    @staticmethod
+    def _add_history(history: List[Dict], record: Any) -> None:
+        """Add a history file's content: a single result, or the list saved by a bulk request."""
+        if isinstance(record, list):
+            history.extend(record)
+        else:
+            history.append(record)
+
     def get_analysis_history(self) -> List[Dict]:
         """Retrieve analysis history."""
         history = []
@@ -74,7 +102,7 @@ class StorageService:
             for filename in os.listdir(self.analysis_history_dir):
                 if filename.endswith('.json'):
                     with open(os.path.join(self.analysis_history_dir, filename)) as f:
-                        history.append(json.load(f))
+                        self._add_history(history, json.load(f))
         except Exception as e:
             logger.error(f"Error reading analysis history: {e}")
         return history
@@ -86,7 +114,7 @@ class StorageService:
             for filename in os.listdir(self.comparison_history_dir):
                 if filename.endswith('.json'):
                     with open(os.path.join(self.comparison_history_dir, filename)) as f:
-                        history.append(json.load(f))
+                        self._add_history(history, json.load(f))
         except Exception as e:
             logger.error(f"Error reading comparison history: {e}")
         return history
@@ -0,0 +1,117 @@
+"""Registry of prompt templates compiled once at import time."""
+import string
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+from .result_cache import template_version
+
+logger = logger.bind(service="template_registry")
+
+
+class TemplateError(ValueError):
+    """A template is malformed, or was rendered with missing or unknown values."""
+
+
+def normalize_template(source: str) -> str:
+    """Normalize line endings and strip trailing whitespace from every line and the ends."""
+    lines = source.replace("\r\n", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+class CompiledTemplate:
+    """A normalized template with its declared placeholders.
+
+    Static templates (registered without placeholders) are rendered once: they
+    are sent verbatim and may contain literal braces, such as JSON examples.
+    Other templates use ``str.format`` syntax with plain named placeholders,
+    which must match the declared ones exactly.
+    """
+
+    def __init__(self, name: str, source: str, placeholders: Optional[Iterable[str]] = None):
+        self.name = name
+        self.text = normalize_template(source)
+        self.placeholders = frozenset(placeholders or ())
+        self.static = placeholders is None
+        if not self.static:
+            self._validate()
+        self.version = template_version(self.text)
+
+    def _validate(self) -> None:
+        try:
+            parsed = list(string.Formatter().parse(self.text))
+        except ValueError as e:
+            raise TemplateError(f"Template '{self.name}' is malformed: {str(e)}")
+        found = set()
+        for _, field, format_spec, conversion in parsed:
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise TemplateError(f"Template '{self.name}' has an unsupported placeholder: {{{field}}}")
+            found.add(field)
+
+        if found != self.placeholders:
+            missing = sorted(self.placeholders - found)
+            unknown = sorted(found - self.placeholders)
+            raise TemplateError(
+                f"Template '{self.name}' placeholders do not match: missing {missing}, unknown {unknown}"
+            )
+
+    def render(self, **values: Any) -> str:
+        """Fill in the placeholders; static templates return their pre-rendered text."""
+        if self.static:
+            return self.text
+        if values.keys() != self.placeholders:
+            missing = sorted(self.placeholders - values.keys())
+            unknown = sorted(values.keys() - self.placeholders)
+            raise TemplateError(f"Template '{self.name}' rendered with missing {missing}, unknown {unknown}")
+        return self.text.format_map(values)
+
+
+class TemplateRegistry:
+    """Hold compiled templates by name and derive cache-key versions from them."""
+
+    def __init__(self):
+        self._templates: Dict[str, CompiledTemplate] = {}
+
+    def register(self, name: str, source: str, placeholders: Optional[Iterable[str]] = None) -> CompiledTemplate:
+        """Compile and register a template; re-registering the same text is a no-op."""
+        compiled = CompiledTemplate(name, source, placeholders)
+        existing = self._templates.get(name)
+        if existing is not None:
+            if existing.version != compiled.version or existing.placeholders != compiled.placeholders:
+                raise TemplateError(f"Template '{name}' is already registered with different content")
+            return existing
+        self._templates[name] = compiled
+        logger.debug(f"Registered template {name} (version {compiled.version}, {len(compiled.text)} chars)")
+        return compiled
+
+    def get(self, name: str) -> CompiledTemplate:
+        """Return the compiled template registered under ``name``."""
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise TemplateError(f"Unknown template '{name}'")
+
+    def render(self, name: str, **values: Any) -> str:
+        """Render the template registered under ``name``."""
+        return self.get(name).render(**values)
+
+    def version(self, *names: str) -> str:
+        """Return a short hash identifying the given templates, for use in cache keys."""
+        return template_version(*(self.get(name).text for name in names))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the version, placeholders and size of every template."""
+        return {
+            name: {
+                "version": template.version,
+                "placeholders": sorted(template.placeholders),
+                "chars": len(template.text),
+            }
+            for name, template in sorted(self._templates.items())
+        }
+
+
+# Create and export a global instance
+templates = TemplateRegistry()
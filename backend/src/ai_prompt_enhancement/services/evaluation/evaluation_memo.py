@@ -0,0 +1,109 @@
+"""Persistent memo of batch evaluation rows.
+
+Re-running a batch over the same dataset reuses the scores of earlier runs
+instead of calling the model again. Rows are keyed by the whitespace-
+normalized prompt, the criteria set and the model, and kept in a SQLite file
+so a lookup never loads the whole memo into memory. All file access runs on
+a single background thread, off the event loop.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from ...core.config import data_path, get_settings
+from ..core.result_cache import ResultCache
+from ..model.prompt_messages import ANALYSIS_VERSION
+
+logger = logger.bind(service="evaluation_memo")
+
+
+class EvaluationMemo:
+    """Evaluated rows by key, stored in the SQLite file at ``path`` for ``ttl_seconds``."""
+
+    def __init__(self, path: str, ttl_seconds: float, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluation-memo")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(model: str, prompt: str, criteria: List[Dict]) -> str:
+        """Build the key of one row; the order of the criteria does not matter."""
+        criteria_set = sorted(
+            (c["name"], c["weight"], c.get("threshold")) for c in criteria
+        )
+        return ResultCache.make_key("evaluate", model, ANALYSIS_VERSION, prompt, criteria_set)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the memo file once, dropping expired rows."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, row TEXT NOT NULL)"
+            )
+            expired = connection.execute(
+                "DELETE FROM memo WHERE stored_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            connection.commit()
+            logger.info(f"Opened evaluation memo at {self.path}, dropped {expired} expired rows")
+            self._connection = connection
+        return self._connection
+
+    def _get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        found = self._connect().execute(
+            "SELECT stored_at, row FROM memo WHERE key = ? AND stored_at >= ?",
+            (key, time.time() - self.ttl_seconds),
+        ).fetchone()
+        return (found[0], json.loads(found[1])) if found else None
+
+    def _put(self, key: str, row: Dict[str, Any]) -> None:
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO memo (key, stored_at, row) VALUES (?, ?, ?)",
+            (key, time.time(), json.dumps(row, ensure_ascii=False)),
+        )
+        connection.commit()
+
+    async def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Return (stored_at, row) of a memoized row, or None."""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._get, key)
+        except Exception as e:
+            logger.error(f"Error reading the evaluation memo: {str(e)}")
+            return None
+
+    async def put(self, key: str, row: Dict[str, Any]) -> None:
+        """Memoize a successfully evaluated row."""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._put, key, row)
+        except Exception as e:
+            logger.error(f"Error saving memoized evaluation: {str(e)}")
+
+    def close(self) -> None:
+        """Close the memo file; it is reopened on the next lookup."""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._executor.submit(connection.close).result()
+
+
+# Create and export a global instance
+_settings = get_settings()
+evaluation_memo = EvaluationMemo(
+    path=data_path(_settings.evaluation_memo_path),
+    ttl_seconds=_settings.evaluation_memo_ttl_seconds,
+    enabled=_settings.evaluation_memo_enabled,
+)
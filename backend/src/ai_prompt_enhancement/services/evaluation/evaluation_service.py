@@ -1,15 +1,61 @@
+import asyncio
+import copy
 import re
+import time
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, AsyncIterator, BinaryIO, List, Dict, Optional, Tuple, Union
+from loguru import logger
+from .evaluation_memo import evaluation_memo
 from .evaluation_prompts import EVALUATION_PROMPTS, EvaluationPrompt
 from ..model.deepseek_service import DeepseekService
+from ..model.model_factory import model_factory
+from ...core.config import get_settings
 from fastapi import UploadFile
+from starlette.datastructures import UploadFile as StarletteUploadFile
 import io
 
+logger = logger.bind(service="evaluation")
+
+class BatchTotals:
+    """Running totals of evaluated batch rows."""
+
+    def __init__(self):
+        self.total_prompts = 0
+        self.passed_prompts = 0
+        self.failed_prompts = 0
+        self.total_score = 0.0
+        self.duplicate_prompts = 0
+        self.memo_hits = 0
+
+    def add(self, row: Dict) -> None:
+        self.total_prompts += 1
+        self.duplicate_prompts += row.get("reused") == "duplicate"
+        self.memo_hits += row.get("reused") == "memo"
+        if "error" in row:
+            self.failed_prompts += 1
+        else:
+            self.total_score += row["overall_score"]
+            self.passed_prompts += bool(row["passed_thresholds"])
+
+    def summary(self) -> Dict:
+        """Return the totals, averaging the score over the successful rows."""
+        succeeded = self.total_prompts - self.failed_prompts
+        return {
+            "total_prompts": self.total_prompts,
+            "passed_prompts": self.passed_prompts,
+            "failed_prompts": self.failed_prompts,
+            "average_score": self.total_score / succeeded if succeeded else 0.0,
+            "duplicate_prompts": self.duplicate_prompts,
+            "memo_hits": self.memo_hits,
+            "llm_calls_saved": self.duplicate_prompts + self.memo_hits,
+        }
+
 class EvaluationService:
-    def __init__(self, model_service: Optional[DeepseekService] = None):
+    def __init__(self, model_service: Optional[DeepseekService] = None, model: str = "deepseek-chat"):
         self.prompts = {prompt.id: prompt for prompt in EVALUATION_PROMPTS}
-        self.model_service = model_service or DeepseekService()
+        self.model = model
+        self.model_service = model_service or model_factory.create_model_service(model)
 
     def get_all_prompts(self) -> List[Dict]:
         """Return all available evaluation prompts."""
@@ -92,6 +138,17 @@ class EvaluationService:
 
         return evaluation_data
 
+    @staticmethod
+    def validate_criteria(criteria: List[Dict]) -> None:
+        """Raise ValueError unless the weights sum to 1 and thresholds are within [0, 1]."""
+        total_weight = sum(c["weight"] for c in criteria)
+        if not 0.99 <= total_weight <= 1.01:  # Allow small floating point differences
+            raise ValueError("Criteria weights must sum to 1.0")
+
+        for criterion in criteria:
+            if criterion.get("threshold") is not None and not 0 <= criterion["threshold"] <= 1:
+                raise ValueError("Thresholds must be between 0 and 1")
+
     async def evaluate_prompt(self, prompt: str, criteria: List[Dict], context: Optional[Dict] = None) -> Dict:
         """
         Evaluate a single prompt against specified criteria.
@@ -104,16 +161,8 @@ class EvaluationService:
         Returns:
             Dict containing evaluation results
         """
-        # Validate criteria weights
-        total_weight = sum(c["weight"] for c in criteria)
-        if not 0.99 <= total_weight <= 1.01:  # Allow small floating point differences
-            raise ValueError("Criteria weights must sum to 1.0")
-            
-        # Validate thresholds
-        for criterion in criteria:
-            if "threshold" in criterion and not 0 <= criterion["threshold"] <= 1:
-                raise ValueError("Thresholds must be between 0 and 1")
-        
+        self.validate_criteria(criteria)
+
         try:
             # Get model evaluation
             result = await self.model_service.analyze_prompt(prompt, str(context) if context else None)
@@ -148,48 +197,223 @@ class EvaluationService:
         except Exception as e:
             raise ValueError(f"Failed to evaluate prompt: {str(e)}")
 
-    async def evaluate_prompts_batch(self, file_content: str, criteria: List[Dict]) -> Dict:
+    @staticmethod
+    def _batch_concurrency(concurrency: Optional[int]) -> int:
+        """Return the number of rows to evaluate at once, capped by the settings."""
+        settings = get_settings()
+        return max(1, min(concurrency or settings.evaluation_concurrency, settings.evaluation_max_concurrency))
+
+    @staticmethod
+    def _open_csv(file: Union[UploadFile, BinaryIO, str, bytes]) -> BinaryIO:
         """
-        Evaluate multiple prompts from a CSV file.
-        
-        Args:
-            file_content: CSV file content as string
-            criteria: List of evaluation criteria
-            
-        Returns:
-            Dict containing batch evaluation results
+        Return a binary stream over the CSV without reading it into memory.
+        Uploads are already spooled to a temporary file on disk by Starlette
+        once they grow beyond its in-memory limit.
+        """
+        # Request forms hold Starlette uploads, of which FastAPI's UploadFile is a subclass
+        if isinstance(file, StarletteUploadFile):
+            stream = file.file
+            stream.seek(0)
+            return stream
+        if isinstance(file, str):
+            return io.BytesIO(file.encode("utf-8"))
+        if isinstance(file, bytes):
+            return io.BytesIO(file)
+        return file
+
+    async def iter_csv_prompts(self, file: Union[UploadFile, BinaryIO, str, bytes]) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Parse the ``prompt`` column of a CSV incrementally, yielding (row index, prompt).
+        Only ``EVALUATION_CSV_CHUNK_ROWS`` rows are parsed at a time, off the
+        event loop, so memory stays flat regardless of the file size.
         """
+        loop = asyncio.get_running_loop()
         try:
-            # Read CSV file
-            df = pd.read_csv(io.StringIO(file_content))
-            
-            if "prompt" not in df.columns:
+            reader = pd.read_csv(
+                self._open_csv(file), usecols=["prompt"], dtype={"prompt": "object"},
+                chunksize=get_settings().evaluation_csv_chunk_rows, encoding="utf-8",
+            )
+        except ValueError as e:
+            if "Usecols" in str(e):
                 raise ValueError("CSV must contain a 'prompt' column")
-                
-            if df.empty:
-                raise ValueError("CSV file is empty")
-            
-            # Evaluate each prompt
-            results = {}
-            total_prompts = len(df)
-            passed_prompts = 0
-            total_score = 0
-            
-            for idx, row in df.iterrows():
-                prompt = row["prompt"]
-                result = await self.evaluate_prompt(prompt, criteria)
-                
-                results[f"prompt_{idx+1}"] = result
-                total_score += result["overall_score"]
-                if result["passed_thresholds"]:
-                    passed_prompts += 1
-            
-            return {
-                "total_prompts": total_prompts,
-                "passed_prompts": passed_prompts,
-                "average_score": total_score / total_prompts if total_prompts > 0 else 0,
-                "results": results
-            }
-            
+            raise ValueError(f"Failed to read CSV file: {str(e)}")
         except Exception as e:
-            raise ValueError(f"Failed to process batch evaluation: {str(e)}")
+            raise ValueError(f"Failed to read CSV file: {str(e)}")
+
+        index = 0
+        with reader:
+            while True:
+                try:
+                    chunk = await loop.run_in_executor(None, next, reader, None)
+                except Exception as e:
+                    raise ValueError(f"Failed to read CSV row {index + 1}: {str(e)}")
+                if chunk is None:
+                    break
+                for prompt in chunk["prompt"]:
+                    yield index, prompt
+                    index += 1
+        if index == 0:
+            raise ValueError("CSV file is empty")
+
+    async def _evaluate_row(self, prompt: Any, criteria: List[Dict]) -> Dict:
+        """Evaluate one batch row, returning its result or error along with its latency."""
+        start = time.perf_counter()
+        try:
+            if pd.isna(prompt) or not str(prompt).strip():
+                raise ValueError("Prompt is empty")
+            row = await self.evaluate_prompt(str(prompt), criteria)
+        except Exception as e:
+            row = {"error": str(e)}
+        row["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return row
+
+    def _row_key(self, prompt: Any, criteria: List[Dict]) -> Optional[str]:
+        """Return the dedupe and memo key of a row, or None for an empty prompt."""
+        if pd.isna(prompt) or not str(prompt).strip():
+            return None
+        return evaluation_memo.make_key(self.model, str(prompt), criteria)
+
+    @staticmethod
+    def _reuse(row: Dict, source: str) -> Dict:
+        """Copy an evaluated row for a row with the same key, marking where it came from."""
+        reused = copy.deepcopy(row)
+        reused["reused"] = source
+        reused["latency_ms"] = 0.0
+        return reused
+
+    async def evaluate_stream(self, rows: AsyncIterator[Tuple[int, Any]], criteria: List[Dict],
+                              concurrency: Optional[int] = None,
+                              force_refresh: bool = False) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Evaluate (index, prompt) rows as they arrive, at most ``concurrency`` at a time.
+        Yields (index, row) in completion order; a failed row holds an "error"
+        instead of scores, and every row reports its "latency_ms". Bounded
+        queues apply backpressure to the parser and keep rows from piling up
+        when the consumer is slower than the model.
+
+        Each distinct prompt (whitespace-normalized) is evaluated once: its
+        duplicates get a copy of its row marked ``"reused": "duplicate"``,
+        without taking a worker while it is evaluated. Only the last
+        ``EVALUATION_DEDUPE_ROWS`` rows are kept in memory; duplicates of
+        older rows are served from the memo. Rows memoized by earlier runs
+        are marked ``"reused": "memo"``, unless ``force_refresh``.
+        """
+        self.validate_criteria(criteria)
+        workers = self._batch_concurrency(concurrency)
+        pending: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        finished: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        started = time.time()
+        dedupe_rows = get_settings().evaluation_dedupe_rows
+        # Recently settled rows by key, and the duplicates waiting for a key being settled
+        recent: "OrderedDict[str, Dict]" = OrderedDict()
+        waiting: Dict[str, List[int]] = {}
+
+        async def produce() -> None:
+            try:
+                async for item in rows:
+                    await pending.put(item)
+            finally:
+                for _ in range(workers):
+                    await pending.put(None)
+
+        async def work() -> None:
+            while (item := await pending.get()) is not None:
+                index, prompt = item
+                key = self._row_key(prompt, criteria)
+                if key is None:
+                    await finished.put((index, await self._evaluate_row(prompt, criteria)))
+                    continue
+                if key in recent:
+                    recent.move_to_end(key)
+                    await finished.put((index, self._reuse(recent[key], "duplicate")))
+                    continue
+                if key in waiting:
+                    waiting[key].append(index)
+                    continue
+
+                waiting[key] = []
+                memoized = await evaluation_memo.get(key)
+                # A row stored since the batch started was evaluated by this batch
+                if memoized is not None and memoized[0] >= started:
+                    row, first = memoized[1], self._reuse(memoized[1], "duplicate")
+                elif memoized is not None and not force_refresh:
+                    row, first = memoized[1], self._reuse(memoized[1], "memo")
+                else:
+                    row = first = await self._evaluate_row(prompt, criteria)
+                    if "error" not in row:
+                        await evaluation_memo.put(key, {k: v for k, v in row.items() if k != "latency_ms"})
+
+                if dedupe_rows > 0:
+                    recent[key] = row
+                    if len(recent) > dedupe_rows:
+                        recent.popitem(last=False)
+                duplicates = waiting.pop(key)
+                await finished.put((index, first))
+                for duplicate in duplicates:
+                    await finished.put((duplicate, self._reuse(row, "duplicate")))
+            await finished.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        tasks = [asyncio.ensure_future(work()) for _ in range(workers)]
+        try:
+            running = workers
+            while running:
+                item = await finished.get()
+                if item is None:
+                    running -= 1
+                    continue
+                yield item
+            # Surface parse errors, such as a missing column or an empty file
+            await producer
+        finally:
+            # Stop outstanding work if the consumer went away
+            for task in [producer, *tasks]:
+                task.cancel()
+
+    async def evaluate_prompts_batch_stream(self, file: Union[UploadFile, BinaryIO, str], criteria: List[Dict],
+                                            concurrency: Optional[int] = None,
+                                            force_refresh: bool = False) -> AsyncIterator[Dict]:
+        """
+        Evaluate the prompts of a CSV file, yielding each row as soon as it completes.
+        Yields {"index": i, ...row} per row in completion order, then a final
+        {"summary": {...}} with the batch totals and the LLM calls saved by reuse.
+        """
+        logger.info("Evaluating prompts from CSV")
+        start = time.perf_counter()
+        totals = BatchTotals()
+        rows = self.iter_csv_prompts(file)
+        async for index, row in self.evaluate_stream(rows, criteria, concurrency, force_refresh):
+            totals.add(row)
+            yield {"index": index, **row}
+
+        if totals.failed_prompts:
+            logger.warning(f"{totals.failed_prompts} of {totals.total_prompts} prompts failed evaluation")
+        yield {"summary": {**totals.summary(), "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}}
+
+    async def evaluate_prompts_batch(self, file: Union[UploadFile, BinaryIO, str], criteria: List[Dict],
+                                     concurrency: Optional[int] = None, force_refresh: bool = False) -> Dict:
+        """
+        Evaluate multiple prompts from a CSV file with bounded concurrency,
+        starting on the first rows while the rest of the file is parsed.
+
+        Args:
+            file: Uploaded CSV file, binary file object or CSV content, parsed incrementally
+            criteria: List of evaluation criteria
+            concurrency: Maximum number of rows evaluated at once
+            force_refresh: Re-evaluate prompts memoized by earlier runs
+
+        Returns:
+            Dict containing batch evaluation results, keyed prompt_1..prompt_n in input order
+        """
+        results: Dict[int, Dict] = {}
+        summary: Dict = {}
+        async for line in self.evaluate_prompts_batch_stream(file, criteria, concurrency, force_refresh):
+            if "summary" in line:
+                summary = line["summary"]
+                continue
+            results[line.pop("index")] = line
+
+        return {
+            **summary,
+            "results": {f"prompt_{index + 1}": results[index] for index in range(len(results))},
+        }
@@ -0,0 +1,134 @@
+"""Batch evaluation and synthetic data generation as background jobs.
+
+An evaluation job stores its uploaded CSV in the job directory and has one
+row per CSV row. A generation job has one row per generation call of
+``batch_size`` items. Both skip the rows already checkpointed when resumed.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from ...core.config import get_settings
+from ..evaluation.evaluation_service import BatchTotals, EvaluationService
+from ..synthetic_data.generation_service import generator
+from .job_manager import job_manager
+
+logger = logger.bind(service="job_kinds")
+
+EVALUATION = "evaluation"
+GENERATION = "generation"
+
+
+async def submit_evaluation_job(stream: BinaryIO, criteria: List[Dict], concurrency: Optional[int] = None,
+                                filename: Optional[str] = None, force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Store an uploaded CSV and queue its evaluation.
+    The CSV is parsed once up front to count the rows, so an invalid file or
+    criteria is rejected with a ValueError before the job is created.
+    """
+    EvaluationService.validate_criteria(criteria)
+    job_id = job_manager.new_job_id()
+    loop = asyncio.get_running_loop()
+    try:
+        path = await loop.run_in_executor(None, job_manager.store.save_input, job_id, stream)
+        total = 0
+        with open(path, "rb") as f:
+            async for _ in EvaluationService().iter_csv_prompts(f):
+                total += 1
+    except Exception:
+        job_manager.store.delete(job_id)
+        raise
+    spec = {"criteria": criteria, "concurrency": concurrency, "filename": filename, "force_refresh": force_refresh}
+    return await job_manager.submit(EVALUATION, spec, total, job_id=job_id)
+
+
+async def run_evaluation_job(job: Dict[str, Any], done: Set[int]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Evaluate the CSV rows of a job that are not checkpointed yet."""
+    spec = job["spec"]
+    service = EvaluationService()
+    with open(job_manager.store.input_path(job["id"]), "rb") as f:
+        async def pending() -> AsyncIterator[Tuple[int, Any]]:
+            async for index, prompt in service.iter_csv_prompts(f):
+                if index not in done:
+                    yield index, prompt
+
+        rows = service.evaluate_stream(
+            pending(), spec["criteria"], spec.get("concurrency"), spec.get("force_refresh", False)
+        )
+        async for index, row in rows:
+            yield index, row
+
+
+def summarize_evaluation_job(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = BatchTotals()
+    for row in rows:
+        totals.add(row)
+    return totals.summary()
+
+
+async def submit_generation_job(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue ``batches`` synthetic data generation calls of ``batch_size`` items each."""
+    spec = dict(request)
+    return await job_manager.submit(GENERATION, spec, spec.pop("batches"))
+
+
+async def run_generation_job(job: Dict[str, Any], done: Set[int]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Run the generation calls of a job that are not checkpointed yet."""
+    spec = job["spec"]
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(
+        max(1, min(spec.get("concurrency") or settings.bulk_concurrency, settings.bulk_max_concurrency))
+    )
+
+    async def run(index: int) -> Tuple[int, Dict[str, Any]]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await generator.generate_synthetic_data(
+                    template=spec["template"],
+                    model=spec["model"],
+                    batch_size=spec["batch_size"],
+                    reference_content=spec.get("reference_content"),
+                    additional_instructions=spec.get("additional_instructions"),
+                    session_id=job["id"],
+                    # Only the first call may be served from the cache; the others must be new data
+                    force_refresh=spec.get("force_refresh", False) or index > 0,
+                )
+                row = {"result": result}
+            except Exception as e:
+                logger.error(f"Generation {index} of job {job['id']} failed: {str(e)}")
+                row = {"error": str(e)}
+            row["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return index, row
+
+    tasks = [asyncio.ensure_future(run(index)) for index in range(job["total"]) if index not in done]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def summarize_generation_job(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    batches = failed = items = 0
+    generation_time = 0.0
+    for row in rows:
+        batches += 1
+        if "error" in row:
+            failed += 1
+            continue
+        items += len(row["result"].get("data", []))
+        generation_time += row["result"].get("generation_time") or 0.0
+    return {
+        "batches": batches,
+        "failed_batches": failed,
+        "generated_items": items,
+        "generation_time": round(generation_time, 3),
+    }
+
+
+job_manager.register(EVALUATION, run_evaluation_job, summarize_evaluation_job)
+job_manager.register(GENERATION, run_generation_job, summarize_generation_job)
@@ -0,0 +1,277 @@
+"""Background jobs for long-running evaluation and generation runs.
+
+Jobs are queued in memory and run by a fixed number of worker coroutines,
+so no external broker is needed. Each job kind registers a runner, an async
+generator that yields (row index, row result) as rows complete, given the
+indices already done. Every row is checkpointed to the ``JobStore`` as soon as
+it completes; after a restart, unfinished jobs are queued again and their
+runners skip the checkpointed rows. Checkpoints and the other store calls of
+a running job go through a single background thread, so their file I/O does
+not block the event loop and they reach the disk in order.
+"""
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from loguru import logger
+
+from ...core.config import data_path, get_settings
+from .job_store import JobStore
+
+logger = logger.bind(service="job_manager")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+JobRunner = Callable[[Dict[str, Any], Set[int]], AsyncIterator[Tuple[int, Dict[str, Any]]]]
+JobSummarizer = Callable[[Iterable[Dict[str, Any]]], Dict[str, Any]]
+
+
+class JobKind(NamedTuple):
+    """How to run the rows of one kind of job and summarize its checkpointed rows."""
+    run: JobRunner
+    summarize: JobSummarizer
+
+
+class JobError(ValueError):
+    """A job does not exist or cannot be changed in its current state."""
+
+
+class JobManager:
+    """Queue, run, checkpoint, resume and cancel background jobs.
+
+    A job record is a dict with ``id``, ``kind``, ``spec``, ``status``,
+    ``total``, ``completed``, ``failed``, ``summary``, ``error`` and
+    timestamps. ``completed`` and ``failed`` count checkpointed rows and are
+    rebuilt from the store on startup rather than persisted on every row.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, keepalive_seconds: float = 15.0):
+        self.store = store
+        self.workers = max(1, workers)
+        self.keepalive_seconds = keepalive_seconds
+        self._kinds: Dict[str, JobKind] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._changes: Dict[str, asyncio.Event] = {}
+        self._loaded = False
+        self._store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+
+    @classmethod
+    def from_settings(cls) -> "JobManager":
+        settings = get_settings()
+        return cls(JobStore(data_path(settings.jobs_dir)), settings.job_workers, settings.job_event_keepalive_seconds)
+
+    def register(self, kind: str, run: JobRunner, summarize: JobSummarizer) -> None:
+        """Register the runner and summarizer of a job kind."""
+        self._kinds[kind] = JobKind(run, summarize)
+
+    def new_job_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def start(self) -> None:
+        """Start the workers and queue the jobs a previous run left unfinished."""
+        if self._tasks:
+            return
+        self._load()
+        self._queue = asyncio.Queue()
+        resumed = 0
+        for job in self._jobs.values():
+            if job["status"] in (QUEUED, RUNNING):
+                job["status"] = QUEUED
+                self._queue.put_nowait(job["id"])
+                resumed += 1
+        logger.info(f"Starting {self.workers} job workers, {resumed} unfinished jobs queued")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs keep their checkpoints and resume on the next start."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+
+    async def submit(self, kind: str, spec: Dict[str, Any], total: int, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Create a job, save it on the store thread and queue it; returns the job record."""
+        if kind not in self._kinds:
+            raise JobError(f"Unknown job kind: {kind}")
+        self._load()
+        job = {
+            "id": job_id or self.new_job_id(),
+            "kind": kind,
+            "spec": spec,
+            "status": QUEUED,
+            "total": total,
+            "completed": 0,
+            "failed": 0,
+            "summary": None,
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await self._in_store(self.store.save, dict(job))
+        self._jobs[job["id"]] = job
+        if self._queue is not None:
+            self._queue.put_nowait(job["id"])
+        logger.info(f"Queued {kind} job {job['id']} with {total} rows")
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of a job record, or None."""
+        self._load()
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent jobs first, optionally filtered by status."""
+        self._load()
+        jobs = [job for job in self._jobs.values() if status is None or job["status"] == status]
+        return [dict(job) for job in sorted(jobs, key=lambda job: job["created_at"], reverse=True)[:limit]]
+
+    def rows(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield the checkpointed rows of a job in completion order."""
+        if self.get(job_id) is None:
+            raise JobError(f"Job {job_id} not found")
+        return self.store.iter_rows(job_id)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running job; completed rows stay checkpointed."""
+        self._load()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobError(f"Job {job_id} not found")
+        if job["status"] in FINAL_STATUSES:
+            raise JobError(f"Job {job_id} is already {job['status']}")
+
+        self._cancelled.add(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            await self._finish(job, CANCELLED)
+        logger.info(f"Cancelled job {job_id}")
+        return dict(job)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a job snapshot now and after every change, until the job is finished.
+
+        Changes are coalesced: a slow subscriber gets the latest state rather
+        than every intermediate one. A snapshot is repeated after
+        ``keepalive_seconds`` without changes.
+        """
+        while True:
+            change = self._changes.setdefault(job_id, asyncio.Event())
+            job = self.get(job_id)
+            if job is None:
+                raise JobError(f"Job {job_id} not found")
+            yield job
+            if job["status"] in FINAL_STATUSES:
+                return
+            try:
+                await asyncio.wait_for(change.wait(), timeout=self.keepalive_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _load(self) -> None:
+        """Load the job records from the store once, counting their checkpointed rows."""
+        if self._loaded:
+            return
+        self._loaded = True
+        for job in self.store.list():
+            if job["status"] not in FINAL_STATUSES:
+                self.store.repair_rows(job["id"])
+                job["completed"] = job["failed"] = 0
+                for row in self.store.iter_rows(job["id"]):
+                    job["completed"] += 1
+                    job["failed"] += "error" in row
+            self._jobs[job["id"]] = job
+
+    def _notify(self, job_id: str) -> None:
+        change = self._changes.pop(job_id, None)
+        if change is not None:
+            change.set()
+
+    async def _in_store(self, call: Callable[..., Any], *args: Any) -> Any:
+        """Run a store call on the store thread, after the calls submitted before it."""
+        return await asyncio.get_running_loop().run_in_executor(self._store_executor, call, *args)
+
+    def _done_indices(self, job_id: str) -> Set[int]:
+        return {row["index"] for row in self.store.iter_rows(job_id)}
+
+    def _summarize(self, kind: JobKind, job_id: str) -> Dict[str, Any]:
+        return kind.summarize(self.store.iter_rows(job_id))
+
+    async def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        job["status"] = status
+        job["error"] = error
+        job["finished_at"] = datetime.now().isoformat()
+        self._cancelled.discard(job["id"])
+        await self._in_store(self.store.save, dict(job))
+        self._notify(job["id"])
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != QUEUED:
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                # A cancelled job ends its own task; a stopping worker cancels it here
+                await asyncio.gather(task, return_exceptions=True)
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        kind = self._kinds.get(job["kind"])
+        if kind is None:
+            await self._finish(job, FAILED, f"Unknown job kind: {job['kind']}")
+            return
+
+        done = await self._in_store(self._done_indices, job_id)
+        job["status"] = RUNNING
+        job["started_at"] = job["started_at"] or datetime.now().isoformat()
+        await self._in_store(self.store.save, dict(job))
+        self._notify(job_id)
+        logger.info(f"Running {job['kind']} job {job_id}, {len(done)} of {job['total']} rows already done")
+
+        try:
+            async for index, row in kind.run(job, set(done)):
+                if index in done:
+                    continue
+                await self._in_store(self.store.append_row, job_id, index, row)
+                done.add(index)
+                job["completed"] += 1
+                job["failed"] += "error" in row
+                self._notify(job_id)
+            job["summary"] = await self._in_store(self._summarize, kind, job_id)
+            await self._finish(job, COMPLETED)
+            logger.info(f"Completed job {job_id}: {job['summary']}")
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                await self._finish(job, CANCELLED)
+            else:
+                # Shutting down: leave the job running on disk so the next start resumes it
+                logger.info(f"Interrupted job {job_id} after {job['completed']} rows")
+                raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            await self._finish(job, FAILED, str(e))
+
+
+# Create and export a global instance
+job_manager = JobManager.from_settings()
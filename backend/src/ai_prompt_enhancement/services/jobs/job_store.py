@@ -0,0 +1,122 @@
+"""Local file store for background jobs and their checkpointed rows.
+
+Every job has its own directory under the store root holding:
+
+- ``job.json``: the job record (kind, spec, status, timestamps), rewritten
+  atomically on every status change;
+- ``rows.jsonl``: one line per completed row, appended and synced to disk as
+  soon as the row is done, so a restart never repeats a finished LLM call;
+- ``input.*``: the uploaded input of the job, if any.
+"""
+import json
+import os
+import shutil
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+logger = logger.bind(service="job_store")
+
+JOB_FILE = "job.json"
+ROWS_FILE = "rows.jsonl"
+
+
+class JobStore:
+    """Persist job records and completed rows as JSON files under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def input_path(self, job_id: str, name: str = "input.csv") -> str:
+        return os.path.join(self.job_dir(job_id), name)
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Write a job record, replacing the previous one atomically."""
+        job_dir = self.job_dir(job["id"])
+        os.makedirs(job_dir, exist_ok=True)
+        path = os.path.join(job_dir, JOB_FILE)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if it does not exist or cannot be read."""
+        path = os.path.join(self.job_dir(job_id), JOB_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {str(e)}")
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return every readable job record, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        jobs = [self.load(job_id) for job_id in os.listdir(self.root)
+                if os.path.isdir(self.job_dir(job_id))]
+        return sorted((job for job in jobs if job), key=lambda job: job["created_at"])
+
+    def delete(self, job_id: str) -> None:
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def save_input(self, job_id: str, stream: BinaryIO, name: str = "input.csv") -> str:
+        """Copy an input stream into the job directory in chunks and return its path."""
+        path = self.input_path(job_id, name)
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+        return path
+
+    def append_row(self, job_id: str, index: int, row: Dict[str, Any]) -> None:
+        """Checkpoint one completed row."""
+        line = json.dumps({"index": index, **row}, ensure_ascii=False) + "\n"
+        with open(os.path.join(self.job_dir(job_id), ROWS_FILE), "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def repair_rows(self, job_id: str) -> None:
+        """Drop a partial last line left by a crash, so the next checkpoint starts on a new line."""
+        path = os.path.join(self.job_dir(job_id), ROWS_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            # Scan backwards for the end of the last complete line
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            f.truncate(position)
+            logger.warning(f"Dropped a partial checkpoint line of job {job_id}")
+
+    def iter_rows(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield the checkpointed rows in completion order, skipping a line torn by a crash."""
+        path = os.path.join(self.job_dir(job_id), ROWS_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable checkpoint line {number} of job {job_id}")
@@ -0,0 +1,48 @@
+"""Per-request metadata collected from provider calls.
+
+Model service methods open a collector with ``collect_call_metadata`` (or the
+``with_call_metadata`` decorator); code further down the call chain, such as
+``ProviderClient``, records counters into it without having to thread it
+through every signature.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+_current: ContextVar[Optional[Dict[str, Any]]] = ContextVar("call_metadata", default=None)
+
+
+@contextmanager
+def collect_call_metadata() -> Iterator[Dict[str, Any]]:
+    """Collect metadata recorded by provider calls made inside the block."""
+    metadata: Dict[str, Any] = {"provider_calls": 0, "attempts": 0, "retries": 0}
+    token = _current.set(metadata)
+    try:
+        yield metadata
+    finally:
+        _current.reset(token)
+
+
+def record_call_metadata(**counters: Any) -> None:
+    """Add numeric counters (or set other values) on the active collector, if any."""
+    metadata = _current.get()
+    if metadata is None:
+        return
+    for key, value in counters.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metadata[key] = metadata.get(key, 0) + value
+        else:
+            metadata[key] = value
+
+
+def with_call_metadata(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Attach the metadata collected during a model service call to its dict result."""
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with collect_call_metadata() as metadata:
+            result = await method(*args, **kwargs)
+        if isinstance(result, dict):
+            result["metadata"] = {**result.get("metadata", {}), **metadata}
+        return result
+    return wrapper
@@ -0,0 +1,167 @@
+"""Per-provider circuit breakers."""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from ...core.config import Settings, get_settings
+
+logger = logger.bind(service="circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when a provider's circuit is open and no fallback model is available."""
+
+
+class CircuitBreaker:
+    """Track recent call outcomes of one provider and stop sending it traffic when it degrades.
+
+    The circuit opens when at least ``min_calls`` of the last ``window_size``
+    calls are recorded and the share of failures reaches ``failure_rate``; a
+    call slower than ``slow_call_seconds`` counts as a failure. While open,
+    ``allow`` returns False so callers fail fast or reroute. After
+    ``open_seconds`` the breaker goes half-open and a background probe decides
+    whether to close it again or re-open it for another period.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        window_size: int,
+        min_calls: int,
+        slow_call_seconds: float,
+        open_seconds: float,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.probe: Optional[Callable[[], Awaitable[Any]]] = None
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._opened_at: Optional[float] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._counters = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def allow(self) -> bool:
+        """Return whether traffic may be sent to the provider."""
+        if self.state == CLOSED:
+            return True
+        self._counters["rejected"] += 1
+        return False
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        """Record the outcome of a call and open the circuit if the provider is degraded."""
+        if latency is not None and latency > self.slow_call_seconds:
+            success = False
+        if self.state != CLOSED:
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open(f"{failures}/{len(self._outcomes)} recent calls failed or were slow")
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._counters["opened"] += 1
+        logger.warning(f"{self.name}: circuit opened ({reason}), next probe in {self.open_seconds}s")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.call_later(self.open_seconds, self._start_probe)
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._opened_at = None
+        self._outcomes.clear()
+        logger.info(f"{self.name}: circuit closed")
+
+    def _start_probe(self) -> None:
+        if self.state != OPEN or (self._probe_task is not None and not self._probe_task.done()):
+            return
+        self.state = HALF_OPEN
+        self._probe_task = asyncio.ensure_future(self._run_probe())
+
+    async def _run_probe(self) -> None:
+        self._counters["probes"] += 1
+        if self.probe is None:
+            # Nothing to probe with; let traffic through again
+            self._close()
+            return
+        try:
+            await asyncio.wait_for(self.probe(), timeout=self.slow_call_seconds)
+        except Exception as e:
+            logger.warning(f"{self.name}: half-open probe failed ({type(e).__name__}: {str(e)})")
+            self._open("probe failed")
+            return
+        self._close()
+
+    def reset(self) -> None:
+        """Close the circuit and forget recent outcomes."""
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+        self.state = CLOSED
+        self._opened_at = None
+        self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the circuit state, recent failure rate and counters."""
+        failures = self._outcomes.count(False)
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failure_rate": failures / len(self._outcomes) if self._outcomes else 0.0,
+            "open_for": round(time.monotonic() - self._opened_at, 1) if self._opened_at else None,
+            **self._counters,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Create and hold one ``CircuitBreaker`` per provider."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> CircuitBreaker:
+        """Return the breaker of the given provider."""
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(provider)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        name=provider,
+                        failure_rate=self.settings.circuit_failure_rate,
+                        window_size=self.settings.circuit_window_size,
+                        min_calls=self.settings.circuit_min_calls,
+                        slow_call_seconds=self.settings.circuit_slow_call_seconds,
+                        open_seconds=self.settings.circuit_open_seconds,
+                    )
+                    self._breakers[provider] = breaker
+        return breaker
+
+    def reset(self) -> None:
+        """Close every circuit."""
+        for breaker in self._breakers.values():
+            breaker.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the stats of every breaker keyed by provider."""
+        return {provider: breaker.stats() for provider, breaker in self._breakers.items()}
+
+
+# Create and export a global instance
+circuit_breakers = CircuitBreakerRegistry()
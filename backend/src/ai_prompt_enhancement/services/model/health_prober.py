@@ -0,0 +1,96 @@
+"""Background health probes of the model providers."""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from ...core.config import get_settings
+from .model_factory import ModelFactory
+
+logger = logger.bind(service="health_prober")
+
+
+class HealthProber:
+    """Probe each configured model on an interval and keep the latest result in memory.
+
+    Every model is probed by its own task, so providers are checked in
+    parallel and a hanging provider does not delay the others. A probe is a
+    one-token completion. While a model is healthy its interval doubles up to
+    ``max_interval``; after a failed probe it drops back to ``min_interval``.
+    """
+
+    def __init__(self, models: List[str], min_interval: float, max_interval: float, timeout: float):
+        self.models = models
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._intervals: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start probing in the background."""
+        if self._tasks:
+            return
+        logger.info(f"Starting health probes for: {', '.join(self.models)}")
+        self._tasks = [asyncio.create_task(self._probe_loop(model)) for model in self.models]
+
+    async def stop(self) -> None:
+        """Cancel the background probes."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def probe(self, model: str) -> Dict[str, Any]:
+        """Probe one model now, store and return the result."""
+        started = time.monotonic()
+        error = None
+        try:
+            service = ModelFactory.get_service(ModelFactory.get_provider(model))
+            await asyncio.wait_for(service.client.probe(model), timeout=self.timeout)
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            logger.warning(f"Health probe of {model} failed ({error})")
+
+        interval = self._intervals.get(model)
+        if error is None:
+            interval = self.min_interval if interval is None else min(self.max_interval, interval * 2)
+        else:
+            interval = self.min_interval
+        self._intervals[model] = interval
+
+        result = {
+            "status": "healthy" if error is None else "unhealthy",
+            "latency": round(time.monotonic() - started, 3),
+            "checked_at": datetime.now().isoformat(),
+            "next_probe_in": interval,
+            "error": error,
+        }
+        self._results[model] = result
+        return result
+
+    async def _probe_loop(self, model: str) -> None:
+        while True:
+            await self.probe(model)
+            await asyncio.sleep(self._intervals[model])
+
+    def status(self, model: str) -> Optional[Dict[str, Any]]:
+        """Return the latest probe result of a model, or None if it has not been probed."""
+        return self._results.get(model)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return the latest probe result of every probed model."""
+        return dict(self._results)
+
+
+# Create and export a global instance
+_settings = get_settings()
+health_prober = HealthProber(
+    models=_settings.health_probe_models,
+    min_interval=_settings.health_probe_min_interval,
+    max_interval=_settings.health_probe_max_interval,
+    timeout=_settings.health_probe_timeout,
+)
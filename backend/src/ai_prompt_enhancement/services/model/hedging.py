@@ -0,0 +1,153 @@
+"""Hedged provider calls to cut tail latency."""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from ...core.config import get_settings
+from .call_metadata import record_call_metadata
+
+logger = logger.bind(service="hedging")
+
+
+class LatencyWindow:
+    """The most recent successful call latencies of one provider model."""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Return the nearest-rank percentile of the window, or None when empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+
+class Hedger:
+    """Send a backup request when the primary is slower than usual.
+
+    If a call has not finished after the configured percentile of recent
+    latencies for its provider model, a duplicate request is started; the first
+    successful response wins and the other request is cancelled. Hedges draw
+    from a budget that grows by ``max_rate`` per call (capped at ``burst``), so
+    at most about ``max_rate`` of all calls are duplicated.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        percentile: float,
+        max_rate: float,
+        min_samples: int,
+        window_size: int = 500,
+        burst: float = 10.0,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.burst = burst
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._budget: Dict[str, float] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, key: str, counter: str) -> None:
+        counters = self._counters.setdefault(key, {"calls": 0, "fired": 0, "won": 0, "budget_exhausted": 0})
+        counters[counter] += 1
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Return how long to wait before hedging, or None until enough samples exist."""
+        window = self._windows.get(key)
+        if window is None or len(window) < self.min_samples:
+            return None
+        return window.percentile(self.percentile)
+
+    def _take_budget(self, key: str) -> bool:
+        if self._budget.get(key, 0.0) < 1.0:
+            self._count(key, "budget_exhausted")
+            return False
+        self._budget[key] -= 1.0
+        return True
+
+    def _observe(self, key: str, latency: float) -> None:
+        self._windows.setdefault(key, LatencyWindow(self.window_size)).add(latency)
+
+    async def run(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[Any]],
+        backup: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Run ``primary``, hedging with ``backup`` if it is slower than usual."""
+        if not self.enabled:
+            return await primary()
+
+        self._count(key, "calls")
+        self._budget[key] = min(self.burst, self._budget.get(key, 0.0) + self.max_rate)
+        delay = self.hedge_delay(key)
+        started = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        tasks = {primary_task: started}
+        try:
+            if delay is not None:
+                await asyncio.wait({primary_task}, timeout=delay)
+            if primary_task.done() or delay is None or not self._take_budget(key):
+                result = await primary_task
+                self._observe(key, time.monotonic() - started)
+                return result
+
+            self._count(key, "fired")
+            record_call_metadata(hedges=1)
+            logger.info(f"{key}: no response after {delay:.2f}s, sending hedged request")
+            backup_task = asyncio.ensure_future(backup())
+            tasks[backup_task] = time.monotonic()
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        won = task is backup_task
+                        if won:
+                            self._count(key, "won")
+                        record_call_metadata(hedge_won=won)
+                        self._observe(key, time.monotonic() - tasks[task])
+                        return task.result()
+            raise primary_task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per provider model counters and the current hedge delay."""
+        stats = {}
+        for key, counters in self._counters.items():
+            delay = self.hedge_delay(key)
+            stats[key] = {
+                **counters,
+                "hedge_delay": round(delay, 3) if delay is not None else None,
+            }
+        return {"enabled": self.enabled, "providers": stats}
+
+
+# Create and export a global instance
+_settings = get_settings()
+hedger = Hedger(
+    enabled=_settings.model_hedging_enabled,
+    percentile=_settings.model_hedge_percentile,
+    max_rate=_settings.model_hedge_max_rate,
+    min_samples=_settings.model_hedge_min_samples,
+)
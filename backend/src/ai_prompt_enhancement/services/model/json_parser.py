@@ -0,0 +1,212 @@
+"""Tolerant, incremental JSON parsing for model output.
+
+Model responses are usually valid JSON, but regularly arrive wrapped in a
+markdown fence, with a trailing comma, or cut off by ``max_tokens``. The
+helpers here parse such output in a single pass instead of failing the whole
+request.
+"""
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+logger = logger.bind(service="json_parser")
+
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_FENCE_OPEN = re.compile(r'```[a-zA-Z]*')
+_PARTIAL_SCALAR = re.compile(r'(?<=[:\[,])\s*(?:-|t|tr|tru|f|fa|fal|fals|n|nu|nul|-?\d+\.?\d*[eE]?[+-]?)$')
+_DANGLING_KEY = re.compile(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"\s*:?$')
+_WHITESPACE = " \t\r\n"
+
+Path = Tuple[Any, ...]
+
+
+class _Frame:
+    """An open JSON object or array on the scanner stack."""
+
+    __slots__ = ("kind", "start", "path", "key", "expect_key", "index")
+
+    def __init__(self, kind: str, start: int, path: Path):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+        self.index = 0
+
+
+def _matches(path: Path, pattern: Path) -> bool:
+    return len(path) == len(pattern) and all(p == "*" or p == k for k, p in zip(path, pattern))
+
+
+class IncrementalJSONParser:
+    """Scan a JSON document chunk by chunk and report completed sub-objects.
+
+    ``watch`` is a collection of paths such as ``("metrics", "*")``; whenever an
+    object or array at a matching path is closed, ``feed`` returns its path and
+    decoded value. Text before the first ``{`` or ``[`` (e.g. a markdown fence)
+    is ignored, and ``finish`` returns the whole document with trailing commas
+    dropped and any truncated tail closed off.
+    """
+
+    def __init__(self, watch: Iterable[Path] = ()):
+        self.watch = [tuple(pattern) for pattern in watch]
+        self.text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._string_start = 0
+        self._root_start = 0
+        self._drop: List[int] = []
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Consume the next chunk and return the watched values it completed."""
+        self.text += chunk
+        completed: List[Tuple[Path, Any]] = []
+        text = self.text
+        pos = self._pos
+        end = len(text)
+
+        while pos < end and not self.done:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = end
+                    break
+                if match.group() == "\\":
+                    if match.start() + 1 >= end:
+                        # Wait for the escaped character
+                        pos = match.start()
+                        break
+                    pos = match.start() + 2
+                    continue
+                pos = match.start() + 1
+                self._in_string = False
+                self._close_string(pos)
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = end
+                break
+            char = match.group()
+            pos = match.start() + 1
+
+            if not self.started:
+                if char in "{[":
+                    self.started = True
+                    self._root_start = match.start()
+                    self._stack.append(_Frame(char, match.start(), ()))
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char in "{[":
+                parent = self._stack[-1]
+                key = parent.key if parent.kind == "{" else parent.index
+                self._stack.append(_Frame(char, match.start(), parent.path + (key,)))
+            elif char in "}]":
+                comma = self._trailing_comma(match.start())
+                if comma is not None:
+                    self._drop.append(comma)
+                frame = self._stack.pop()
+                if any(_matches(frame.path, pattern) for pattern in self.watch):
+                    try:
+                        completed.append((frame.path, json.loads(text[frame.start:pos], strict=False)))
+                    except json.JSONDecodeError as e:
+                        logger.debug(f"Skipping malformed value at {frame.path}: {str(e)}")
+                if not self._stack:
+                    self.done = True
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+
+        self._pos = pos
+        return completed
+
+    def finish(self) -> Any:
+        """Return the parsed document, repairing trailing commas and truncation."""
+        if not self.started:
+            raise json.JSONDecodeError("No JSON document found", self.text, 0)
+
+        body = self._body()
+        if self._in_string:
+            body += '"'
+        closers = "".join("}" if frame.kind == "{" else "]" for frame in reversed(self._stack))
+
+        while True:
+            try:
+                return json.loads(body + closers, strict=False)
+            except json.JSONDecodeError:
+                repaired = self._trim_tail(body)
+                if repaired == body:
+                    raise
+                body = repaired
+
+    def _body(self) -> str:
+        """Return the scanned document text without the dropped commas."""
+        pieces = []
+        start = self._root_start
+        for index in self._drop:
+            pieces.append(self.text[start:index])
+            start = index + 1
+        pieces.append(self.text[start:self._pos])
+        return "".join(pieces)
+
+    @staticmethod
+    def _trim_tail(body: str) -> str:
+        """Drop one incomplete trailing element (comma, key or scalar) from a truncated body."""
+        body = body.rstrip(_WHITESPACE)
+        if body.endswith(","):
+            return body[:-1]
+        for pattern in (_PARTIAL_SCALAR, _DANGLING_KEY):
+            match = pattern.search(body)
+            if match:
+                return body[:match.start()]
+        return body
+
+    def _trailing_comma(self, closer: int) -> Optional[int]:
+        index = closer - 1
+        while index >= 0 and self.text[index] in _WHITESPACE:
+            index -= 1
+        return index if index >= 0 and self.text[index] == "," else None
+
+    def _close_string(self, end: int) -> None:
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame.kind == "{" and frame.expect_key:
+            key = self.text[self._string_start + 1:end - 1]
+            frame.key = json.loads(f'"{key}"', strict=False) if "\\" in key else key
+            frame.expect_key = False
+
+
+def parse_model_json(text: str) -> Any:
+    """Parse JSON produced by a model, tolerating fences, trailing commas and truncation.
+
+    Well-formed output is decoded with a single ``json.loads`` call; anything
+    else falls back to one scan with ``IncrementalJSONParser``.
+
+    Raises:
+        json.JSONDecodeError: If no JSON document can be recovered.
+    """
+    if not isinstance(text, str):
+        raise json.JSONDecodeError(f"Expected str, got {type(text).__name__}", str(text), 0)
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        stripped = stripped[_FENCE_OPEN.match(stripped).end():]
+        if stripped.endswith("```"):
+            stripped = stripped[:-3]
+    try:
+        return json.loads(stripped, strict=False)
+    except json.JSONDecodeError:
+        pass
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.finish()
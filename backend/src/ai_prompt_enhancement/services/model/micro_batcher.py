@@ -0,0 +1,167 @@
+"""Micro-batching of concurrent analyze requests into packed provider calls."""
+import asyncio
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from ...core.config import Settings, get_settings
+from .rate_limiter import estimate_tokens
+
+logger = logger.bind(service="micro_batcher")
+
+BatchItem = Tuple[str, Optional[str]]
+# Usage of a packed call cannot be attributed to its requests, so it is only reported for the whole batch
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd")
+
+
+class _Batch:
+    """Analyze requests for one model service waiting to be sent together."""
+
+    def __init__(self, service: Any):
+        self.service = service
+        self.futures: Dict[BatchItem, "asyncio.Future[Dict]"] = {}
+        self.tokens = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Pack analyze requests arriving within a short window into one provider call.
+
+    The first request for a model service opens a batch and waits at most
+    ``window_seconds`` for others to join; the batch is sent early once it holds
+    ``max_size`` requests or adding one more would exceed ``max_tokens``
+    (estimated prompt and context tokens). A batch of one is sent as a normal
+    analyze call. If the packed call fails, or the model leaves a request out
+    of its answer, the affected requests are retried one by one, so callers
+    always get the same result shape as an unbatched call.
+    """
+
+    def __init__(self, enabled: bool = False, window_seconds: float = 0.005,
+                 max_size: int = 4, max_tokens: float = 4000):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.max_size = max(1, max_size)
+        self.max_tokens = max_tokens
+        self._pending: Dict[int, _Batch] = {}
+        self._counters = {
+            "requests": 0, "deduplicated": 0, "batches": 0, "packed_calls": 0,
+            "packed_requests": 0, "single_calls": 0, "fallbacks": 0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "MicroBatcher":
+        settings = settings or get_settings()
+        return cls(
+            enabled=settings.analyze_batching_enabled,
+            window_seconds=settings.analyze_batch_window_ms / 1000,
+            max_size=settings.analyze_batch_max_size,
+            max_tokens=settings.analyze_batch_max_tokens,
+        )
+
+    async def analyze(self, service: Any, prompt: str, context: Optional[str] = None) -> Dict:
+        """Analyze a prompt with ``service``, sharing a provider call with concurrent requests."""
+        if not self.enabled or not hasattr(service, "analyze_prompts_packed"):
+            return await service.analyze_prompt(prompt, context)
+
+        self._counters["requests"] += 1
+        item = (prompt, context)
+        batch = self._pending.get(id(service))
+        if batch is not None and item in batch.futures:
+            self._counters["deduplicated"] += 1
+            future = batch.futures[item]
+        else:
+            tokens = estimate_tokens([{"content": prompt}, {"content": context or ""}], None)
+            if batch is not None and batch.tokens + tokens > self.max_tokens:
+                self._flush(id(service))
+                batch = None
+            if batch is None:
+                batch = self._open(service)
+            future = asyncio.get_running_loop().create_future()
+            batch.futures[item] = future
+            batch.tokens += tokens
+            if len(batch.futures) >= self.max_size:
+                self._flush(id(service))
+        # A cancelled caller must not cancel the shared result for the others
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def _open(self, service: Any) -> _Batch:
+        batch = _Batch(service)
+        self._pending[id(service)] = batch
+        batch.timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush, id(service))
+        return batch
+
+    def _flush(self, key: int) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._counters["batches"] += 1
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _Batch) -> None:
+        items: List[BatchItem] = list(batch.futures)
+        try:
+            results: List[Optional[Dict]] = [None] * len(items)
+            if len(items) > 1:
+                results = await self._run_packed(batch.service, items)
+            missing = [index for index, result in enumerate(results) if result is None]
+            if missing:
+                self._counters["single_calls"] += len(missing)
+                singles = await asyncio.gather(
+                    *(batch.service.analyze_prompt(*items[index]) for index in missing), return_exceptions=True
+                )
+                for index, result in zip(missing, singles):
+                    results[index] = result
+            for item, result in zip(items, results):
+                future = batch.futures[item]
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _run_packed(self, service: Any, items: List[BatchItem]) -> List[Optional[Dict]]:
+        """Send ``items`` in one packed call; None marks requests that must be retried alone."""
+        try:
+            packed = await service.analyze_prompts_packed(items)
+        except Exception as e:
+            logger.warning(f"Packed analysis of {len(items)} prompts failed, falling back to single calls: {str(e)}")
+            self._counters["fallbacks"] += 1
+            return [None] * len(items)
+
+        self._counters["packed_calls"] += 1
+        packed_metadata = packed.get("metadata", {})
+        metadata = {key: value for key, value in packed_metadata.items() if key not in USAGE_FIELDS}
+        metadata["batch_size"] = len(items)
+        metadata["batch_usage"] = {key: value for key, value in packed_metadata.items() if key in USAGE_FIELDS}
+        results = list(packed.get("results", []))[:len(items)]
+        results += [None] * (len(items) - len(results))
+        for result in results:
+            if result is not None:
+                self._counters["packed_requests"] += 1
+                result["metadata"] = {**result.get("metadata", {}), **metadata}
+        if None in results:
+            logger.warning(f"Packed analysis left out {results.count(None)} of {len(items)} prompts")
+            self._counters["fallbacks"] += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching settings and counters."""
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_seconds * 1000,
+            "max_size": self.max_size,
+            "max_tokens": self.max_tokens,
+            **self._counters,
+        }
+
+
+# Create and export a global instance
+micro_batcher = MicroBatcher.from_settings()
@@ -1,26 +1,124 @@
 """Factory for creating model service instances."""
-from typing import Union, Any
+import functools
+import threading
+from typing import Any, Dict, Tuple
 from loguru import logger
 
+from ...core.config import get_settings
+from .circuit_breaker import ProviderUnavailableError, circuit_breakers
+
 logger = logger.bind(service="model_factory")
 
+OPENAI_MODELS = ["gpt-4", "gpt-3.5-turbo", "gpt-4o-mini"]
+PROVIDERS = ("deepseek", "openai")
+
 class ModelFactory:
+    """Hand out long-lived, per-provider model services.
+
+    Services (and the connection pools of their provider clients) are created on
+    first use and shared by every caller in the process until ``close`` is called
+    on application shutdown.
+
+    Requests for a provider whose circuit breaker is open are rerouted to the
+    configured fallback model, or rejected with ``ProviderUnavailableError``.
+    The half-open probe of each breaker goes through the pooled service (see
+    ``register_probes``).
+    """
+
+    _services: Dict[str, Any] = {}
+    _lock = threading.Lock()
+
     @staticmethod
-    def create_model_service(model_name: str) -> Any:
-        """Create and return appropriate model service based on model name."""
-        logger.info(f"Creating model service for: {model_name}")
-        
-        # Use lazy imports to avoid circular dependencies
+    def get_provider(model_name: str) -> str:
+        """Return the provider key serving the given model name."""
         if model_name.startswith("deepseek"):
+            return "deepseek"
+        elif model_name in OPENAI_MODELS:
+            return "openai"
+        raise ValueError(f"Unsupported model: {model_name}")
+
+    @staticmethod
+    def _build_service(provider: str) -> Any:
+        # Use lazy imports to avoid circular dependencies
+        if provider == "deepseek":
             from .deepseek_service import DeepseekService
-            logger.info("Using DeepseekService")
+            logger.info("Creating pooled DeepseekService")
             return DeepseekService()
-        elif model_name in ["gpt-4", "gpt-3.5-turbo", "gpt-4o-mini"]:
-            from .openai_service import OpenAIService
-            logger.info("Using OpenAIService")
-            return OpenAIService()
-        else:
-            raise ValueError(f"Unsupported model: {model_name}")
+        from .openai_service import OpenAIService
+        logger.info("Creating pooled OpenAIService")
+        return OpenAIService()
+
+    @classmethod
+    def get_service(cls, provider: str) -> Any:
+        """Return the shared service of a provider, regardless of its circuit state."""
+        service = cls._services.get(provider)
+        if service is None:
+            with cls._lock:
+                service = cls._services.get(provider)
+                if service is None:
+                    service = cls._build_service(provider)
+                    cls._services[provider] = service
+        return service
+
+    @classmethod
+    def resolve_model_service(cls, model_name: str) -> Tuple[str, Any]:
+        """Return the model that will serve a request for ``model_name`` and its shared service."""
+        provider = cls.get_provider(model_name)
+        if circuit_breakers.get(provider).allow():
+            logger.debug(f"Using {provider} service for: {model_name}")
+            return model_name, cls.get_service(provider)
+
+        fallback = get_settings().model_fallback_model
+        if fallback:
+            fallback_provider = cls.get_provider(fallback)
+            if fallback_provider != provider and circuit_breakers.get(fallback_provider).allow():
+                logger.warning(f"{provider} circuit is open, rerouting {model_name} to {fallback}")
+                return fallback, cls.get_service(fallback_provider)
+        raise ProviderUnavailableError(
+            f"Model provider '{provider}' is unavailable and no fallback model could be used"
+        )
+
+    @classmethod
+    def probe_model(cls, provider: str) -> str:
+        """Return the model a provider is probed with: its first health probe model, else its default model."""
+        for model in get_settings().health_probe_models:
+            try:
+                if cls.get_provider(model) == provider:
+                    return model
+            except ValueError:
+                continue
+        settings = cls.get_service(provider).settings
+        return settings.deepseek_model if provider == "deepseek" else settings.openai_model
+
+    @classmethod
+    async def probe_provider(cls, provider: str) -> None:
+        """Send a one-token completion to a provider through its pooled service."""
+        await cls.get_service(provider).client.probe(cls.probe_model(provider))
+
+    @classmethod
+    def register_probes(cls) -> None:
+        """Make the circuit breaker of every provider probe through its pooled service."""
+        for provider in PROVIDERS:
+            circuit_breakers.get(provider).probe = functools.partial(cls.probe_provider, provider)
+
+    @classmethod
+    def create_model_service(cls, model_name: str) -> Any:
+        """Return the shared model service for the given model name."""
+        return cls.resolve_model_service(model_name)[1]
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close every pooled service and drop it from the registry."""
+        with cls._lock:
+            services = dict(cls._services)
+            cls._services.clear()
+        for provider, service in services.items():
+            try:
+                await service.client.close()
+                logger.info(f"Closed {provider} model service")
+            except Exception as e:
+                logger.error(f"Error closing {provider} model service: {str(e)}")
 
 # Create and export a global instance
-model_factory = ModelFactory() 
\ No newline at end of file
+model_factory = ModelFactory()
+ModelFactory.register_probes()
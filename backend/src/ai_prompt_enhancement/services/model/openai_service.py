@@ -1,32 +1,38 @@
 """OpenAI service for prompt analysis and comparison."""
 import json
 import logging
-import re
-from typing import Dict, List, Optional, Union, Any
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union, Any
 
-from openai import OpenAI
-
-from ai_prompt_enhancement.config.settings import get_settings
-from ai_prompt_enhancement.services.prompt_refinement.prompt_templates import (
-    ANALYSIS_TEMPLATE,
-    COMPARISON_TEMPLATE,
+from ai_prompt_enhancement.config.settings import Settings, get_settings
+from ..core.single_flight import single_flight
+from .call_metadata import collect_call_metadata, with_call_metadata
+from .json_parser import parse_model_json
+from .prompt_messages import (
+    analysis_messages,
+    comparison_messages,
+    fused_analysis_messages,
+    generation_messages,
+    packed_analysis_messages,
 )
-from ..synthetic_data.prompt_templates import SYNTHETIC_DATA_TEMPLATE, SIMILAR_CONTENT_TEMPLATE
+from .provider_client import ProviderClient
+from ..prompt_refinement.prompt_diff import highlight_comparison
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
-    def __init__(self):
-        """Initialize the OpenAIService with configuration and OpenAI client."""
-        self.settings = get_settings()
+    def __init__(self, settings: Optional[Settings] = None):
+        """Initialize the OpenAIService with configuration and provider client."""
+        self.settings = settings or get_settings()
         logger.info(f"Initializing OpenAIService with base_url: {self.settings.openai_base_url}")
         
-        self.client = OpenAI(
+        self.client = ProviderClient(
             api_key=self.settings.openai_api_key,
-            base_url=self.settings.openai_base_url
+            base_url=self.settings.openai_base_url,
+            provider="openai"
         )
-        logger.debug("OpenAI client initialized")
+        logger.debug(f"Provider client initialized in {self.client.mode} mode")
     
+    @with_call_metadata
     async def generate_content(self, template: str, batch_size: int = 1) -> Dict[str, Any]:
         """Generate content using the OpenAI model."""
         try:
@@ -35,22 +41,9 @@ class OpenAIService:
             
             # Generate content
             try:
-                response = self.client.chat.completions.create(
+                response = await self.client.create_chat_completion(
                     model=self.settings.openai_model,
-                    messages=[{
-                        "role": "system",
-                        "content": """You are a synthetic data generator that creates high-quality content based on templates.
-                        You MUST return a valid JSON object with the following structure for EACH generated item:
-                        {
-                            "generated_content_1": {
-                                "content": "your generated content here",
-                                "score": 0.85  // float between 0 and 1
-                            }
-                        }"""
-                    }, {
-                        "role": "user",
-                        "content": template
-                    }],
+                    messages=generation_messages(template),
                     temperature=0.7,
                     max_tokens=2000,
                     n=batch_size,  # Request multiple completions
@@ -75,15 +68,13 @@ class OpenAIService:
                     
                     # Attempt to clean and parse the content
                     try:
-                        # Remove any markdown code block markers
-                        content = re.sub(r'```json\s*|\s*```', '', content)
                         content = content.strip()
                         
                         if not content:
                             raise ValueError("Empty content after cleaning")
                         
-                        # Parse JSON and extract content
-                        parsed_content = json.loads(content)
+                        # Parse JSON (markdown fences and truncation are tolerated) and extract content
+                        parsed_content = parse_model_json(content)
                         logger.debug(f"Parsed content structure: {list(parsed_content.keys())}")
                         
                         # Get the first generated content
@@ -151,25 +142,88 @@ class OpenAIService:
 
     @staticmethod
     def _clean_json(data: Union[Dict, str]) -> Dict:
-        """Clean and normalize JSON data, handling both string and dict inputs."""
+        """Parse model output into a dict, tolerating fences, trailing commas and truncation."""
+        if isinstance(data, dict):
+            return data
         try:
-            # Convert to dict if string
-            if isinstance(data, str):
-                # Remove newlines and extra spaces before parsing
-                data = data.replace("\n", "").replace("    ", "").strip()
-                data = json.loads(data)
-            
-            # Convert back to string with minimal whitespace
-            cleaned_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-            # Remove any whitespace around JSON keys
-            cleaned_str = re.sub(r'\s*"([^"]+)"\s*:', r'"\1":', cleaned_str)
-            # Parse back to dict
-            return json.loads(cleaned_str)
-        except (json.JSONDecodeError, TypeError) as e:
+            return parse_model_json(data)
+        except json.JSONDecodeError as e:
             logger.error(f"Error cleaning JSON: {str(e)}")
             logger.error(f"Raw data that failed to parse: {data}")
             raise ValueError(f"Invalid JSON format: {str(e)}")
 
+    def _analysis_messages(self, prompt: str, context: Optional[str] = None) -> List[Dict]:
+        """Build the chat messages for a prompt analysis request."""
+        messages = analysis_messages(self._clean_text(prompt), self._clean_text(context) if context else None)
+        logger.debug(f"Analysis input for model:\n{messages[-1]['content']}")
+        return messages
+
+    def _build_analysis(self, content: str, prompt: str) -> Dict:
+        """Parse raw model output into an analysis result, falling back to defaults."""
+        try:
+            # Parse and validate response
+            logger.info("Parsing model response...")
+            analysis = self._clean_json(content)
+            logger.info("Successfully parsed response to JSON")
+
+            # Ensure the response has the required structure
+            if not isinstance(analysis, dict):
+                logger.warning("Response is not a dictionary, creating error response")
+                return self._create_analyze_error_response(
+                    "Failed to get valid response",
+                    ["The model response was not in the correct format"],
+                    prompt
+                )
+
+            # Initialize default structure if missing
+            if "metrics" not in analysis or not isinstance(analysis["metrics"], dict):
+                logger.warning("Missing or invalid metrics, using defaults")
+                analysis["metrics"] = {
+                    "clarity": {
+                        "score": 0.5,
+                        "description": "Analysis incomplete",
+                        "suggestions": ["Make the prompt more clear and concise", "Remove ambiguous terms"]
+                    },
+                    "structure": {
+                        "score": 0.5,
+                        "description": "Analysis incomplete",
+                        "suggestions": ["Organize the prompt into clear sections", "Use bullet points or numbering"]
+                    },
+                    "examples": {
+                        "score": 0.5,
+                        "description": "Analysis incomplete",
+                        "suggestions": ["Add relevant examples", "Include sample inputs and outputs"]
+                    },
+                    "formatting": {
+                        "score": 0.5,
+                        "description": "Analysis incomplete",
+                        "suggestions": ["Use proper markdown formatting", "Add line breaks for readability"]
+                    },
+                    "output_spec": {
+                        "score": 0.5,
+                        "description": "Analysis incomplete",
+                        "suggestions": ["Specify desired output format", "Define response structure"]
+                    }
+                }
+            if "suggestions" not in analysis:
+                analysis["suggestions"] = ["Consider adding more details to your prompt"]
+            if "enhanced_prompt" not in analysis:
+                analysis["enhanced_prompt"] = prompt
+
+            analysis["model_used"] = self.settings.openai_model
+            logger.info("Successfully prepared analysis result")
+            return analysis
+
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Failed to parse model response: {str(e)}")
+            return self._create_analyze_error_response(
+                "Failed to parse model response",
+                ["The model response was not valid JSON", "Try simplifying your prompt"],
+                prompt
+            )
+
+    @single_flight.coalesce("analyze")
+    @with_call_metadata
     async def analyze_prompt(self, prompt: str, context: Optional[str] = None) -> Dict:
         """Analyze a prompt using the OpenAI model."""
         try:
@@ -177,27 +231,11 @@ class OpenAIService:
             logger.info(f"Input prompt: '{prompt}'")
             logger.info(f"Input context: '{context}'")
             
-            formatted_prompt = ANALYSIS_TEMPLATE.format(
-                prompt=self._clean_text(prompt),
-                context=self._clean_text(context) if context else "No additional context provided"
-            )
-            logger.info("Formatted prompt for model:")
-            logger.info(formatted_prompt)
-            
             # Make API request
             logger.info("Making API request to model...")
-            response = self.client.chat.completions.create(
+            response = await self.client.create_chat_completion(
                 model=self.settings.openai_model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are an expert prompt engineer specializing in analyzing and improving prompts.
-                        You must ALWAYS respond with ONLY valid JSON, no other text or explanations.
-                        Your response must exactly match the structure specified in the user's message.
-                        Do not include any markdown formatting, only pure JSON."""
-                    },
-                    {"role": "user", "content": formatted_prompt}
-                ],
+                messages=self._analysis_messages(prompt, context),
                 temperature=0.7,
                 max_tokens=2000,
                 response_format={"type": "json_object"}
@@ -209,67 +247,7 @@ class OpenAIService:
             logger.info("Raw model response:")
             logger.info(content)
             
-            try:
-                # Parse and validate response
-                logger.info("Parsing model response...")
-                analysis = self._clean_json(content)
-                logger.info("Successfully parsed response to JSON")
-                
-                # Ensure the response has the required structure
-                if not isinstance(analysis, dict):
-                    logger.warning("Response is not a dictionary, creating error response")
-                    return self._create_analyze_error_response(
-                        "Failed to get valid response",
-                        ["The model response was not in the correct format"],
-                        prompt
-                    )
-                
-                # Initialize default structure if missing
-                if "metrics" not in analysis or not isinstance(analysis["metrics"], dict):
-                    logger.warning("Missing or invalid metrics, using defaults")
-                    analysis["metrics"] = {
-                        "clarity": {
-                            "score": 0.5,
-                            "description": "Analysis incomplete",
-                            "suggestions": ["Make the prompt more clear and concise", "Remove ambiguous terms"]
-                        },
-                        "structure": {
-                            "score": 0.5,
-                            "description": "Analysis incomplete",
-                            "suggestions": ["Organize the prompt into clear sections", "Use bullet points or numbering"]
-                        },
-                        "examples": {
-                            "score": 0.5,
-                            "description": "Analysis incomplete",
-                            "suggestions": ["Add relevant examples", "Include sample inputs and outputs"]
-                        },
-                        "formatting": {
-                            "score": 0.5,
-                            "description": "Analysis incomplete",
-                            "suggestions": ["Use proper markdown formatting", "Add line breaks for readability"]
-                        },
-                        "output_spec": {
-                            "score": 0.5,
-                            "description": "Analysis incomplete",
-                            "suggestions": ["Specify desired output format", "Define response structure"]
-                        }
-                    }
-                if "suggestions" not in analysis:
-                    analysis["suggestions"] = ["Consider adding more details to your prompt"]
-                if "enhanced_prompt" not in analysis:
-                    analysis["enhanced_prompt"] = prompt
-                
-                analysis["model_used"] = self.settings.openai_model
-                logger.info("Successfully prepared analysis result")
-                return analysis
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Failed to parse model response: {str(e)}")
-                return self._create_analyze_error_response(
-                    "Failed to parse model response",
-                    ["The model response was not valid JSON", "Try simplifying your prompt"],
-                    prompt
-                )
+            return self._build_analysis(content, prompt)
                 
         except Exception as e:
             logger.error(f"API request failed: {str(e)}")
@@ -279,6 +257,97 @@ class OpenAIService:
                 prompt
             )
 
+    @single_flight.coalesce("analyze_compare")
+    @with_call_metadata
+    async def analyze_and_compare_prompt(self, prompt: str, context: Optional[str] = None) -> Dict:
+        """Analyze a prompt and score its enhanced version in a single provider call.
+
+        Returns the analysis with an added ``enhanced_metrics`` object, which is
+        missing if the model did not score the enhanced prompt.
+        """
+        try:
+            logger.info("Analyzing prompt and scoring its enhanced version in one request")
+            response = await self.client.create_chat_completion(
+                model=self.settings.openai_model,
+                messages=fused_analysis_messages(
+                    self._clean_text(prompt), self._clean_text(context) if context else None
+                ),
+                stream=False,
+                temperature=0.7,
+                max_tokens=3000,
+                response_format={"type": "json_object"}
+            )
+            return self._build_analysis(response.choices[0].message.content, prompt)
+
+        except Exception as e:
+            logger.error(f"API request failed: {str(e)}")
+            return self._create_analyze_error_response(
+                "API request failed",
+                ["Please check your API settings and try again", "The service might be temporarily unavailable"],
+                prompt
+            )
+
+    async def analyze_prompt_stream(self, prompt: str, context: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a prompt analysis, yielding ("token", text) deltas and a final ("result", analysis)."""
+        logger.info("=== Starting streaming prompt analysis in OpenAIService ===")
+        chunks = []
+        with collect_call_metadata() as metadata:
+            try:
+                async for delta in self.client.stream_chat_completion(
+                    model=self.settings.openai_model,
+                    messages=self._analysis_messages(prompt, context),
+                    temperature=0.7,
+                    max_tokens=2000,
+                    response_format={"type": "json_object"}
+                ):
+                    chunks.append(delta)
+                    yield "token", delta
+                result = self._build_analysis("".join(chunks), prompt)
+            except Exception as e:
+                logger.error(f"Streaming API request failed: {str(e)}")
+                result = self._create_analyze_error_response(
+                    "API request failed",
+                    ["Please check your API settings and try again", "The service might be temporarily unavailable"],
+                    prompt
+                )
+        result["metadata"] = metadata
+        yield "result", result
+
+    @with_call_metadata
+    async def analyze_prompts_packed(self, requests: List[Tuple[str, Optional[str]]]) -> Dict:
+        """Analyze several (prompt, context) requests in a single provider call.
+
+        Returns ``{"results": [...]}`` with one analysis per request, in order,
+        or None where the model returned no usable analysis. Provider and
+        parsing errors are raised so the caller can fall back to single calls.
+        """
+        logger.info(f"Analyzing {len(requests)} prompts in one packed request")
+        items = [
+            {"id": str(index), "prompt": self._clean_text(prompt), "context": self._clean_text(context) if context else None}
+            for index, (prompt, context) in enumerate(requests)
+        ]
+        response = await self.client.create_chat_completion(
+            model=self.settings.openai_model,
+            messages=packed_analysis_messages(items),
+            stream=False,
+            temperature=0.7,
+            max_tokens=min(8192, 2000 * len(items)),
+            response_format={"type": "json_object"}
+        )
+        entries = parse_model_json(response.choices[0].message.content).get("results")
+        if not isinstance(entries, list):
+            raise ValueError("Packed analysis response has no results array")
+
+        by_id = {str(entry.pop("id")): entry for entry in entries if isinstance(entry, dict) and "id" in entry}
+        results = []
+        for index, (prompt, _) in enumerate(requests):
+            entry = by_id.get(str(index))
+            if entry is None or not isinstance(entry.get("metrics"), dict):
+                results.append(None)
+            else:
+                results.append(self._build_analysis(entry, prompt))
+        return {"results": results}
+
     def _create_analyze_error_response(self, description: str, suggestions: List[str], prompt: str) -> Dict:
         """Create a standardized error response for analyze endpoint."""
         return {
@@ -311,9 +380,12 @@ class OpenAIService:
             },
             "suggestions": suggestions,
             "enhanced_prompt": prompt,
+            "error": description,
             "model_used": self.settings.openai_model
         }
 
+    @single_flight.coalesce("compare")
+    @with_call_metadata
     async def compare_prompts(self, original_prompt: str, enhanced_prompt: str, context: Optional[Dict] = None) -> Dict:
         """Compare original and enhanced prompts."""
         logger.info("Starting prompt comparison")
@@ -335,22 +407,10 @@ class OpenAIService:
             cleaned_result = self._clean_json(analysis_result)
             
             try:
-                # Make API request with the template in the system message
-                response = self.client.chat.completions.create(
+                # Make API request with the static template as the cached prefix
+                response = await self.client.create_chat_completion(
                     model=self.settings.openai_model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": f"""You are an expert prompt engineer specializing in analyzing and comparing prompts.
-                            You must ALWAYS respond with ONLY valid JSON, no other text or explanations.
-                            Your response must follow this template structure:
-                            {COMPARISON_TEMPLATE}
-                            
-                            Ensure proper markdown formatting in the comparison text.
-                            The response must include 'original_prompt' and 'enhanced_prompt' objects."""
-                        },
-                        {"role": "user", "content": json.dumps(cleaned_result)}
-                    ],
+                    messages=comparison_messages(cleaned_result),
                     temperature=0.7,
                     max_tokens=2000,
                     response_format={"type": "json_object"}
@@ -364,7 +424,7 @@ class OpenAIService:
                 # Add model information
                 comparison["model_used"] = self.settings.openai_model
                 
-                return comparison
+                return highlight_comparison(comparison)
                 
             except Exception as e:
                 logger.error(f"API request failed: {str(e)}")
@@ -411,6 +471,7 @@ class OpenAIService:
                 "suggestions": suggestions,
                 "comparison": "Error occurred during comparison"
             },
+            "error": error,
             "model_used": self.settings.openai_model
         }
 
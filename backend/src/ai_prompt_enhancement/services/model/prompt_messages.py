@@ -0,0 +1,110 @@
+"""Chat message layouts shared by the model services.
+
+DeepSeek context caching and OpenAI prompt caching bill the longest prefix a
+provider has already seen at a fraction of the input price. Every builder
+therefore sends all static instructions first, as a system message that is
+byte-identical across calls, and puts the request-specific content last.
+
+The templates are compiled into the template registry at import, so building
+messages only fills in the input placeholders.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from ..core.template_registry import templates
+from ..prompt_refinement.prompt_templates import (
+    ANALYSIS_INPUT_TEMPLATE,
+    ANALYSIS_TEMPLATE,
+    COMPARISON_TEMPLATE,
+    FUSED_ANALYSIS_TEMPLATE,
+    PACKED_ANALYSIS_TEMPLATE,
+)
+
+ANALYSIS_SYSTEM = templates.register("analysis_system", "\n\n".join([
+    "You are an expert prompt engineer specializing in analyzing and improving prompts.\n"
+    "You must ALWAYS respond with ONLY valid JSON, no other text or explanations.\n"
+    "Your response must exactly match the output format specified below.\n"
+    "Do not include any markdown formatting, only pure JSON.",
+    ANALYSIS_TEMPLATE,
+]))
+
+# Extend the single analysis prompt, so packed, fused and single requests share a cached prefix
+PACKED_ANALYSIS_SYSTEM = templates.register(
+    "packed_analysis_system", "\n\n".join([ANALYSIS_SYSTEM.text, PACKED_ANALYSIS_TEMPLATE])
+)
+FUSED_ANALYSIS_SYSTEM = templates.register(
+    "fused_analysis_system", "\n\n".join([ANALYSIS_SYSTEM.text, FUSED_ANALYSIS_TEMPLATE])
+)
+
+COMPARISON_SYSTEM = templates.register("comparison_system", "\n\n".join([
+    "You are an expert prompt engineer specializing in analyzing and comparing prompts.\n"
+    "You must ALWAYS respond with ONLY valid JSON, no other text or explanations.\n"
+    "Your response must follow this template structure:",
+    COMPARISON_TEMPLATE,
+    "Ensure proper markdown formatting in the comparison text.\n"
+    "The response must include 'original_prompt' and 'enhanced_prompt' objects.",
+]))
+
+GENERATION_SYSTEM = templates.register("generation_system", """You are a synthetic data generator that creates high-quality content based on templates.
+You MUST return a valid JSON object with the following structure for EACH generated item:
+{
+    "generated_content_1": {
+        "content": "your generated content here",
+        "score": 0.85  // float between 0 and 1
+    }
+}""")
+
+ANALYSIS_INPUT = templates.register("analysis_input", ANALYSIS_INPUT_TEMPLATE, placeholders=("prompt", "context"))
+
+ANALYSIS_SYSTEM_PROMPT = ANALYSIS_SYSTEM.text
+PACKED_ANALYSIS_SYSTEM_PROMPT = PACKED_ANALYSIS_SYSTEM.text
+FUSED_ANALYSIS_SYSTEM_PROMPT = FUSED_ANALYSIS_SYSTEM.text
+COMPARISON_SYSTEM_PROMPT = COMPARISON_SYSTEM.text
+GENERATION_SYSTEM_PROMPT = GENERATION_SYSTEM.text
+
+# Result cache versions: any edit to the templates behind an operation invalidates its entries
+ANALYSIS_VERSION = templates.version("analysis_system", "analysis_input")
+COMPARISON_VERSION = templates.version("comparison_system")
+FUSED_VERSION = templates.version("fused_analysis_system", "analysis_input")
+
+NO_CONTEXT = "No additional context provided"
+
+
+def analysis_messages(prompt: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+    """Build the messages of a prompt analysis request."""
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_INPUT.render(prompt=prompt, context=context or NO_CONTEXT)},
+    ]
+
+
+def fused_analysis_messages(prompt: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+    """Build the messages of a request analyzing a prompt and scoring its enhanced version."""
+    return [
+        {"role": "system", "content": FUSED_ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_INPUT.render(prompt=prompt, context=context or NO_CONTEXT)},
+    ]
+
+
+def packed_analysis_messages(requests: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Build the messages of one request analyzing several prompts (``id``, ``prompt``, ``context`` dicts)."""
+    return [
+        {"role": "system", "content": PACKED_ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(requests)},
+    ]
+
+
+def comparison_messages(payload: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Build the messages of a prompt comparison request for the given input payload."""
+    return [
+        {"role": "system", "content": COMPARISON_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(payload)},
+    ]
+
+
+def generation_messages(template: str) -> List[Dict[str, str]]:
+    """Build the messages of a synthetic content generation request."""
+    return [
+        {"role": "system", "content": GENERATION_SYSTEM_PROMPT},
+        {"role": "user", "content": template},
+    ]
@@ -0,0 +1,316 @@
+"""Non-blocking chat completion client shared by the model services."""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from loguru import logger
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+
+from ...core.config import get_settings
+from .circuit_breaker import circuit_breakers
+from .hedging import hedger
+from .rate_limiter import Permit, ProviderLimiter, estimate_tokens, rate_limiters
+from .retry import RetryPolicy, is_retryable
+from .telemetry import telemetry
+from .usage_ledger import usage_counts, usage_ledger
+
+logger = logger.bind(service="provider_client")
+
+CLIENT_MODES = ("async", "thread")
+
+
+class ProviderClient:
+    """Wrap an OpenAI-compatible client so provider calls never block the event loop.
+
+    In ``async`` mode requests go through ``AsyncOpenAI`` and many calls can be in
+    flight on a single worker. ``thread`` mode keeps the synchronous ``OpenAI``
+    client and offloads each call to a dedicated thread pool, for environments
+    where the async transport misbehaves.
+
+    Each instance owns a keep-alive connection pool sized from the settings, so
+    it is meant to be long-lived and shared (see ``ModelFactory``). Every
+    attempt first waits for a permit from the provider's rate limiter, and
+    transient failures are retried by the client's ``RetryPolicy`` (the SDK's
+    own retries are disabled). Non-streaming calls may be hedged (see ``Hedger``).
+    The outcome of every attempt is reported to the provider's circuit breaker,
+    timed from when the request is sent, so waiting for a permit or a retry
+    backoff never makes a healthy provider look slow. The outcome of every call
+    is recorded in the model's telemetry, and its token usage in the usage ledger.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        provider: str = "default",
+        mode: Optional[str] = None,
+        timeout: Optional[float] = None,
+        thread_pool_size: Optional[int] = None,
+    ):
+        settings = get_settings()
+        self.mode = (mode or settings.model_client_mode).lower()
+        if self.mode not in CLIENT_MODES:
+            raise ValueError(f"Unsupported model client mode: {self.mode}")
+        self.base_url = base_url
+        self.provider = provider
+        self.breaker = circuit_breakers.get(provider)
+        self.retry_policy = RetryPolicy(
+            max_attempts=settings.model_retry_max_attempts,
+            base_delay=settings.model_retry_base_delay,
+            max_delay=settings.model_retry_max_delay,
+            deadline=settings.model_retry_deadline,
+        )
+        timeout = timeout or settings.model_request_timeout
+        limits = httpx.Limits(
+            max_connections=settings.model_max_connections,
+            max_keepalive_connections=settings.model_max_keepalive_connections,
+            keepalive_expiry=settings.model_keepalive_expiry,
+        )
+
+        if self.mode == "async":
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+            )
+            self._executor = None
+        else:
+            self._client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=0,
+                http_client=httpx.Client(limits=limits, timeout=timeout),
+            )
+            self._executor = ThreadPoolExecutor(
+                max_workers=thread_pool_size or settings.model_thread_pool_size,
+                thread_name_prefix="provider-client",
+            )
+        logger.debug(f"ProviderClient initialized in {self.mode} mode for {base_url}")
+
+    async def create_chat_completion(self, **kwargs: Any) -> Any:
+        """Create a chat completion without blocking the running event loop."""
+        model = kwargs.get("model", "")
+        return await hedger.run(
+            f"{self.provider}:{model}",
+            lambda: self._create_with_retry(**kwargs),
+            lambda: self._hedge(**kwargs),
+        )
+
+    def _record_cost(self, model: str, usage: Any) -> None:
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(usage)
+        if prompt_tokens is not None or completion_tokens is not None:
+            usage_ledger.record(model, prompt_tokens, completion_tokens, cached_tokens)
+
+    def _record_success(
+        self, model: str, latency: float, queue_wait: float, usage: Any, ttft: Optional[float] = None
+    ) -> None:
+        prompt_tokens, completion_tokens, cached_tokens = usage_counts(usage)
+        telemetry.record(
+            model,
+            latency,
+            queue_wait=queue_wait,
+            ttft=ttft,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+    def _record_failure(self, model: str, error: BaseException, sent: Dict[str, float]) -> None:
+        """Record a failed attempt in the telemetry and, if the provider is to blame, the circuit breaker."""
+        telemetry.record(
+            model,
+            time.monotonic() - sent.pop("at"),
+            outcome=type(error).__name__,
+            queue_wait=sent.get("queue_wait"),
+        )
+        # Only provider-side failures count; a malformed request says nothing about provider health
+        if is_retryable(error) or isinstance(error, asyncio.TimeoutError):
+            self.breaker.record(False)
+
+    async def _send(self, sent: Dict[str, float], **kwargs: Any) -> Any:
+        """Send one request and record its outcome, timed from when it is sent.
+
+        The outcome goes to the circuit breaker and, with the permit wait the
+        attempt put in ``sent["queue_wait"]``, to the telemetry of the model;
+        its usage goes to the usage ledger. Both are booked under the model
+        actually called, which for a hedged request may be the alternate model.
+        The telemetry and usage of a stream are recorded when it ends.
+        ``sent["at"]`` holds the send time, so a retry deadline that cuts the
+        request off can still be reported as a provider failure.
+        """
+        model = kwargs.get("model", "")
+        sent["at"] = time.monotonic()
+        try:
+            response = await self._create(**kwargs)
+        except Exception as e:
+            self._record_failure(model, e, sent)
+            raise
+        latency = time.monotonic() - sent["at"]
+        self.breaker.record(True, latency)
+        if not kwargs.get("stream"):
+            usage = getattr(response, "usage", None)
+            self._record_success(model, latency, sent["queue_wait"], usage)
+            self._record_cost(model, usage)
+        return response
+
+    async def _acquire(self, limiter: ProviderLimiter, estimate: float, sent: Dict[str, float]) -> Permit:
+        """Wait for a permit of a new attempt, recording the wait in ``sent``."""
+        sent.clear()
+        queued = time.monotonic()
+        permit = await limiter.acquire(estimate)
+        sent["queue_wait"] = time.monotonic() - queued
+        return permit
+
+    async def _with_retry(
+        self,
+        operation: Callable[[], Awaitable[Any]],
+        sent: Dict[str, float],
+        model: str,
+        description: str,
+    ) -> Any:
+        """Run the attempts of ``operation`` under the retry policy.
+
+        An attempt cut off by the retry deadline while its request was in flight
+        counts as a provider failure; one still waiting for a permit does not.
+        """
+        try:
+            return await self.retry_policy.call(operation, description)
+        except asyncio.TimeoutError as e:
+            if "at" in sent:
+                self._record_failure(model, e, sent)
+            raise
+
+    async def probe(self, model: str) -> None:
+        """Send a minimal completion to check that the provider answers."""
+        await self._create(
+            model=model,
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1,
+        )
+
+    async def _hedge(self, **kwargs: Any) -> Any:
+        """Send the backup request of a hedged call, to the alternate model if one is configured."""
+        alternate = get_settings().model_hedge_alternate_model
+        if not alternate:
+            return await self._create_with_retry(**kwargs)
+        # Lazy import to avoid a circular dependency with the model services
+        from .model_factory import ModelFactory
+        client = ModelFactory.create_model_service(alternate).client
+        return await client._create_with_retry(**{**kwargs, "model": alternate})
+
+    async def _create_with_retry(self, **kwargs: Any) -> Any:
+        model = kwargs.get("model", "")
+        limiter = rate_limiters.get(self.provider, model)
+        estimate = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        sent: Dict[str, float] = {}
+
+        async def attempt() -> Any:
+            permit = await self._acquire(limiter, estimate, sent)
+            tokens_used = None
+            throttled = False
+            try:
+                response = await self._send(sent, **kwargs)
+                usage = getattr(response, "usage", None)
+                tokens_used = getattr(usage, "total_tokens", None) or None
+                return response
+            except RateLimitError:
+                throttled = True
+                raise
+            finally:
+                limiter.release(permit, tokens_used=tokens_used, throttled=throttled)
+
+        return await self._with_retry(attempt, sent, model, f"{self.provider} chat completion")
+
+    async def stream_chat_completion(self, **kwargs: Any) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive.
+
+        Opening the stream is retried like any other call; a stream that fails
+        after the first delta is not.
+        """
+        kwargs["stream"] = True
+        # Ask for a final chunk carrying the token usage of the stream
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        model = kwargs.get("model", "")
+        limiter = rate_limiters.get(self.provider, model)
+        estimate = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        sent: Dict[str, float] = {}
+
+        async def open_stream() -> Tuple[Any, Any]:
+            permit = await self._acquire(limiter, estimate, sent)
+            try:
+                return permit, await self._send(sent, **kwargs)
+            except RateLimitError:
+                limiter.release(permit, throttled=True)
+                raise
+            except BaseException:
+                limiter.release(permit)
+                raise
+
+        permit, stream = await self._with_retry(open_stream, sent, model, f"{self.provider} chat completion stream")
+        started = sent["at"]
+        ttft = None
+        usage: list = []
+        try:
+            async for delta in self._iterate(stream, usage):
+                if ttft is None:
+                    ttft = time.monotonic() - started
+                yield delta
+        except Exception as e:
+            telemetry.record(
+                model,
+                time.monotonic() - started,
+                outcome=type(e).__name__,
+                queue_wait=sent["queue_wait"],
+                ttft=ttft,
+            )
+            raise
+        else:
+            report = usage[-1] if usage else None
+            self._record_success(model, time.monotonic() - started, sent["queue_wait"], report, ttft=ttft)
+            self._record_cost(model, report)
+        finally:
+            limiter.release(permit)
+
+    async def _create(self, **kwargs: Any) -> Any:
+        if self.mode == "async":
+            return await self._client.chat.completions.create(**kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self._client.chat.completions.create, **kwargs),
+        )
+
+    async def _iterate(self, stream: Any, usage: list) -> AsyncIterator[str]:
+        """Yield the content deltas of a stream, appending any usage report to ``usage``."""
+        if self.mode == "async":
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage.append(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks = iter(stream)
+        while True:
+            chunk = await loop.run_in_executor(self._executor, next, chunks, None)
+            if chunk is None:
+                break
+            if getattr(chunk, "usage", None) is not None:
+                usage.append(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self) -> None:
+        """Release the underlying HTTP connection pool and worker threads."""
+        if self.mode == "async":
+            await self._client.close()
+        else:
+            self._client.close()
+            self._executor.shutdown(wait=False)
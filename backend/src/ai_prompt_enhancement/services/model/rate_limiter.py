@@ -0,0 +1,222 @@
+"""Per-provider outbound request scheduling.
+
+Every provider call acquires a permit from the ``ProviderLimiter`` of its
+provider and model before it is sent. The limiter enforces requests-per-minute
+and tokens-per-minute budgets with token buckets, bounds the number of calls in
+flight with an AIMD (additive increase, multiplicative decrease) window, and
+admits waiting callers strictly in arrival order.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from ...core.config import Settings, get_settings
+
+logger = logger.bind(service="rate_limiter")
+
+
+class TokenBucket:
+    """A bucket refilled continuously at ``rate_per_minute`` up to ``capacity``."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Return how long to wait until ``amount`` tokens are available."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class Permit:
+    """A granted slot for one provider call."""
+
+    __slots__ = ("tokens", "started")
+
+    def __init__(self, tokens: float, started: float):
+        self.tokens = tokens
+        self.started = started
+
+
+class ProviderLimiter:
+    """Admit provider calls within RPM/TPM budgets and an adaptive concurrency window.
+
+    The window grows by roughly one slot per window's worth of successful calls
+    and is cut by ``decrease_factor`` when a call is throttled (HTTP 429) or
+    takes longer than ``latency_ratio`` times the smoothed latency. Only calls
+    started after the last cut can trigger another one, so a single burst of
+    429s shrinks the window once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        latency_ratio: float = 2.5,
+    ):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.window = float(min(max_concurrency, initial_concurrency or max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.latency_ratio = latency_ratio
+        self.in_flight = 0
+        self._queue: Deque[Tuple[asyncio.Future, float]] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._counters = {"admitted": 0, "queued": 0, "throttled": 0, "decreases": 0}
+
+    async def acquire(self, tokens: float) -> Permit:
+        """Wait for a slot and budget for a call estimated at ``tokens`` tokens."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._queue.append((waiter, tokens))
+        self._dispatch()
+        if not waiter.done():
+            self._counters["queued"] += 1
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the caller went away
+                self.release(waiter.result())
+            else:
+                self._queue = deque(item for item in self._queue if item[0] is not waiter)
+                self._dispatch()
+            raise
+
+    def release(self, permit: Permit, tokens_used: Optional[float] = None, throttled: bool = False) -> None:
+        """Return a slot, reconcile the token estimate and adapt the window."""
+        self.in_flight -= 1
+        if tokens_used is not None and tokens_used < permit.tokens:
+            self.tokens.refund(permit.tokens - tokens_used)
+        latency = time.monotonic() - permit.started
+
+        if throttled:
+            self._counters["throttled"] += 1
+            self._decrease(permit, "rate limited")
+        elif self._latency is not None and latency > self.latency_ratio * self._latency:
+            self._decrease(permit, f"latency {latency:.2f}s above {self._latency:.2f}s average")
+        else:
+            self.window = min(self.max_concurrency, self.window + 1.0 / self.window)
+        if not throttled:
+            self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+        self._dispatch()
+
+    def _decrease(self, permit: Permit, reason: str) -> None:
+        if permit.started < self._last_decrease:
+            return
+        self.window = max(self.min_concurrency, self.window * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self._counters["decreases"] += 1
+        logger.warning(f"{self.name}: concurrency window reduced to {self.window:.1f} ({reason})")
+
+    def _dispatch(self) -> None:
+        """Admit queued callers in order while slots and budget allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            waiter, tokens = self._queue[0]
+            if waiter.cancelled():
+                self._queue.popleft()
+                continue
+            if self.in_flight >= int(self.window):
+                return
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            self._queue.popleft()
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.in_flight += 1
+            self._counters["admitted"] += 1
+            waiter.set_result(Permit(tokens, now))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current window, queue depth, budgets and counters."""
+        now = time.monotonic()
+        self.requests.wait_time(0, now)
+        self.tokens.wait_time(0, now)
+        return {
+            "window": round(self.window, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._queue),
+            "requests_available": int(self.requests.tokens),
+            "tokens_available": int(self.tokens.tokens),
+            **self._counters,
+        }
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> float:
+    """Estimate the tokens a call may consume (about 4 characters per token plus the output cap)."""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars / 4 + (max_tokens or 0)
+
+
+class RateLimiterRegistry:
+    """Create and hold one ``ProviderLimiter`` per provider and model."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> ProviderLimiter:
+        """Return the limiter for the given provider and model."""
+        key = f"{provider}:{model}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    limits = self.settings.model_rate_limits.get(model, {})
+                    limiter = ProviderLimiter(
+                        name=key,
+                        rpm=limits.get("rpm", self.settings.model_default_rpm),
+                        tpm=limits.get("tpm", self.settings.model_default_tpm),
+                        max_concurrency=int(limits.get("max_concurrency", self.settings.model_max_concurrency)),
+                        min_concurrency=int(limits.get("min_concurrency", self.settings.model_min_concurrency)),
+                        initial_concurrency=int(limits.get("initial_concurrency", self.settings.model_initial_concurrency)),
+                        latency_ratio=limits.get("latency_ratio", self.settings.model_latency_ratio),
+                    )
+                    self._limiters[key] = limiter
+                    logger.info(f"Created rate limiter for {key}")
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the stats of every limiter keyed by provider and model."""
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
+
+
+# Create and export a global instance
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,96 @@
+"""Retry policy for provider calls."""
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+from openai import APIConnectionError, APIStatusError
+
+from .call_metadata import record_call_metadata
+
+logger = logger.bind(service="retry")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return whether a provider error is transient (timeouts, connection errors, 429 and 5xx)."""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Return the delay requested by the provider's Retry-After headers, in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retry transient provider errors with jittered exponential backoff.
+
+    Without a Retry-After hint the delay before attempt ``n + 1`` is drawn
+    uniformly from ``[0, min(max_delay, base_delay * 2 ** (n - 1))]`` ("full
+    jitter"); with one, the hint plus up to ``base_delay`` of jitter is used.
+    Attempts stop once ``max_attempts`` is reached or the next one could not
+    start before ``deadline`` seconds have passed since the first; each attempt
+    is also cut off at the deadline.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, deadline: float):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Return the delay before the attempt following ``attempt``."""
+        hint = retry_after(error)
+        if hint is not None:
+            return hint + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, operation: Callable[[], Awaitable[Any]], description: str = "provider call") -> Any:
+        """Run ``operation`` until it succeeds, fails permanently or runs out of time."""
+        started = time.monotonic()
+        record_call_metadata(provider_calls=1)
+        attempt = 0
+        while True:
+            attempt += 1
+            record_call_metadata(attempts=1)
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(operation(), timeout=remaining)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, e)
+                if time.monotonic() - started + delay >= self.deadline:
+                    logger.warning(f"{description}: giving up after {attempt} attempts, deadline reached")
+                    raise
+                record_call_metadata(retries=1)
+                logger.warning(
+                    f"{description}: attempt {attempt} failed ({type(e).__name__}: {str(e)}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
@@ -0,0 +1,187 @@
+"""In-memory telemetry of provider calls."""
+import bisect
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from ...core.config import Settings, get_settings
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, math.inf)
+
+# Error rate above which a model is reported as degraded
+DEGRADED_ERROR_RATE = 0.1
+
+
+class CallSample(NamedTuple):
+    """The outcome of one provider attempt.
+
+    ``latency`` runs from sending the request to its response; the time spent
+    waiting for a rate limiter permit before sending is ``queue_wait``.
+    """
+
+    finished: float
+    latency: float
+    ttft: Optional[float]
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    cached_tokens: int
+    outcome: str
+    queue_wait: Optional[float] = None
+
+
+def _percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    """Return the nearest-rank percentile of an already sorted list, or None when empty."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class ModelTelemetry:
+    """Recent call samples and a cumulative latency histogram of one model.
+
+    Samples older than ``window_seconds`` are dropped, so percentiles, RPM and
+    error rate always describe recent traffic. The histogram counts every call
+    since start-up.
+    """
+
+    def __init__(self, window_seconds: float, max_samples: int):
+        self.window_seconds = window_seconds
+        self._samples: Deque[CallSample] = deque(maxlen=max_samples)
+        self._histogram = [0] * len(LATENCY_BUCKETS)
+        self._outcomes: Dict[str, int] = {}
+
+    def record(self, sample: CallSample) -> None:
+        self._samples.append(sample)
+        self._histogram[bisect.bisect_left(LATENCY_BUCKETS, sample.latency)] += 1
+        self._outcomes[sample.outcome] = self._outcomes.get(sample.outcome, 0) + 1
+
+    def _prune(self, now: float) -> None:
+        while self._samples and now - self._samples[0].finished > self.window_seconds:
+            self._samples.popleft()
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return sliding-window aggregates of the recent calls."""
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        samples = list(self._samples)
+        latencies = sorted(sample.latency for sample in samples)
+        ttfts = sorted(sample.ttft for sample in samples if sample.ttft is not None)
+        queue_waits = sorted(sample.queue_wait for sample in samples if sample.queue_wait is not None)
+        errors = sum(1 for sample in samples if sample.outcome != "success")
+        prompt_tokens = sum(sample.prompt_tokens or 0 for sample in samples)
+        cached_tokens = sum(sample.cached_tokens for sample in samples)
+        return {
+            "calls": len(samples),
+            "requests_per_minute": sum(1 for sample in samples if now - sample.finished <= 60.0),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "latency_p50": _round(_percentile(latencies, 50)),
+            "latency_p95": _round(_percentile(latencies, 95)),
+            "latency_p99": _round(_percentile(latencies, 99)),
+            "ttft_p50": _round(_percentile(ttfts, 50)),
+            "ttft_p95": _round(_percentile(ttfts, 95)),
+            "queue_wait_p50": _round(_percentile(queue_waits, 50)),
+            "queue_wait_p95": _round(_percentile(queue_waits, 95)),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(sample.completion_tokens or 0 for sample in samples),
+            "cached_tokens": cached_tokens,
+            "prompt_cache_hit_rate": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+        }
+
+    def histogram(self) -> Dict[str, int]:
+        """Return the cumulative number of calls per latency bucket."""
+        return {
+            ("+Inf" if math.isinf(bound) else f"{bound:g}"): count
+            for bound, count in zip(LATENCY_BUCKETS, self._histogram)
+        }
+
+    def outcomes(self) -> Dict[str, int]:
+        """Return the cumulative number of calls per outcome."""
+        return dict(self._outcomes)
+
+
+class TelemetryRegistry:
+    """Record every provider call and aggregate it per model.
+
+    Recording is a few appends on the event loop, so reading the status of a
+    model never requires a request to its provider.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._models: Dict[str, ModelTelemetry] = {}
+
+    def _get(self, model: str) -> ModelTelemetry:
+        telemetry = self._models.get(model)
+        if telemetry is None:
+            telemetry = ModelTelemetry(
+                window_seconds=self.settings.telemetry_window_seconds,
+                max_samples=self.settings.telemetry_max_samples,
+            )
+            self._models[model] = telemetry
+        return telemetry
+
+    def record(
+        self,
+        model: str,
+        latency: float,
+        outcome: str = "success",
+        ttft: Optional[float] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        cached_tokens: int = 0,
+        queue_wait: Optional[float] = None,
+    ) -> None:
+        """Record one finished provider attempt; ``outcome`` is "success" or the error type."""
+        self._get(model).record(CallSample(
+            finished=time.monotonic(),
+            latency=latency,
+            ttft=ttft,
+            # Usage is optional in provider responses; ignore anything that is not a count
+            prompt_tokens=prompt_tokens if isinstance(prompt_tokens, int) else None,
+            completion_tokens=completion_tokens if isinstance(completion_tokens, int) else None,
+            cached_tokens=cached_tokens if isinstance(cached_tokens, int) else 0,
+            outcome=outcome,
+            queue_wait=queue_wait,
+        ))
+
+    def models(self) -> List[str]:
+        """Return the models that have been called."""
+        return list(self._models)
+
+    def status(self, model: str) -> Dict[str, Any]:
+        """Return the status of a model in the shape of the ``/models/status`` response."""
+        summary = self._get(model).summary()
+        if not summary["calls"]:
+            status = "idle"
+        elif summary["error_rate"] > DEGRADED_ERROR_RATE:
+            status = "degraded"
+        else:
+            status = "healthy"
+        return {
+            "name": model,
+            "status": status,
+            "latency": summary["latency_p50"] or 0.0,
+            **summary,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return window aggregates, latency histograms and outcome counts per model."""
+        return {
+            model: {
+                **telemetry.summary(),
+                "latency_histogram": telemetry.histogram(),
+                "outcomes": telemetry.outcomes(),
+            }
+            for model, telemetry in self._models.items()
+        }
+
+
+# Create and export a global instance
+telemetry = TelemetryRegistry()
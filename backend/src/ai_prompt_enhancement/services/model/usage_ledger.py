@@ -0,0 +1,245 @@
+"""Token usage and cost accounting of provider calls.
+
+``ProviderClient`` records the usage of every completion into the
+``UsageLedger``, which aggregates it per endpoint, model and day. The endpoint
+is taken from the request being served (see ``track_request``); calls made
+outside a request are booked under ``"internal"``.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from ...core.config import data_path, get_settings
+from .call_metadata import record_call_metadata
+
+logger = logger.bind(service="usage_ledger")
+
+# USD per million tokens; "cached_input" applies to prompt tokens served from the provider's prompt cache
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10},
+    "deepseek-reasoner": {"input": 0.55, "cached_input": 0.14, "output": 2.19},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4": {"input": 30.0, "cached_input": 30.0, "output": 60.0},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50},
+}
+
+GROUP_FIELDS = ("endpoint", "model", "day")
+
+_endpoint: ContextVar[Union[str, Callable[[], str]]] = ContextVar("usage_endpoint", default="internal")
+_request_usage: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_usage", default=None)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0}
+
+
+def usage_counts(usage: Any) -> Tuple[Optional[int], Optional[int], int]:
+    """Return prompt, completion and cached prompt tokens of a provider ``usage`` object.
+
+    OpenAI reports cached tokens in ``prompt_tokens_details.cached_tokens``,
+    DeepSeek in ``prompt_cache_hit_tokens``. Missing or non-numeric values are
+    treated as unknown.
+    """
+    def count(value: Any) -> Optional[int]:
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    prompt = count(getattr(usage, "prompt_tokens", None))
+    completion = count(getattr(usage, "completion_tokens", None))
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = count(getattr(details, "cached_tokens", None))
+    if cached is None:
+        cached = count(getattr(usage, "prompt_cache_hit_tokens", None))
+    return prompt, completion, cached or 0
+
+
+class UsageLedger:
+    """Aggregate token usage and cost per endpoint, model and day.
+
+    Totals live in memory and are written to ``path`` (when set) at most every
+    ``flush_seconds`` and on ``flush``. Writes run on a single background
+    thread, so recording a call never waits on disk.
+    """
+
+    def __init__(
+        self,
+        prices: Dict[str, Dict[str, float]],
+        path: Optional[str] = None,
+        flush_seconds: float = 60.0,
+    ):
+        self.prices = prices
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._dirty = False
+        self._flushed = time.monotonic()
+        self._unpriced: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usage-ledger")
+        self._load()
+
+    def price(self, model: str) -> Optional[Dict[str, float]]:
+        """Return the price of a model, matching dated snapshots (e.g. ``gpt-4o-mini-2024-07-18``) by prefix."""
+        if model in self.prices:
+            return self.prices[model]
+        matches = [name for name in self.prices if model.startswith(name)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """Return the USD cost of a call; unknown models cost 0 and are logged once."""
+        price = self.price(model)
+        if price is None:
+            if model not in self._unpriced:
+                self._unpriced.add(model)
+                logger.warning(f"No price configured for model {model}, booking its usage at no cost")
+            return 0.0
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        return (
+            (prompt_tokens - cached_tokens) * price["input"]
+            + cached_tokens * price.get("cached_input", price["input"])
+            + completion_tokens * price["output"]
+        ) / 1_000_000
+
+    @contextmanager
+    def track_request(self, endpoint: Union[str, Callable[[], str]]) -> Iterator[Dict[str, Any]]:
+        """Book calls made inside the block under ``endpoint`` and total them in the yielded dict.
+
+        ``endpoint`` may be a callable, resolved when a call is booked, for
+        endpoints only known once the request has been routed.
+        """
+        usage = _empty_totals()
+        endpoint_token = _endpoint.set(endpoint)
+        usage_token = _request_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            _request_usage.reset(usage_token)
+            _endpoint.reset(endpoint_token)
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        cached_tokens: int = 0,
+    ) -> float:
+        """Record the usage of one completion and return its cost."""
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        cost = self.cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        call = {
+            "calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": cost,
+        }
+
+        endpoint = _endpoint.get()
+        key = (endpoint() if callable(endpoint) else endpoint, model, date.today().isoformat())
+        entry = self._entries.setdefault(key, _empty_totals())
+        request_usage = _request_usage.get()
+        for field, value in call.items():
+            entry[field] += value
+            if request_usage is not None:
+                request_usage[field] += value
+        record_call_metadata(**{field: value for field, value in call.items() if field != "calls"})
+
+        self._dirty = True
+        if self.path and time.monotonic() - self._flushed > self.flush_seconds:
+            self._flush_in_background()
+        return cost
+
+    def query(
+        self,
+        group_by: List[str],
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return usage totals grouped by any of endpoint, model and day, most expensive first.
+
+        ``start`` and ``end`` are inclusive ISO dates.
+        """
+        invalid = [field for field in group_by if field not in GROUP_FIELDS]
+        if invalid:
+            raise ValueError(f"Cannot group usage by: {', '.join(invalid)}")
+
+        groups: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        total = _empty_totals()
+        for (entry_endpoint, entry_model, day), entry in self._entries.items():
+            if (start and day < start) or (end and day > end):
+                continue
+            if (endpoint and entry_endpoint != endpoint) or (model and entry_model != model):
+                continue
+            values = {"endpoint": entry_endpoint, "model": entry_model, "day": day}
+            group_key = tuple(values[field] for field in group_by)
+            row = groups.setdefault(group_key, {**{field: values[field] for field in group_by}, **_empty_totals()})
+            for field, value in entry.items():
+                row[field] += value
+                total[field] += value
+
+        rows = sorted(groups.values(), key=lambda row: (-row["cost_usd"], -row["prompt_tokens"]))
+        for row in [*rows, total]:
+            row["cost_usd"] = round(row["cost_usd"], 6)
+        return {"group_by": group_by, "rows": rows, "total": total}
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                for entry in json.load(f):
+                    key = (entry.pop("endpoint"), entry.pop("model"), entry.pop("day"))
+                    self._entries[key] = {**_empty_totals(), **entry}
+            logger.info(f"Loaded {len(self._entries)} usage ledger entries from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading usage ledger from {self.path}: {str(e)}")
+
+    def _snapshot(self) -> Optional[List[Dict[str, Any]]]:
+        """Return the entries to write, or None if nothing changed since the last flush."""
+        self._flushed = time.monotonic()
+        if not self.path or not self._dirty:
+            return None
+        self._dirty = False
+        return [
+            {"endpoint": endpoint, "model": model, "day": day, **totals}
+            for (endpoint, model, day), totals in self._entries.items()
+        ]
+
+    def _write(self, entries: Optional[List[Dict[str, Any]]]) -> None:
+        if entries is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Error saving usage ledger to {self.path}: {str(e)}")
+
+    def _flush_in_background(self) -> None:
+        entries = self._snapshot()
+        if entries is not None:
+            self._executor.submit(self._write, entries)
+
+    def flush(self) -> None:
+        """Write the ledger to disk if it changed since the last flush, and wait for any write in progress."""
+        self._executor.submit(self._write, self._snapshot()).result()
+
+
+# Create and export a global instance
+_settings = get_settings()
+usage_ledger = UsageLedger(
+    prices={**DEFAULT_PRICES, **_settings.model_prices},
+    path=data_path(_settings.usage_ledger_path),
+    flush_seconds=_settings.usage_ledger_flush_seconds,
+)
@@ -0,0 +1,179 @@
+"""Word-level diff of an original and an enhanced prompt, rendered as highlighted HTML.
+
+Prompts are split into word and punctuation tokens and aligned with
+``difflib.SequenceMatcher``. Runs of at least ``MIN_MOVE_TOKENS`` tokens that
+were deleted in one place and inserted in another are reported as moved
+rather than as a deletion plus an insertion. The HTML keeps the original
+whitespace and uses the styles the UI renders:
+
+- added content: bold green (in the enhanced prompt)
+- reworded content: italic purple (in the enhanced prompt)
+- moved content: underlined blue (in both prompts)
+- removed or reworded content: struck-through red (in the original prompt)
+"""
+import heapq
+import html
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+EQUAL = "equal"
+INSERTED = "inserted"
+REPLACED = "replaced"
+REMOVED = "removed"
+MOVED = "moved"
+
+STYLES = {
+    INSERTED: "color:green; font-weight:bold",
+    REPLACED: "color:purple; font-style:italic",
+    MOVED: "color:blue; text-decoration:underline",
+    REMOVED: "color:red; text-decoration:line-through",
+}
+
+MIN_MOVE_TOKENS = 3
+# Upper bound on the candidate moved runs looked at in one diff
+MAX_MOVE_CANDIDATES = 100_000
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+Span = Tuple[int, int]
+
+
+class PromptDiff(NamedTuple):
+    """Highlighted HTML of both prompts and the number of tokens per change type."""
+    original_html: str
+    enhanced_html: str
+    inserted: int
+    replaced: int
+    removed: int
+    moved: int
+
+
+def _tokenize(text: str) -> Tuple[List[str], List[Span]]:
+    matches = list(_TOKEN.finditer(text))
+    return [match.group() for match in matches], [match.span() for match in matches]
+
+
+def _detect_moves(original: List[str], enhanced: List[str],
+                  original_labels: List[str], enhanced_labels: List[str]) -> None:
+    """Relabel runs that were removed from the original and added to the enhanced prompt as moved.
+
+    Candidate runs are found once, by indexing the ``MIN_MOVE_TOKENS``-grams of
+    the added content and extending every hit of a removed n-gram into a
+    maximal common run. Runs are then taken longest first; a run that overlaps
+    one already taken is cut down to its longest free part and queued again.
+    At most ``MAX_MOVE_CANDIDATES`` runs are considered, which keeps very long
+    or repetitive prompts cheap to diff.
+    """
+    size = MIN_MOVE_TOKENS
+    removed = [label == REMOVED for label in original_labels]
+    added = [label in (INSERTED, REPLACED) for label in enhanced_labels]
+
+    def grams(tokens: List[str], changed: List[bool]) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        streak = 0
+        for index, flag in enumerate(changed):
+            streak = streak + 1 if flag else 0
+            if streak >= size:
+                yield index - size + 1, tuple(tokens[index - size + 1:index + 1])
+
+    index: Dict[Tuple[str, ...], List[int]] = {}
+    for b, gram in grams(enhanced, added):
+        index.setdefault(gram, []).append(b)
+
+    # Every (a, b) where a removed and an added n-gram are equal; runs of them along a diagonal form one match
+    hits = set()
+    for a, gram in grams(original, removed):
+        for b in index.get(gram, ()):
+            hits.add((a, b))
+            if len(hits) >= MAX_MOVE_CANDIDATES:
+                break
+        else:
+            continue
+        break
+
+    candidates = []
+    for a, b in hits:
+        if (a - 1, b - 1) in hits:
+            continue
+        length = 0
+        while (a + length, b + length) in hits:
+            length += 1
+        candidates.append((-(length + size - 1), a, b))
+    heapq.heapify(candidates)
+
+    while candidates:
+        length, a, b = heapq.heappop(candidates)
+        length = -length
+        # Longest stretch of the run whose tokens are still free in both prompts
+        best_start, best_length, start = 0, 0, 0
+        for offset in range(length + 1):
+            if offset == length or not (removed[a + offset] and added[b + offset]):
+                if offset - start > best_length:
+                    best_start, best_length = start, offset - start
+                start = offset + 1
+        if best_length < size:
+            continue
+        if best_length < length:
+            heapq.heappush(candidates, (-best_length, a + best_start, b + best_start))
+            continue
+        original_labels[a:a + length] = [MOVED] * length
+        enhanced_labels[b:b + length] = [MOVED] * length
+        removed[a:a + length] = [False] * length
+        added[b:b + length] = [False] * length
+
+
+def _render(text: str, spans: List[Span], labels: List[str]) -> str:
+    """Wrap runs of equally labelled tokens in styled spans, keeping the text between them."""
+    parts, position, index = [], 0, 0
+    while index < len(spans):
+        label = labels[index]
+        end = index
+        while end + 1 < len(spans) and labels[end + 1] == label:
+            end += 1
+        start_char, end_char = spans[index][0], spans[end][1]
+        parts.append(html.escape(text[position:start_char], quote=False))
+        chunk = html.escape(text[start_char:end_char], quote=False)
+        parts.append(chunk if label == EQUAL else f"<span style='{STYLES[label]}'>{chunk}</span>")
+        position, index = end_char, end + 1
+    parts.append(html.escape(text[position:], quote=False))
+    return "".join(parts)
+
+
+def diff_prompts(original: str, enhanced: str) -> PromptDiff:
+    """Diff two prompts word by word and render both with highlighted changes."""
+    original_tokens, original_spans = _tokenize(original or "")
+    enhanced_tokens, enhanced_spans = _tokenize(enhanced or "")
+    original_labels = [EQUAL] * len(original_tokens)
+    enhanced_labels = [EQUAL] * len(enhanced_tokens)
+
+    matcher = SequenceMatcher(None, original_tokens, enhanced_tokens, autojunk=False)
+    for tag, a_start, a_end, b_start, b_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        original_labels[a_start:a_end] = [REMOVED] * (a_end - a_start)
+        enhanced_labels[b_start:b_end] = [INSERTED if tag == "insert" else REPLACED] * (b_end - b_start)
+
+    _detect_moves(original_tokens, enhanced_tokens, original_labels, enhanced_labels)
+
+    return PromptDiff(
+        original_html=_render(original or "", original_spans, original_labels),
+        enhanced_html=_render(enhanced or "", enhanced_spans, enhanced_labels),
+        inserted=enhanced_labels.count(INSERTED),
+        replaced=enhanced_labels.count(REPLACED),
+        removed=original_labels.count(REMOVED),
+        moved=enhanced_labels.count(MOVED),
+    )
+
+
+def highlight_comparison(comparison: Dict[str, Any]) -> Dict[str, Any]:
+    """Set the ``highlighted_prompt`` of both versions of a comparison result from a local diff."""
+    original: Optional[Dict[str, Any]] = comparison.get("original_prompt")
+    enhanced: Optional[Dict[str, Any]] = comparison.get("enhanced_prompt")
+    if not isinstance(original, dict) or not isinstance(enhanced, dict):
+        return comparison
+    diff = diff_prompts(str(original.get("prompt") or ""), str(enhanced.get("prompt") or ""))
+    original["highlighted_prompt"] = diff.original_html
+    enhanced["highlighted_prompt"] = diff.enhanced_html
+    # Drop the HTML older comparison templates asked the model for
+    enhanced.pop("highlighted prompt", None)
+    return comparison
@@ -2,13 +2,13 @@
 Templates for AI prompt analysis and comparison.
 """
 
+# The templates contain no placeholders: they are sent verbatim as the leading
+# system message so that providers can serve them from their prompt cache. The
+# request-specific input follows in the user message (see ANALYSIS_INPUT_TEMPLATE).
+
 ANALYSIS_TEMPLATE = """**Enhance and evaluate prompts by improving clarity, structure, and output specifications while rigorously assessing quality metrics.**  
 Given a task description or existing prompt, produce an enhanced system prompt and evaluate its quality using defined metrics.  
-# Input  
-**Original Prompt:**  
-{prompt}  
-**Context (if provided):**  
-{context}  
+The original prompt and any context are provided in the user message.  
 # Guidelines  
 - **Task Understanding**: Identify objectives, requirements, constraints, and expected output.  
 - **Minimal Changes**: For simple prompts, optimize directly. For complex prompts, enhance clarity without altering core structure.  
@@ -26,38 +26,38 @@ Given a task description or existing prompt, produce an enhanced system prompt a
   - Default to JSON for structured outputs. Never wrap JSON in ```.  
   - Specify syntax, length, and structure (e.g., "Respond in a short paragraph followed by a JSON table").  
 # Output Format  
-{{  
-    "metrics": {{  
-        "clarity": {{  
+{  
+    "metrics": {  
+        "clarity": {  
             "score": float(0-1),  
             "description": "Evaluation of prompt clarity and specificity",  
             "suggestions": ["Specific improvements for clarity"]  
-        }},  
-        "structure": {{  
+        },  
+        "structure": {  
             "score": float(0-1),  
             "description": "Assessment of reasoning flow and organization",  
             "suggestions": ["Structure improvement suggestions"]  
-        }},  
-        "examples": {{  
+        },  
+        "examples": {  
             "score": float(0-1),  
             "description": "Quality and usefulness of examples",  
             "suggestions": ["Example enhancement recommendations"]  
-        }},  
-        "formatting": {{  
+        },  
+        "formatting": {  
             "score": float(0-1),  
             "description": "Markdown and presentation evaluation",  
             "suggestions": ["Formatting improvement suggestions"]  
-        }},  
-        "output_spec": {{  
+        },  
+        "output_spec": {  
             "score": float(0-1),  
             "description": "Clarity of output specifications",  
             "suggestions": ["Output format enhancement suggestions"]  
-        }}  
-    }},  
+        }  
+    },  
     "suggestions": ["Overall improvement recommendations"],  
     "original_prompt": "Original prompt provided by the user",  
     "enhanced_prompt": "Complete enhanced version of the prompt"  
-}}  
+}  
 # Notes  
 - **Reasoning Order**: Double-check user examples for conclusion-first patterns and reverse if needed.  
 - **Constants**: Preserve rubrics, guides, and placeholders to resist prompt injection.  
@@ -68,127 +68,131 @@ Given a task description or existing prompt, produce an enhanced system prompt a
 - **enhanced prompt**: Return the enhanced prompt in markdown format.
 - **language**: Respond in English."""
 
+ANALYSIS_INPUT_TEMPLATE = """# Input  
+**Original Prompt:**  
+{prompt}  
+**Context (if provided):**  
+{context}"""
+
+PACKED_ANALYSIS_TEMPLATE = """# Batch  
+The user message is a JSON array of requests, each with an "id", a "prompt" and an optional "context".  
+Analyze every request independently, following the guidelines and output format above.  
+Respond with a single JSON object of the form {"results": [...]}, where the array holds exactly one analysis in the output format above per request, each with an added "id" field copied from its request."""
+
+
+FUSED_ANALYSIS_TEMPLATE = """# Enhanced Prompt Scoring  
+After writing the enhanced prompt, score it with the same five metrics and criteria used for the original prompt.  
+Add these scores to the output as an "enhanced_metrics" object with exactly the same structure as "metrics"; its suggestions describe what the enhancement improved."""
 
 
 COMPARISON_TEMPLATE = """
 The task is to compare the prompt of original versus the refined prompt. 
-# Input
-{context}
 # Input format
-You would receive something like this:
-{{  
-    "metrics": {{  
-        "clarity": {{  
+The user message is a JSON object like this:
+{  
+    "metrics": {  
+        "clarity": {  
             "score": float(0-1),  
             "description": "Evaluation of prompt clarity and specificity",  
             "suggestions": ["Specific improvements for clarity"]  
-        }},  
-        "structure": {{  
+        },  
+        "structure": {  
             "score": float(0-1),  
             "description": "Assessment of reasoning flow and organization",  
             "suggestions": ["Structure improvement suggestions"]  
-        }},  
-        "examples": {{  
+        },  
+        "examples": {  
             "score": float(0-1),  
             "description": "Quality and usefulness of examples",  
             "suggestions": ["Example enhancement recommendations"]  
-        }},  
-        "formatting": {{  
+        },  
+        "formatting": {  
             "score": float(0-1),  
             "description": "Markdown and presentation evaluation",  
             "suggestions": ["Formatting improvement suggestions"]  
-        }},  
-        "output_spec": {{  
+        },  
+        "output_spec": {  
             "score": float(0-1),  
             "description": "Clarity of output specifications",  
             "suggestions": ["Output format enhancement suggestions"]  
-        }}  
-    }},  
+        }  
+    },  
     "suggestions": ["Overall improvement recommendations"],  
     "original_prompt": "Original prompt provided by the user",  
     "enhanced_prompt": "Complete enhanced version of the prompt"  
-}}  
+}  
 # Output format
-{{
-  "original_prompt": {{
+{
+  "original_prompt": {
     "prompt": "Original prompt provided by the user",
-    "metrics": {{
-      "clarity": {{
+    "metrics": {
+      "clarity": {
         "score": float(0-1),
         "description": "Evaluation of prompt clarity and specificity",
         "suggestions": ["Specific improvements for clarity"]
-      }},
-      "structure": {{
+      },
+      "structure": {
         "score": float(0-1),
         "description": "Assessment of reasoning flow and organization",
         "suggestions": ["Structure improvement suggestions"]
-      }},
-      "examples": {{
+      },
+      "examples": {
         "score": float(0-1),
         "description": "Quality and usefulness of examples",
         "suggestions": ["Example enhancement recommendations"]
-      }},
-      "formatting": {{
+      },
+      "formatting": {
         "score": float(0-1),
         "description": "Markdown and presentation evaluation",
         "suggestions": ["Formatting improvement suggestions"]
-      }},
-      "output_spec": {{
+      },
+      "output_spec": {
         "score": float(0-1),
         "description": "Clarity of output specifications",
         "suggestions": ["Output format enhancement suggestions"]
-      }}
-    }},
+      }
+    },
     "suggestions": ["Overall improvement recommendations"]
-  }},
-  "enhanced_prompt": {{
-    "prompt": "Complete enhanced version of the prompt, which contains innovative content and polished content.",
-    "highlighted prompt": "Complete enhanced version of the prompt, which contains <span style='color:green; font-weight:bold'>innovative content</span> and <span style='color:purple; font-style:italic'>polished content</span>."
-    "metrics": {{
-      "clarity": {{
+  },
+  "enhanced_prompt": {
+    "prompt": "Complete enhanced version of the prompt",
+    "metrics": {
+      "clarity": {
         "score": float(0-1),
         "description": "Evaluation of prompt clarity and specificity",
         "suggestions": ["Clarity has been improved with more specific details"]
-      }},
-      "structure": {{
+      },
+      "structure": {
         "score": float(0-1),
         "description": "Assessment of reasoning flow and organization",
         "suggestions": ["The flow has been reorganized for better logical progression"]
-      }},
-      "examples": {{
+      },
+      "examples": {
         "score": float(0-1),
         "description": "Quality and usefulness of examples",
         "suggestions": ["More relevant examples have been added to illustrate the points"]
-      }},
-      "formatting": {{
+      },
+      "formatting": {
         "score": float(0-1),
         "description": "Markdown and presentation evaluation",
         "suggestions": ["Markdown formatting has been improved for better readability"]
-      }},
-      "output_spec": {{
+      },
+      "output_spec": {
         "score": float(0-1),
         "description": "Clarity of output specifications",
         "suggestions": ["The expected output format has been clarified"]
-      }}
-    }},
+      }
+    },
     "suggestions": ["Overall improvement recommendations"],
-  }},
+  },
   "model_used": "DeepSeek Coder"
-}}
+}
 # Task
 1. Generate identical metrics for enhanced prompt. 
 2. For the output, generate a strict json contains 2 value, 
     first is original prompt, contains the original prompt, its metrics and suggestions. 
-    Next is enhanced prompt, contains enhanced prompt, highlighted prompt, its metrics and a value called highlighted prompt.
-3. in the highlighted prompt, generate the text in html format. 
-    Compares the original prompt and the enhanced prompt. 
-    The output should based on enhanced prompt. 
-    For those contents that are innovative or not shown in original prompt, 
-    highlight it using bold and green color in html. 
-    For those contents that are polished which is either more accurate, or refined, 
-    highlight it using italic and purple color in html. 
+    Next is enhanced prompt, contains enhanced prompt, its metrics and suggestions.
 
 # note
 always return json only.
-Please generate the highlighted prompt using the rule and return the html format.
 """ 
\ No newline at end of file
@@ -1,10 +1,11 @@
 from typing import Dict, Optional, List, Union
 from loguru import logger
 from .analyzers import analyze_prompt_metrics
-from .prompt_templates import ANALYSIS_TEMPLATE, COMPARISON_TEMPLATE
 from ..model.model_factory import ModelFactory
+from ..model.prompt_messages import ANALYSIS_VERSION, COMPARISON_VERSION
 from ...core.config import get_settings
 from ..core.storage_service import StorageService
+from ..core.result_cache import result_cache
 from fastapi import Depends
 import re
 
@@ -33,19 +34,27 @@ class RefinementService:
         logger.debug(f"Cleaned text: '{cleaned}'")
         return cleaned
 
-    async def analyze_prompt(self, prompt: str, model: str, context: Optional[str] = None) -> Dict:
+    async def analyze_prompt(self, prompt: str, model: str, context: Optional[str] = None,
+                             force_refresh: bool = False) -> Dict:
         """Analyze a prompt using the specified model."""
         try:
             logger.info(f"Analyzing prompt using model: {model}")
             
-            # Get appropriate model service
-            model_service = self.model_factory.create_model_service(model)
-            
-            # Perform analysis
-            result = await model_service.analyze_prompt(prompt, context)
+            # Serve identical requests from the result cache
+            cache_key = result_cache.make_key("analyze", model, ANALYSIS_VERSION, prompt, context)
+            result = None if force_refresh else result_cache.get("analyze", cache_key)
+            served_model = model
+            if result is None:
+                # Get appropriate model service (the fallback model's while the provider's circuit is open)
+                served_model, model_service = self.model_factory.resolve_model_service(model)
+
+                # Perform analysis
+                result = await model_service.analyze_prompt(prompt, context)
+                if "error" not in result and served_model == model:
+                    result_cache.set(cache_key, result)
             
             # Add model information and original prompt
-            result["model_used"] = model
+            result["model_used"] = served_model
             result["original_prompt"] = prompt
             
             # Save the analysis result
@@ -61,16 +70,26 @@ class RefinementService:
             logger.error(f"Error in analyze_prompt: {str(e)}")
             raise
 
-    async def compare_prompts(self, original_prompt: str, enhanced_prompt: str, context: Optional[Dict] = None) -> Dict:
+    async def compare_prompts(self, original_prompt: str, enhanced_prompt: str, context: Optional[Dict] = None,
+                              force_refresh: bool = False) -> Dict:
         """Compare original and enhanced prompts."""
         try:
             logger.info("Starting prompt comparison")
             
             # Use the model specified in context, or default to deepseek
             model_name = context.get("model", "deepseek-chat") if context else "deepseek-chat"
-            model_service = self.model_factory.create_model_service(model_name)
-            
-            return await model_service.compare_prompts(original_prompt, enhanced_prompt, context)
+
+            # Serve identical comparisons from the result cache
+            cache_key = result_cache.make_key(
+                "compare", model_name, COMPARISON_VERSION, original_prompt, enhanced_prompt, context
+            )
+            result = None if force_refresh else result_cache.get("compare", cache_key)
+            if result is None:
+                served_model, model_service = self.model_factory.resolve_model_service(model_name)
+                result = await model_service.compare_prompts(original_prompt, enhanced_prompt, context)
+                if "error" not in result and served_model == model_name:
+                    result_cache.set(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error in compare_prompts: {str(e)}")
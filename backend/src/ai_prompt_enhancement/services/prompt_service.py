@@ -1,16 +1,26 @@
-from typing import Dict, List, Optional, Union, Any
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union, Any
 from fastapi import HTTPException, Depends
+from pydantic import BaseModel
 from loguru import logger
 from ..schemas.prompt import (
     PromptAnalyzeRequest,
     PromptAnalysisResponse,
     PromptComparisonRequest,
     PromptComparisonResponse,
+    PromptAnalyzeCompareResponse,
     AnalysisMetric,
     ModelType
 )
+from ..core.config import get_settings
 from .model.model_factory import ModelFactory
+from .model.circuit_breaker import ProviderUnavailableError
+from .model.json_parser import IncrementalJSONParser
+from .model.micro_batcher import micro_batcher
 from .core.storage_service import StorageService
+from .core.result_cache import result_cache
+from .model.prompt_messages import ANALYSIS_VERSION, COMPARISON_VERSION, FUSED_VERSION
+from .prompt_refinement.prompt_diff import highlight_comparison
 import json
 
 class PromptService:
@@ -18,54 +28,211 @@ class PromptService:
         self.model_factory = ModelFactory()
         self.storage_service = storage_service
     
+    @staticmethod
+    def _parse_analyze_request(request: Union[PromptAnalyzeRequest, Dict[str, Any]]) -> Tuple[str, str, Optional[str]]:
+        """Extract prompt text, model and context from either request format."""
+        # Handle both request types
+        if isinstance(request, dict):
+            prompt_text = request.get("prompt_text") or request.get("prompt")
+            preferences = request.get("preferences", {})
+            model = preferences.get("model") if preferences else request.get("model")
+            context = request.get("context")
+        else:
+            prompt_text = request.prompt_text
+            model = request.preferences.model
+            context = request.context
+
+        if not prompt_text:
+            raise ValueError("Prompt text is required")
+        if not model:
+            raise ValueError("Model specification is required")
+        return prompt_text, model, context
+
+    @staticmethod
+    def _force_refresh(request: Union[BaseModel, Dict[str, Any]]) -> bool:
+        """Return whether the request asks to bypass the result cache."""
+        if isinstance(request, dict):
+            return bool(request.get("force_refresh", False))
+        return bool(getattr(request, "force_refresh", False))
+
+    async def _analyze(self, request: Union[PromptAnalyzeRequest, Dict[str, Any]]) -> Dict:
+        """Analyze a prompt, served from the result cache when possible, without saving history."""
+        prompt_text, model, context = self._parse_analyze_request(request)
+
+        logger.info(f"Analyzing prompt with model: {model}")
+        logger.debug(f"Full analyze request: {prompt_text}")
+
+        # Serve identical requests from the result cache
+        cache_key = result_cache.make_key("analyze", model, ANALYSIS_VERSION, prompt_text, context)
+        result = None if self._force_refresh(request) else result_cache.get("analyze", cache_key)
+        served_model = model
+        if result is None:
+            # Get model service (the fallback model's while the provider's circuit is open)
+            served_model, model_service = self.model_factory.resolve_model_service(model)
+
+            # Perform analysis, packed with concurrent requests when micro-batching is on
+            result = await micro_batcher.analyze(model_service, prompt_text, context)
+            if "error" not in result and served_model == model:
+                result_cache.set(cache_key, result)
+        logger.debug(f"Analysis result: {json.dumps(result, indent=2)}")
+
+        # Add required fields
+        result['original_prompt'] = prompt_text
+        result['model_used'] = served_model
+        return result
+
     async def analyze_prompt(self, request: Union[PromptAnalyzeRequest, Dict[str, Any]]) -> PromptAnalysisResponse:
         """
         Analyze a prompt using the specified model.
         Handles both PromptAnalyzeRequest and direct dictionary inputs.
         """
         try:
-            # Handle both request types
-            if isinstance(request, dict):
-                prompt_text = request.get("prompt_text") or request.get("prompt")
-                preferences = request.get("preferences", {})
-                model = preferences.get("model") if preferences else request.get("model")
-                context = request.get("context")
-            else:
-                prompt_text = request.prompt_text
-                model = request.preferences.model
-                context = request.context
-
-            if not prompt_text:
-                raise ValueError("Prompt text is required")
-            if not model:
-                raise ValueError("Model specification is required")
-
-            logger.info(f"Analyzing prompt with model: {model}")
-            logger.debug(f"Full analyze request: {prompt_text}")
-            
-            # Get model service
-            model_service = self.model_factory.create_model_service(model)
-            
-            # Perform analysis
-            result = await model_service.analyze_prompt(
-                prompt_text,
-                context
-            )
-            logger.debug(f"Analysis result: {json.dumps(result, indent=2)}")
-            
-            # Add required fields
-            result['original_prompt'] = prompt_text
-            result['model_used'] = model
-            
+            result = await self._analyze(request)
+
             # Save the analysis result
             self.storage_service.save_analysis_history(result)
             
             # Return response without duplicate model_used
             return PromptAnalysisResponse(**result)
+        except ProviderUnavailableError as e:
+            logger.error(f"Prompt analysis rejected: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             logger.exception("Error during prompt analysis")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @staticmethod
+    def _bulk_concurrency(concurrency: Optional[int]) -> int:
+        """Return the number of bulk items to run at once, capped by the settings."""
+        settings = get_settings()
+        return max(1, min(concurrency or settings.bulk_concurrency, settings.bulk_max_concurrency))
+
+    async def analyze_prompts_batch(
+        self, requests: List[Union[PromptAnalyzeRequest, Dict[str, Any]]], concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze many prompts with bounded concurrency.
+        Yields {"index", "result"} or {"index", "error"} per prompt in completion
+        order, and saves the successful analyses as a single history record.
+        """
+        semaphore = asyncio.Semaphore(self._bulk_concurrency(concurrency))
+
+        async def run(index: int, request: Union[PromptAnalyzeRequest, Dict[str, Any]]) -> Tuple[int, Optional[Dict], Optional[str]]:
+            async with semaphore:
+                try:
+                    result = await self._analyze(request)
+                    if "error" in result:
+                        return index, None, result["error"]
+                    PromptAnalysisResponse(**result)
+                    return index, result, None
+                except Exception as e:
+                    logger.error(f"Bulk analysis of prompt {index} failed: {str(e)}")
+                    return index, None, str(e)
+
+        logger.info(f"Analyzing {len(requests)} prompts in bulk")
+        tasks = [asyncio.ensure_future(run(index, request)) for index, request in enumerate(requests)]
+        history = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result, error = await next_done
+                if error is not None:
+                    yield {"index": index, "error": error}
+                    continue
+                history.append(result)
+                yield {"index": index, "result": PromptAnalysisResponse(**result).model_dump(mode="json")}
+        finally:
+            # Stop outstanding work if the client went away, and keep what completed
+            for task in tasks:
+                task.cancel()
+            if history:
+                self.storage_service.save_analysis_history_batch(history)
+
+    async def analyze_prompt_stream(
+        self, request: Union[PromptAnalyzeRequest, Dict[str, Any]]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a prompt analysis as (event, data) pairs.
+        Emits "token" for every provider delta, "metric" as soon as each metric
+        object is complete, and a final "result" with the full analysis response.
+        """
+        prompt_text, model, context = self._parse_analyze_request(request)
+        logger.info(f"Streaming prompt analysis with model: {model}")
+
+        cache_key = result_cache.make_key("analyze", model, ANALYSIS_VERSION, prompt_text, context)
+        result = None if self._force_refresh(request) else result_cache.get("analyze", cache_key)
+        served_model = model
+        if result is not None:
+            # Replay a cached analysis as metric events without streaming tokens
+            for name, metric in result.get("metrics", {}).items():
+                yield "metric", {"name": name, "metric": metric}
+        else:
+            served_model, model_service = self.model_factory.resolve_model_service(model)
+            parser = IncrementalJSONParser(watch=[("metrics", "*")])
+
+            async for event, data in model_service.analyze_prompt_stream(prompt_text, context):
+                if event == "token":
+                    yield "token", {"text": data}
+                    for path, metric in parser.feed(data):
+                        yield "metric", {"name": path[-1], "metric": metric}
+                else:
+                    result = data
+            if "error" not in result and served_model == model:
+                result_cache.set(cache_key, result)
+
+        result['original_prompt'] = prompt_text
+        result['model_used'] = served_model
+        self.storage_service.save_analysis_history(result)
+        yield "result", PromptAnalysisResponse(**result).model_dump(mode="json")
+
+    @staticmethod
+    def _parse_compare_request(request: Union[str, Dict, Any]) -> Tuple[Dict[str, Any], str, str, Optional[Dict], str]:
+        """Extract request data, both prompts, context and model from a comparison request."""
+        # Convert request to dict if it's a Pydantic model
+        if hasattr(request, 'dict'):
+            request_data = request.dict()
+        else:
+            request_data = request
+
+        # Extract analysis result if it exists
+        if 'analysis_result' in request_data:
+            analysis_result = request_data['analysis_result']
+        else:
+            analysis_result = request_data
+
+        # Extract the required fields
+        original_prompt = analysis_result.get('original_prompt')
+        enhanced_prompt = analysis_result.get('enhanced_prompt')
+        context = analysis_result.get('context')
+
+        if not original_prompt or not enhanced_prompt:
+            raise ValueError("Both original_prompt and enhanced_prompt are required")
+
+        # Get the model from context or use default
+        model_name = context.get('model') if context else 'gpt-4o-mini'
+        return request_data, original_prompt, enhanced_prompt, context, model_name
+
+    async def _compare(self, request: Union[str, Dict, Any]) -> Dict:
+        """Compare prompts, served from the result cache when possible, without saving history."""
+        request_data, original_prompt, enhanced_prompt, context, model_name = self._parse_compare_request(request)
+
+        # Serve identical comparisons from the result cache
+        cache_key = result_cache.make_key(
+            "compare", model_name, COMPARISON_VERSION, original_prompt, enhanced_prompt, context
+        )
+        result = None if self._force_refresh(request_data) else result_cache.get("compare", cache_key)
+        if result is None:
+            served_model, model_service = self.model_factory.resolve_model_service(model_name)
+
+            # Process the request and get the comparison result
+            result = await model_service.compare_prompts(
+                original_prompt=original_prompt,
+                enhanced_prompt=enhanced_prompt,
+                context=context
+            )
+            if "error" not in result and served_model == model_name:
+                result_cache.set(cache_key, result)
+        return result
+
     async def compare_prompts(self, request: Union[str, Dict, Any]) -> Dict:
         """
         Compare prompts based on analysis result. Accepts either a string or dictionary input.
@@ -79,46 +246,172 @@ class PromptService:
         logger.info("Processing comparison request")
         
         try:
-            # Convert request to dict if it's a Pydantic model
-            if hasattr(request, 'dict'):
-                request_data = request.dict()
-            else:
-                request_data = request
-            
-            # Extract analysis result if it exists
-            if 'analysis_result' in request_data:
-                analysis_result = request_data['analysis_result']
-            else:
-                analysis_result = request_data
-            
-            # Extract the required fields
-            original_prompt = analysis_result.get('original_prompt')
-            enhanced_prompt = analysis_result.get('enhanced_prompt')
-            context = analysis_result.get('context')
-            
-            if not original_prompt or not enhanced_prompt:
-                raise ValueError("Both original_prompt and enhanced_prompt are required")
-            
-            # Get the model from context or use default
-            model_name = context.get('model') if context else 'gpt-4o-mini'
-            model_service = self.model_factory.create_model_service(model_name)
-            
-            # Process the request and get the comparison result
-            result = await model_service.compare_prompts(
-                original_prompt=original_prompt,
-                enhanced_prompt=enhanced_prompt,
-                context=context
-            )
+            result = await self._compare(request)
             
             # Save the comparison result
             self.storage_service.save_comparison_history(result)
             
             return result
             
+        except ProviderUnavailableError as e:
+            logger.error(f"Prompt comparison rejected: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             logger.error(f"Error in compare_prompts: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @staticmethod
+    def _metric_suggestions(metrics: Dict[str, Any]) -> List[str]:
+        """Collect the suggestions of all metrics, as the comparison response lists them."""
+        suggestions = []
+        for metric in metrics.values():
+            if isinstance(metric, dict) and "suggestions" in metric:
+                suggestions.extend(metric["suggestions"])
+        return suggestions or ["No specific suggestions available"]
+
+    async def analyze_and_compare(
+        self, request: Union[PromptAnalyzeRequest, Dict[str, Any]]
+    ) -> PromptAnalyzeCompareResponse:
+        """
+        Analyze a prompt and compare it with its enhanced version in one provider round trip.
+        The comparison reuses the analysis metrics of the original prompt; the
+        enhanced prompt is scored in the same call. If the model leaves out those
+        scores, the enhanced prompt alone is analyzed to obtain them.
+        """
+        try:
+            prompt_text, model, context = self._parse_analyze_request(request)
+            logger.info(f"Analyzing and comparing prompt with model: {model}")
+
+            cache_key = result_cache.make_key("analyze_compare", model, FUSED_VERSION, prompt_text, context)
+            result = None if self._force_refresh(request) else result_cache.get("analyze_compare", cache_key)
+            served_model = model
+            if result is None:
+                served_model, model_service = self.model_factory.resolve_model_service(model)
+                result = await model_service.analyze_and_compare_prompt(prompt_text, context)
+                if "error" not in result and not isinstance(result.get("enhanced_metrics"), dict):
+                    logger.warning("Model did not score the enhanced prompt, scoring it separately")
+                    scored = await micro_batcher.analyze(model_service, result["enhanced_prompt"], context)
+                    if "error" in scored:
+                        result["error"] = scored["error"]
+                    result["enhanced_metrics"] = scored["metrics"]
+                if "error" not in result and served_model == model:
+                    result_cache.set(cache_key, result)
+
+            enhanced_metrics = result.pop("enhanced_metrics", None) or result["metrics"]
+            result['original_prompt'] = prompt_text
+            result['model_used'] = served_model
+            comparison = {
+                "original_prompt": {
+                    "prompt": prompt_text,
+                    "metrics": result["metrics"],
+                    "suggestions": self._metric_suggestions(result["metrics"]),
+                },
+                "enhanced_prompt": {
+                    "prompt": result["enhanced_prompt"],
+                    "metrics": enhanced_metrics,
+                    "suggestions": self._metric_suggestions(enhanced_metrics),
+                },
+                "model_used": served_model,
+                "metadata": result.get("metadata"),
+            }
+            highlight_comparison(comparison)
+
+            self.storage_service.save_analysis_history(result)
+            self.storage_service.save_comparison_history(comparison)
+
+            return PromptAnalyzeCompareResponse(
+                analysis=PromptAnalysisResponse(**result),
+                comparison=PromptComparisonResponse(**comparison),
+            )
+        except ProviderUnavailableError as e:
+            logger.error(f"Prompt analysis and comparison rejected: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            logger.exception("Error during prompt analysis and comparison")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def _metric_deltas(comparison: Dict) -> Dict[str, float]:
+        """Return the enhanced minus original score of every metric scored for both prompts."""
+        original = comparison.get("original_prompt", {}).get("metrics", {})
+        enhanced = comparison.get("enhanced_prompt", {}).get("metrics", {})
+        return {
+            name: enhanced[name]["score"] - original[name]["score"]
+            for name in enhanced
+            if name in original
+        }
+
+    async def compare_prompts_batch(
+        self, requests: List[Union[Dict, Any]], concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Compare many prompt pairs with bounded concurrency.
+        Identical pairs are compared once. Yields {"index", "result"} or
+        {"index", "error"} per pair in completion order, then a {"summary"} with
+        the mean enhanced minus original score per metric over the successful
+        pairs. The unique successful comparisons are saved as one history record.
+        """
+        semaphore = asyncio.Semaphore(self._bulk_concurrency(concurrency))
+        groups: Dict[str, List[int]] = {}
+        unique: Dict[str, Union[Dict, Any]] = {}
+        invalid: List[Tuple[int, str]] = []
+        for index, request in enumerate(requests):
+            try:
+                _, original_prompt, enhanced_prompt, context, model_name = self._parse_compare_request(request)
+            except Exception as e:
+                invalid.append((index, str(e)))
+                continue
+            key = result_cache.make_key(
+                "compare", model_name, COMPARISON_VERSION, original_prompt, enhanced_prompt, context
+            )
+            unique.setdefault(key, request)
+            groups.setdefault(key, []).append(index)
+
+        async def run(key: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+            async with semaphore:
+                try:
+                    result = await self._compare(unique[key])
+                    if "error" in result:
+                        return key, None, result["error"]
+                    return key, PromptComparisonResponse(**result).model_dump(mode="json"), None
+                except Exception as e:
+                    logger.error(f"Bulk comparison failed: {str(e)}")
+                    return key, None, str(e)
+
+        logger.info(f"Comparing {len(requests)} prompt pairs in bulk ({len(unique)} unique)")
+        tasks = [asyncio.ensure_future(run(key)) for key in unique]
+        history = []
+        deltas: Dict[str, List[float]] = {}
+        failed = len(invalid)
+        try:
+            for index, error in invalid:
+                yield {"index": index, "error": error}
+            for next_done in asyncio.as_completed(tasks):
+                key, result, error = await next_done
+                if result is not None:
+                    history.append(result)
+                for index in groups[key]:
+                    if error is not None:
+                        failed += 1
+                        yield {"index": index, "error": error}
+                        continue
+                    for name, delta in self._metric_deltas(result).items():
+                        deltas.setdefault(name, []).append(delta)
+                    yield {"index": index, "result": result}
+            yield {"summary": {
+                "pairs": len(requests),
+                "unique_pairs": len(unique),
+                "succeeded": len(requests) - failed,
+                "failed": failed,
+                "mean_deltas": {name: round(sum(values) / len(values), 4) for name, values in deltas.items()},
+            }}
+        finally:
+            # Stop outstanding work if the client went away, and keep what completed
+            for task in tasks:
+                task.cancel()
+            if history:
+                self.storage_service.save_comparison_history_batch(history)
+
     def get_analysis_history(self) -> List[Dict]:
         """Get analysis history."""
         return self.storage_service.get_analysis_history()
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Any
 from loguru import logger
 
 from ...core.config import get_settings
+from ..core.template_registry import templates
 from ..model.model_factory import model_factory
 from .cache import cache
 from .history_service import history_service
@@ -13,6 +14,14 @@ from .prompt_templates import SYNTHETIC_DATA_TEMPLATE, SIMILAR_CONTENT_TEMPLATE
 
 logger = logger.bind(service="generation")
 
+SYNTHETIC_DATA = templates.register(
+    "synthetic_data", SYNTHETIC_DATA_TEMPLATE, placeholders=("template", "instructions", "batch_size")
+)
+SIMILAR_CONTENT = templates.register(
+    "similar_content", SIMILAR_CONTENT_TEMPLATE,
+    placeholders=("reference_content", "template", "instructions", "batch_size")
+)
+
 class SyntheticDataGenerator:
     def __init__(self):
         """Initialize the generator with configuration."""
@@ -64,7 +73,7 @@ class SyntheticDataGenerator:
             try:
                 # Format the appropriate template
                 if reference_content:
-                    formatted_template = SIMILAR_CONTENT_TEMPLATE.format(
+                    formatted_template = SIMILAR_CONTENT.render(
                         reference_content=reference_content,
                         template=template,
                         instructions=additional_instructions or "Follow the template structure and style.",
@@ -72,7 +81,7 @@ class SyntheticDataGenerator:
                     )
                     logger.debug(f"[GEN:{generation_id}] Using similar content template")
                 else:
-                    formatted_template = SYNTHETIC_DATA_TEMPLATE.format(
+                    formatted_template = SYNTHETIC_DATA.render(
                         template=template,
                         instructions=additional_instructions or "Follow the template structure and style.",
                         batch_size=batch_size
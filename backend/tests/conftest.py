@@ -9,6 +9,23 @@ from ai_prompt_enhancement.core.config import get_settings
 from ai_prompt_enhancement.services.model.deepseek_service import DeepseekService
 from ai_prompt_enhancement.services.prompt_refinement.refinement_service import RefinementService
 from ai_prompt_enhancement.services.evaluation.evaluation_service import EvaluationService
+from ai_prompt_enhancement.services.evaluation.evaluation_memo import evaluation_memo
+from ai_prompt_enhancement.services.model.circuit_breaker import circuit_breakers
+
+@pytest.fixture(autouse=True)
+def closed_circuits():
+    """Keep provider failures of one test from opening circuits for the next."""
+    circuit_breakers.reset()
+    yield
+    circuit_breakers.reset()
+
+@pytest.fixture(autouse=True)
+def isolated_evaluation_memo(tmp_path, monkeypatch):
+    """Give every test an empty evaluation memo instead of the one on disk."""
+    evaluation_memo.close()
+    monkeypatch.setattr(evaluation_memo, "path", str(tmp_path / "evaluation_memo.db"))
+    yield
+    evaluation_memo.close()
 
 @pytest.fixture
 def settings():
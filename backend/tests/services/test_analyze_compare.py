@@ -0,0 +1,97 @@
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from ai_prompt_enhancement.core.config import get_settings
+from ai_prompt_enhancement.services.core.result_cache import ResultCache
+from ai_prompt_enhancement.services.model.deepseek_service import DeepseekService
+from ai_prompt_enhancement.services.model.prompt_messages import ANALYSIS_SYSTEM_PROMPT
+from ai_prompt_enhancement.services.prompt_service import PromptService
+
+pytestmark = pytest.mark.asyncio
+
+
+def metrics(score):
+    return {
+        name: {"score": score, "description": name, "suggestions": [f"{name} at {score}"]}
+        for name in ("clarity", "structure")
+    }
+
+@pytest.fixture
+def model_service():
+    """Fixture for a model service whose fused call scores both prompts."""
+    service = MagicMock()
+    service.analyze_and_compare_prompt = AsyncMock(return_value={
+        "metrics": metrics(0.4),
+        "suggestions": ["Add examples"],
+        "enhanced_prompt": "Enhanced prompt",
+        "enhanced_metrics": metrics(0.9),
+    })
+    service.analyze_prompt = AsyncMock(return_value={
+        "metrics": metrics(0.8),
+        "suggestions": [],
+        "enhanced_prompt": "Enhanced again",
+    })
+    return service
+
+@pytest.fixture
+def prompt_service(monkeypatch, model_service):
+    """Fixture for PromptService wired to an empty cache and the fake model service."""
+    cache = ResultCache(ttl_seconds=60, max_entries=100)
+    monkeypatch.setattr("ai_prompt_enhancement.services.prompt_service.result_cache", cache)
+    service = PromptService(storage_service=MagicMock())
+    service.model_factory = MagicMock()
+    service.model_factory.resolve_model_service.side_effect = lambda model: (model, model_service)
+    return service
+
+REQUEST = {"prompt_text": "Write a poem", "preferences": {"model": "deepseek-chat"}}
+
+async def test_fused_call_produces_analysis_and_comparison(prompt_service, model_service):
+    """One provider call should yield the analysis and a comparison reusing its metrics."""
+    response = await prompt_service.analyze_and_compare(REQUEST)
+
+    model_service.analyze_and_compare_prompt.assert_awaited_once()
+    model_service.analyze_prompt.assert_not_awaited()
+    assert response.analysis.enhanced_prompt == "Enhanced prompt"
+    assert response.comparison.original_prompt.prompt == "Write a poem"
+    assert response.comparison.original_prompt.metrics["clarity"].score == 0.4
+    assert response.comparison.enhanced_prompt.metrics["clarity"].score == 0.9
+    assert response.comparison.enhanced_prompt.suggestions == ["clarity at 0.9", "structure at 0.9"]
+    prompt_service.storage_service.save_analysis_history.assert_called_once()
+    prompt_service.storage_service.save_comparison_history.assert_called_once()
+
+async def test_missing_enhanced_scores_fall_back_to_scoring_the_enhanced_prompt(prompt_service, model_service):
+    """If the model skips the enhanced scores, only the enhanced prompt should be analyzed."""
+    fused = model_service.analyze_and_compare_prompt.return_value
+    del fused["enhanced_metrics"]
+
+    response = await prompt_service.analyze_and_compare(REQUEST)
+
+    model_service.analyze_prompt.assert_awaited_once_with("Enhanced prompt", None)
+    assert response.comparison.enhanced_prompt.metrics["clarity"].score == 0.8
+    assert response.comparison.original_prompt.metrics["clarity"].score == 0.4
+
+async def test_repeated_requests_are_served_from_cache(prompt_service, model_service):
+    """An identical second request should not call the model again."""
+    first = await prompt_service.analyze_and_compare(REQUEST)
+    second = await prompt_service.analyze_and_compare(REQUEST)
+
+    model_service.analyze_and_compare_prompt.assert_awaited_once()
+    assert first == second
+
+async def test_service_keeps_enhanced_metrics_and_shares_analysis_prefix():
+    """The fused request should extend the analysis prefix and keep the enhanced scores."""
+    service = DeepseekService(get_settings())
+    content = json.dumps({"metrics": metrics(0.5), "suggestions": [], "enhanced_prompt": "Better",
+                          "enhanced_metrics": metrics(0.7)})
+    response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+    service.client.create_chat_completion = AsyncMock(return_value=response)
+
+    result = await service.analyze_and_compare_prompt("Fused prompt under test")
+
+    messages = service.client.create_chat_completion.call_args.kwargs["messages"]
+    assert messages[0]["content"].startswith(ANALYSIS_SYSTEM_PROMPT)
+    assert "enhanced_metrics" in messages[0]["content"]
+    assert result["enhanced_metrics"]["clarity"]["score"] == 0.7
+    assert "metadata" in result
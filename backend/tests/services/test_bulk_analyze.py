@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_prompt_enhancement.api import prompt_routes
+from ai_prompt_enhancement.services.core.result_cache import ResultCache
+from ai_prompt_enhancement.services.prompt_service import PromptService
+
+pytestmark = pytest.mark.asyncio
+
+
+class SlowAnalyzeService:
+    """Model service double whose latency depends on the prompt and that tracks concurrency."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def analyze_prompt(self, prompt, context=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.03 if prompt == "slow" else 0.001)
+            if prompt == "boom":
+                raise RuntimeError("provider exploded")
+            if prompt == "degraded":
+                # The shape model services return when the provider call failed
+                return {
+                    "metrics": {"clarity": {"score": 0.0, "description": "Error", "suggestions": []}},
+                    "suggestions": [],
+                    "error": "Error analyzing prompt: rate limited",
+                }
+            return {
+                "metrics": {"clarity": {"score": 0.8, "description": "Clear", "suggestions": []}},
+                "suggestions": [],
+                "enhanced_prompt": f"Enhanced {prompt}",
+            }
+        finally:
+            self.in_flight -= 1
+
+@pytest.fixture
+def model_service():
+    """Fixture for the slow fake model service."""
+    return SlowAnalyzeService()
+
+@pytest.fixture
+def prompt_service(monkeypatch, model_service):
+    """Fixture for PromptService wired to an empty cache and the slow fake model service."""
+    cache = ResultCache(ttl_seconds=60, max_entries=100)
+    monkeypatch.setattr("ai_prompt_enhancement.services.prompt_service.result_cache", cache)
+    service = PromptService(storage_service=MagicMock())
+    service.model_factory = MagicMock()
+    service.model_factory.resolve_model_service.side_effect = lambda model: (model, model_service)
+    return service
+
+def analyze_request(prompt):
+    return {"prompt_text": prompt, "preferences": {"model": "deepseek-chat"}}
+
+async def test_results_stream_in_completion_order(prompt_service):
+    """Fast prompts should not wait for slow ones, and every line should carry its input index."""
+    requests = [analyze_request(prompt) for prompt in ("slow", "a", "b")]
+
+    lines = [line async for line in prompt_service.analyze_prompts_batch(requests, concurrency=3)]
+
+    assert [line["index"] for line in lines][-1] == 0
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert lines[-1]["result"]["enhanced_prompt"] == "Enhanced slow"
+
+async def test_concurrency_is_bounded(prompt_service, model_service):
+    """No more than the requested number of prompts should be analyzed at once."""
+    requests = [analyze_request(f"prompt {i}") for i in range(10)]
+
+    lines = [line async for line in prompt_service.analyze_prompts_batch(requests, concurrency=2)]
+
+    assert len(lines) == 10
+    assert model_service.max_in_flight == 2
+
+async def test_failures_are_isolated_and_history_is_written_once(prompt_service):
+    """A failing prompt should yield an error line and leave the others to complete."""
+    requests = [analyze_request("a"), analyze_request("boom"), {"preferences": {"model": "deepseek-chat"}}]
+
+    lines = {line["index"]: line async for line in prompt_service.analyze_prompts_batch(requests)}
+
+    assert "result" in lines[0]
+    assert lines[1]["error"] == "provider exploded"
+    assert lines[2]["error"] == "Prompt text is required"
+    prompt_service.storage_service.save_analysis_history_batch.assert_called_once()
+    saved = prompt_service.storage_service.save_analysis_history_batch.call_args.args[0]
+    assert [record["original_prompt"] for record in saved] == ["a"]
+    prompt_service.storage_service.save_analysis_history.assert_not_called()
+
+async def test_provider_error_payloads_are_reported_as_errors(prompt_service):
+    """An analysis the provider failed should be an error line and stay out of the history."""
+    requests = [analyze_request("a"), analyze_request("degraded")]
+
+    lines = {line["index"]: line async for line in prompt_service.analyze_prompts_batch(requests)}
+
+    assert lines[1] == {"index": 1, "error": "Error analyzing prompt: rate limited"}
+    saved = prompt_service.storage_service.save_analysis_history_batch.call_args.args[0]
+    assert [record["original_prompt"] for record in saved] == ["a"]
+
+async def test_batch_routes_stream_ndjson(prompt_service):
+    """The JSON and JSONL upload routes should stream one NDJSON line per prompt."""
+    app = FastAPI()
+    app.include_router(prompt_routes.router)
+    app.dependency_overrides[PromptService] = lambda: prompt_service
+    client = TestClient(app)
+
+    response = client.post("/prompts/analyze/batch", json={"prompts": [analyze_request("a"), analyze_request("b")]})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted(json.loads(line)["index"] for line in response.text.splitlines()) == [0, 1]
+
+    upload = "\n".join(json.dumps(analyze_request(prompt)) for prompt in ("a", "b", "c")) + "\n\n"
+    response = client.post("/prompts/analyze/batch/upload", files={"file": ("prompts.jsonl", upload)},
+                           data={"concurrency": "2"})
+    assert len(response.text.splitlines()) == 3
+
+    response = client.post("/prompts/analyze/batch/upload", files={"file": ("prompts.jsonl", '{"context": "x"}')})
+    assert response.status_code == 400
+    assert "line 1" in response.json()["detail"]
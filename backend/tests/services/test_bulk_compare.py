@@ -0,0 +1,103 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_prompt_enhancement.api import prompt_routes
+from ai_prompt_enhancement.services.core.result_cache import ResultCache
+from ai_prompt_enhancement.services.prompt_service import PromptService
+
+pytestmark = pytest.mark.asyncio
+
+
+def version(prompt, clarity, structure):
+    return {
+        "prompt": prompt,
+        "metrics": {
+            "clarity": {"score": clarity, "description": "Clarity", "suggestions": []},
+            "structure": {"score": structure, "description": "Structure", "suggestions": []},
+        },
+        "suggestions": [],
+    }
+
+
+class FakeCompareService:
+    """Model service double scoring enhanced prompts by length and recording calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def compare_prompts(self, original_prompt, enhanced_prompt, context=None):
+        self.calls.append((original_prompt, enhanced_prompt))
+        if enhanced_prompt == "broken":
+            return {"error": "Invalid comparison format - missing required fields"}
+        gain = 0.1 * len(enhanced_prompt.split())
+        return {
+            "original_prompt": version(original_prompt, 0.5, 0.5),
+            "enhanced_prompt": version(enhanced_prompt, 0.5 + gain, 0.5),
+            "model_used": "gpt-4o-mini",
+        }
+
+@pytest.fixture
+def model_service():
+    """Fixture for the fake comparison model service."""
+    return FakeCompareService()
+
+@pytest.fixture
+def prompt_service(monkeypatch, model_service):
+    """Fixture for PromptService wired to an empty cache and the fake model service."""
+    cache = ResultCache(ttl_seconds=60, max_entries=100)
+    monkeypatch.setattr("ai_prompt_enhancement.services.prompt_service.result_cache", cache)
+    service = PromptService(storage_service=MagicMock())
+    service.model_factory = MagicMock()
+    service.model_factory.resolve_model_service.side_effect = lambda model: (model, model_service)
+    return service
+
+def pair(original, enhanced):
+    return {"original_prompt": original, "enhanced_prompt": enhanced}
+
+async def test_identical_pairs_are_compared_once(prompt_service, model_service):
+    """Duplicate pairs should share one comparison but each get their own line."""
+    pairs = [pair("a", "a better"), pair(" a ", "a  better"), pair("b", "b much better")]
+
+    lines = [line async for line in prompt_service.compare_prompts_batch(pairs, concurrency=2)]
+
+    assert len(model_service.calls) == 2
+    results = {line["index"]: line["result"] for line in lines if "result" in line}
+    assert sorted(results) == [0, 1, 2]
+    assert results[0] == results[1]
+    prompt_service.storage_service.save_comparison_history_batch.assert_called_once()
+    assert len(prompt_service.storage_service.save_comparison_history_batch.call_args.args[0]) == 2
+
+async def test_summary_reports_mean_metric_deltas(prompt_service):
+    """The last line should average enhanced minus original scores over the successful pairs."""
+    pairs = [pair("a", "one two"), pair("b", "one two three four"), pair("c", "broken"), pair("d", "")]
+
+    lines = [line async for line in prompt_service.compare_prompts_batch(pairs)]
+
+    summary = lines[-1]["summary"]
+    assert summary["pairs"] == 4
+    assert summary["succeeded"] == 2 and summary["failed"] == 2
+    assert summary["mean_deltas"] == {"clarity": pytest.approx(0.3), "structure": 0.0}
+    errors = {line["index"]: line["error"] for line in lines if "error" in line}
+    assert errors[3] == "Both original_prompt and enhanced_prompt are required"
+    assert "missing required fields" in errors[2]
+
+async def test_compare_batch_route_streams_ndjson(prompt_service):
+    """The batch compare route should stream per-pair lines followed by the summary."""
+    app = FastAPI()
+    app.include_router(prompt_routes.router)
+    app.dependency_overrides[PromptService] = lambda: prompt_service
+    client = TestClient(app)
+
+    response = client.post("/prompts/compare/batch", json={"pairs": [pair("a", "a better"), pair("a", "a better")]})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1]
+    assert lines[-1]["summary"]["unique_pairs"] == 1
+
+    upload = "\n".join(json.dumps(pair(f"p{i}", "better")) for i in range(3))
+    response = client.post("/prompts/compare/batch/upload", files={"file": ("pairs.jsonl", upload)})
+    assert json.loads(response.text.splitlines()[-1])["summary"]["succeeded"] == 3
@@ -0,0 +1,188 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from openai import BadRequestError, InternalServerError
+
+from ai_prompt_enhancement.services.model import model_factory as model_factory_module
+from ai_prompt_enhancement.services.model import provider_client as provider_client_module
+from ai_prompt_enhancement.services.model.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry, ProviderUnavailableError
+)
+from ai_prompt_enhancement.services.model.model_factory import ModelFactory
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+
+pytestmark = pytest.mark.asyncio
+
+def _breaker(**overrides):
+    options = {
+        "name": "test", "failure_rate": 0.5, "window_size": 10,
+        "min_calls": 4, "slow_call_seconds": 1.0, "open_seconds": 0.01,
+    }
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+def _error(cls, status):
+    request = httpx.Request("POST", "http://localhost/chat/completions")
+    return cls(f"HTTP {status}", response=httpx.Response(status, request=request), body=None)
+
+@pytest.fixture
+def breakers(monkeypatch):
+    """Use a fresh breaker registry so tests do not share circuit state."""
+    registry = CircuitBreakerRegistry()
+    monkeypatch.setattr(model_factory_module, "circuit_breakers", registry)
+    monkeypatch.setattr(provider_client_module, "circuit_breakers", registry)
+    return registry
+
+@pytest.fixture
+def pooled_services(monkeypatch):
+    """Build stub services in the factory, so no provider credentials are needed."""
+    def build(provider):
+        service = MagicMock(name=f"{provider} service")
+        service.client.probe = AsyncMock(return_value=None)
+        return service
+
+    monkeypatch.setattr(ModelFactory, "_build_service", staticmethod(build))
+
+@pytest.fixture(autouse=True)
+async def clean_registry():
+    """Start and finish every test with an empty service registry."""
+    await ModelFactory.close()
+    yield
+    await ModelFactory.close()
+
+async def test_opens_when_failure_rate_is_reached():
+    """The circuit should open once enough recent calls failed."""
+    breaker = _breaker(open_seconds=60)
+    for success in (True, False, True):
+        breaker.record(success)
+    assert breaker.state == CLOSED
+
+    breaker.record(False)
+
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+    assert breaker.stats()["rejected"] == 1
+
+async def test_slow_calls_count_as_failures():
+    """Calls slower than the threshold should open the circuit like errors."""
+    breaker = _breaker(open_seconds=60)
+    for _ in range(4):
+        breaker.record(True, latency=5.0)
+
+    assert breaker.state == OPEN
+
+async def test_successful_probe_closes_circuit():
+    """A half-open probe that succeeds should close the circuit."""
+    breaker = _breaker()
+    breaker.probe = AsyncMock(return_value=None)
+    for _ in range(4):
+        breaker.record(False)
+
+    await asyncio.sleep(0.05)
+
+    breaker.probe.assert_awaited()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is True
+
+async def test_failed_probe_reopens_circuit():
+    """A failing half-open probe should keep the provider out of rotation."""
+    breaker = _breaker(open_seconds=0.05)
+    probing = asyncio.Event()
+
+    async def probe():
+        probing.set()
+        raise ConnectionError("still down")
+
+    breaker.probe = probe
+    for _ in range(4):
+        breaker.record(False)
+
+    await asyncio.wait_for(probing.wait(), timeout=1)
+    assert breaker.state in (HALF_OPEN, OPEN)
+    await asyncio.sleep(0)
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+
+async def test_client_errors_do_not_open_circuit(breakers):
+    """Bad requests should not count against the provider's health."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="breaker-test", mode="async")
+    client.retry_policy.max_attempts = 1
+    client._client = MagicMock()
+    client._client.chat.completions.create = AsyncMock(side_effect=_error(BadRequestError, 400))
+
+    for _ in range(10):
+        with pytest.raises(BadRequestError):
+            await client.create_chat_completion(model="breaker-model", messages=[])
+
+    assert breakers.get("breaker-test").state == CLOSED
+
+async def test_server_errors_open_circuit(breakers):
+    """Repeated server errors should open the provider's circuit."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="breaker-test", mode="async")
+    client.retry_policy.max_attempts = 1
+    client._client = MagicMock()
+    client._client.chat.completions.create = AsyncMock(side_effect=_error(InternalServerError, 503))
+
+    for _ in range(10):
+        with pytest.raises(InternalServerError):
+            await client.create_chat_completion(model="breaker-model", messages=[])
+
+    assert breakers.get("breaker-test").state == OPEN
+
+async def test_open_circuit_reroutes_to_fallback_model(breakers, pooled_services):
+    """Requests for a provider with an open circuit should be served by the fallback model."""
+    breakers.get("deepseek").state = OPEN
+
+    model, service = ModelFactory.resolve_model_service("deepseek-chat")
+
+    assert model == "gpt-4o-mini"
+    assert service is ModelFactory.get_service("openai")
+
+async def test_no_fallback_raises_provider_unavailable(breakers):
+    """With every candidate circuit open the request should be rejected."""
+    breakers.get("deepseek").state = OPEN
+    breakers.get("openai").state = OPEN
+
+    with pytest.raises(ProviderUnavailableError):
+        ModelFactory.resolve_model_service("deepseek-chat")
+
+async def test_half_open_probe_uses_pooled_service(breakers, pooled_services, monkeypatch):
+    """The breaker should probe through the pooled service with a configured model, whatever clients exist."""
+    monkeypatch.setattr(model_factory_module.get_settings(), "health_probe_models", ["gpt-4o-mini", "deepseek-chat"])
+    ModelFactory.register_probes()
+    ProviderClient(api_key="test", base_url="http://localhost", provider="deepseek", mode="async")
+
+    await breakers.get("deepseek").probe()
+
+    ModelFactory.get_service("deepseek").client.probe.assert_awaited_once_with("deepseek-chat")
+
+async def test_limiter_wait_does_not_count_as_slow_call(breakers, monkeypatch):
+    """Only the provider's own latency should be checked against the slow-call threshold."""
+    class SlowLimiter:
+        async def acquire(self, tokens):
+            await asyncio.sleep(0.05)
+
+        def release(self, permit, tokens_used=None, throttled=False):
+            pass
+
+    monkeypatch.setattr(provider_client_module, "rate_limiters", MagicMock(get=lambda provider, model: SlowLimiter()))
+    breaker = breakers.get("breaker-test")
+    breaker.slow_call_seconds = 0.03
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="breaker-test", mode="async")
+    client._client = MagicMock()
+    client._client.chat.completions.create = AsyncMock(return_value="response")
+
+    for _ in range(6):
+        await client.create_chat_completion(model="breaker-model", messages=[])
+    assert breaker.state == CLOSED and breaker.stats()["recent_failure_rate"] == 0.0
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return "response"
+
+    client._client.chat.completions.create = slow_create
+    for _ in range(6):
+        await client.create_chat_completion(model="breaker-model", messages=[])
+    assert breaker.state == OPEN
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from typing import Dict, List
 import json
 
@@ -10,9 +10,11 @@ pytestmark = pytest.mark.asyncio
 
 @pytest.fixture
 def mock_openai():
-    """Fixture for mocked OpenAI client."""
-    with patch("openai.AsyncOpenAI") as mock:
+    """Fixture for mocked OpenAI client, patched where the provider client looks it up."""
+    with patch("ai_prompt_enhancement.services.model.provider_client.AsyncOpenAI") as mock:
         client = MagicMock()
+        client.chat.completions.create = AsyncMock()
+        client.chat.completions.create.return_value.usage = None
         mock.return_value = client
         yield client
 
@@ -1,9 +1,19 @@
+import asyncio
+import json
 import pytest
 from unittest.mock import MagicMock, patch
 from typing import Dict, List
 import io
+from tempfile import SpooledTemporaryFile
 
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from ai_prompt_enhancement.api.evaluation import routes as evaluation_routes
+from ai_prompt_enhancement.core.config import get_settings
+from ai_prompt_enhancement.services.evaluation.evaluation_memo import evaluation_memo
 from ai_prompt_enhancement.services.evaluation.evaluation_service import EvaluationService
+from ai_prompt_enhancement.services.model.model_factory import model_factory
 
 pytestmark = pytest.mark.asyncio
 
@@ -12,6 +22,14 @@ def evaluation_service(mock_deepseek_service):
     """Fixture for EvaluationService with mocked dependencies."""
     return EvaluationService(model_service=mock_deepseek_service)
 
+@pytest.fixture
+def evaluation_client(monkeypatch, mock_deepseek_service):
+    """Fixture for a test client of the evaluation routes backed by the mocked model service."""
+    monkeypatch.setattr(model_factory, "create_model_service", lambda *args, **kwargs: mock_deepseek_service)
+    app = FastAPI()
+    app.include_router(evaluation_routes.router)
+    return TestClient(app)
+
 @pytest.fixture
 def sample_criteria():
     """Fixture for sample evaluation criteria."""
@@ -142,14 +160,17 @@ async def test_evaluate_batch_empty_csv(evaluation_service: EvaluationService, s
         )
 
 async def test_evaluate_batch_service_error(evaluation_service: EvaluationService, sample_criteria, sample_csv_file, mock_deepseek_service):
-    """Test batch evaluation with service error."""
-    mock_deepseek_service.evaluate_prompt.side_effect = Exception("Service error")
+    """Test batch evaluation with service error reports every row as failed instead of raising."""
+    mock_deepseek_service.analyze_prompt.side_effect = Exception("Service error")
     
-    with pytest.raises(Exception):
-        await evaluation_service.evaluate_prompts_batch(
-            file=sample_csv_file,
-            criteria=sample_criteria
-        )
+    result = await evaluation_service.evaluate_prompts_batch(
+        file=sample_csv_file,
+        criteria=sample_criteria
+    )
+
+    assert result["failed_prompts"] == 2
+    assert result["average_score"] == 0.0
+    assert all("Service error" in row["error"] for row in result["results"].values())
 
 async def test_evaluate_prompt_empty_criteria(evaluation_service: EvaluationService):
     """Test prompt evaluation with empty criteria."""
@@ -167,4 +188,201 @@ async def test_evaluate_batch_missing_prompt_column(evaluation_service: Evaluati
         await evaluation_service.evaluate_prompts_batch(
             file=invalid_csv,
             criteria=sample_criteria
-        ) 
\ No newline at end of file
+        ) 
+
+async def test_evaluate_batch_preserves_order_and_isolates_failures(evaluation_service: EvaluationService, sample_criteria, mock_deepseek_service):
+    """Rows should come back in CSV order with latencies, and a failing row should not fail the batch."""
+    delays = {"slow": 0.05, "fast": 0.0, "broken": 0.01}
+
+    async def analyze(prompt, context=None):
+        await asyncio.sleep(delays[prompt])
+        if prompt == "broken":
+            raise Exception("Provider error")
+        return {"metrics": {"clarity": 0.9, "specificity": 0.9 if prompt == "slow" else 0.5}, "suggestions": [prompt]}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+
+    result = await evaluation_service.evaluate_prompts_batch(
+        file="prompt\nslow\nfast\nbroken\n\"\"",
+        criteria=sample_criteria
+    )
+
+    rows = result["results"]
+    assert list(rows) == ["prompt_1", "prompt_2", "prompt_3", "prompt_4"]
+    assert rows["prompt_1"]["feedback"] == ["slow"] and rows["prompt_2"]["feedback"] == ["fast"]
+    assert "Provider error" in rows["prompt_3"]["error"]
+    assert rows["prompt_4"]["error"] == "Prompt is empty"
+    assert rows["prompt_1"]["latency_ms"] >= 50
+    assert result["failed_prompts"] == 2
+    assert result["passed_prompts"] == 1
+    assert result["average_score"] == pytest.approx((0.9 + 0.66) / 2)
+
+async def test_evaluate_batch_bounds_concurrency(evaluation_service: EvaluationService, sample_criteria, mock_deepseek_service):
+    """No more than the requested number of rows should be evaluated at once."""
+    in_flight, peak = 0, 0
+
+    async def analyze(prompt, context=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"metrics": {"clarity": 0.8, "specificity": 0.8}, "suggestions": []}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+    csv = "prompt\n" + "\n".join(f"prompt {i}" for i in range(20))
+
+    result = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=sample_criteria, concurrency=4)
+
+    assert peak == 4
+    assert result["total_prompts"] == 20 and result["failed_prompts"] == 0
+
+async def test_evaluate_batch_rejects_invalid_criteria_up_front(evaluation_service: EvaluationService, sample_csv_file, mock_deepseek_service):
+    """Invalid criteria should fail the whole batch before any row is evaluated."""
+    with pytest.raises(ValueError):
+        await evaluation_service.evaluate_prompts_batch(
+            file=sample_csv_file,
+            criteria=[{"name": "clarity", "weight": 0.5, "description": "Measures clarity"}]
+        )
+    mock_deepseek_service.analyze_prompt.assert_not_called()
+
+async def test_csv_is_parsed_incrementally(evaluation_service: EvaluationService, monkeypatch):
+    """The first prompt should be available before the rest of a large CSV has been read."""
+    monkeypatch.setattr(get_settings(), "evaluation_csv_chunk_rows", 100)
+    content = ("prompt,notes\n" + "".join(f"Prompt {i},{'x' * 80}\n" for i in range(50000))).encode()
+    stream = io.BytesIO(content)
+
+    rows = evaluation_service.iter_csv_prompts(stream)
+    assert await rows.__anext__() == (0, "Prompt 0")
+    assert stream.tell() < len(content) / 2
+    await rows.aclose()
+
+async def test_evaluate_batch_from_spooled_upload(evaluation_service: EvaluationService, sample_criteria, monkeypatch):
+    """An upload spooled to disk should be evaluated across several parse chunks, in order."""
+    monkeypatch.setattr(get_settings(), "evaluation_csv_chunk_rows", 7)
+    spooled = SpooledTemporaryFile(max_size=64)
+    spooled.write(("prompt\n" + "\n".join(f"Prompt {i}" for i in range(30))).encode())
+    upload = UploadFile(file=spooled, filename="prompts.csv")
+
+    result = await evaluation_service.evaluate_prompts_batch(file=upload, criteria=sample_criteria)
+
+    assert result["total_prompts"] == 30 and result["failed_prompts"] == 0
+    assert list(result["results"])[-1] == "prompt_30"
+
+async def test_batch_route_streams_ndjson(evaluation_client, sample_criteria, mock_deepseek_service):
+    """With stream=true the route should emit one line per row, then the batch summary."""
+    async def analyze(prompt, context=None):
+        if prompt == "broken":
+            raise Exception("Provider error")
+        return {"metrics": {"clarity": 0.9, "specificity": 0.9}, "suggestions": []}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+    csv = "prompt\n" + "\n".join(["ok"] * 5 + ["broken"])
+
+    response = evaluation_client.post(
+        "/evaluation/evaluate/batch",
+        files={"file": ("prompts.csv", csv)},
+        data={"criteria": json.dumps(sample_criteria), "stream": "true"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted(line["index"] for line in lines[:-1]) == list(range(6))
+    assert all("latency_ms" in line for line in lines[:-1])
+    assert "Provider error" in next(line["error"] for line in lines if line.get("index") == 5)
+    summary = lines[-1]["summary"]
+    assert summary["total_prompts"] == 6 and summary["passed_prompts"] == 5 and summary["failed_prompts"] == 1
+    assert summary["average_score"] == pytest.approx(0.9)
+
+async def test_batch_route_rejects_invalid_csv_before_streaming(evaluation_client, sample_criteria):
+    """An invalid CSV should get a 400 in both modes; the JSON mode should return ordered results."""
+    for stream in ("true", "false"):
+        response = evaluation_client.post(
+            "/evaluation/evaluate/batch",
+            files={"file": ("prompts.csv", "text\nhello")},
+            data={"criteria": json.dumps(sample_criteria), "stream": stream},
+        )
+        assert response.status_code == 400
+        assert "prompt" in response.json()["detail"]
+
+    response = evaluation_client.post(
+        "/evaluation/evaluate/batch",
+        files={"file": ("prompts.csv", "prompt\na\nb")},
+        data={"criteria": json.dumps(sample_criteria)},
+    )
+    assert response.status_code == 200
+    assert list(response.json()["results"]) == ["prompt_1", "prompt_2"]
+
+async def test_evaluate_batch_dedupes_prompts(evaluation_service: EvaluationService, sample_criteria, mock_deepseek_service):
+    """Each distinct prompt should be evaluated once, with every duplicate row getting its result."""
+    calls = []
+
+    async def analyze(prompt, context=None):
+        calls.append(prompt)
+        await asyncio.sleep(0.02)
+        if prompt == "broken":
+            raise Exception("Provider error")
+        return {"metrics": {"clarity": 0.9, "specificity": 0.9 if prompt == "a" else 0.5}, "suggestions": [prompt]}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+    csv = "prompt\na\nb\n\" a  \"\na\nbroken\nb\nbroken\na"
+
+    result = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=sample_criteria, concurrency=8)
+
+    assert sorted(calls) == ["a", "b", "broken"]
+    rows = result["results"]
+    for name in ("prompt_3", "prompt_4", "prompt_8"):
+        assert rows[name]["overall_score"] == rows["prompt_1"]["overall_score"]
+        assert rows[name]["reused"] == "duplicate"
+    assert "reused" not in rows["prompt_1"]
+    assert "Provider error" in rows["prompt_7"]["error"] and rows["prompt_7"]["reused"] == "duplicate"
+    assert result["total_prompts"] == 8 and result["failed_prompts"] == 2
+    assert result["duplicate_prompts"] == 5 and result["memo_hits"] == 0 and result["llm_calls_saved"] == 5
+
+async def test_evaluate_batch_reuses_memo_across_runs(evaluation_service: EvaluationService, sample_criteria, mock_deepseek_service):
+    """A re-run should reuse memoized rows, even after a reload, unless refreshed or the criteria change."""
+    calls = []
+
+    async def analyze(prompt, context=None):
+        calls.append(prompt)
+        if prompt == "broken":
+            raise Exception("Provider error")
+        return {"metrics": {"clarity": 0.9, "specificity": 0.9}, "suggestions": []}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+    csv = "prompt\nfirst\nsecond\nbroken"
+
+    first = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=sample_criteria)
+    assert len(calls) == 3 and first["llm_calls_saved"] == 0
+
+    evaluation_memo.close()  # as after a restart
+    second = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=list(reversed(sample_criteria)))
+    assert calls[3:] == ["broken"]
+    assert second["memo_hits"] == 2 and second["llm_calls_saved"] == 2
+    assert second["results"]["prompt_1"]["reused"] == "memo"
+    assert second["results"]["prompt_1"]["overall_score"] == first["results"]["prompt_1"]["overall_score"]
+
+    await evaluation_service.evaluate_prompts_batch(file=csv, criteria=sample_criteria, force_refresh=True)
+    assert len(calls) == 7
+
+    other_criteria = [{**c, "threshold": 0.5} for c in sample_criteria]
+    third = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=other_criteria)
+    assert len(calls) == 10 and third["llm_calls_saved"] == 0
+
+async def test_duplicates_beyond_dedupe_window_use_memo(evaluation_service: EvaluationService, sample_criteria, mock_deepseek_service, monkeypatch):
+    """With only a few rows kept in memory, later duplicates should still not call the model again."""
+    monkeypatch.setattr(get_settings(), "evaluation_dedupe_rows", 2)
+    calls = []
+
+    async def analyze(prompt, context=None):
+        calls.append(prompt)
+        return {"metrics": {"clarity": 0.9, "specificity": 0.9}, "suggestions": []}
+
+    mock_deepseek_service.analyze_prompt.side_effect = analyze
+    csv = "prompt\n" + "\n".join([f"prompt {i}" for i in range(10)] * 2)
+
+    result = await evaluation_service.evaluate_prompts_batch(file=csv, criteria=sample_criteria, concurrency=1,
+                                                             force_refresh=True)
+
+    assert len(calls) == 10
+    assert result["duplicate_prompts"] == 10 and result["memo_hits"] == 0
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from ai_prompt_enhancement.services.model.health_prober import HealthProber
+from ai_prompt_enhancement.services.model.model_factory import ModelFactory
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Replace the pooled services with clients whose probe is a mock."""
+    clients = {
+        "deepseek": SimpleNamespace(probe=AsyncMock(return_value=None)),
+        "openai": SimpleNamespace(probe=AsyncMock(return_value=None)),
+    }
+    monkeypatch.setattr(ModelFactory, "get_service", classmethod(lambda cls, provider: SimpleNamespace(client=clients[provider])))
+    return clients
+
+def _prober(**overrides):
+    options = {"models": ["deepseek-chat", "gpt-4o-mini"], "min_interval": 1.0, "max_interval": 8.0, "timeout": 1.0}
+    options.update(overrides)
+    return HealthProber(**options)
+
+async def test_healthy_probe_backs_off(probes):
+    """Consecutive healthy probes should double the interval up to the maximum."""
+    prober = _prober()
+
+    intervals = [(await prober.probe("deepseek-chat"))["next_probe_in"] for _ in range(6)]
+
+    assert intervals == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    probes["deepseek"].probe.assert_awaited_with("deepseek-chat")
+    assert prober.status("deepseek-chat")["status"] == "healthy"
+
+async def test_failed_probe_speeds_up(probes):
+    """A failed probe should be recorded and reset the interval to the minimum."""
+    prober = _prober()
+    for _ in range(3):
+        await prober.probe("gpt-4o-mini")
+    probes["openai"].probe.side_effect = ConnectionError("down")
+
+    result = await prober.probe("gpt-4o-mini")
+
+    assert result["status"] == "unhealthy"
+    assert result["next_probe_in"] == 1.0
+    assert "ConnectionError" in result["error"]
+
+async def test_hanging_probe_times_out(probes):
+    """A probe that does not answer within the timeout should count as failed."""
+    prober = _prober(timeout=0.05)
+
+    async def hang(model):
+        await asyncio.sleep(10)
+
+    probes["deepseek"].probe.side_effect = hang
+
+    result = await prober.probe("deepseek-chat")
+
+    assert result["status"] == "unhealthy"
+    assert "TimeoutError" in result["error"]
+
+async def test_providers_are_probed_in_parallel(probes):
+    """Background probes should run concurrently and stop cleanly."""
+    async def slow(model):
+        await asyncio.sleep(0.1)
+
+    probes["deepseek"].probe.side_effect = slow
+    probes["openai"].probe.side_effect = slow
+    prober = _prober(min_interval=10.0)
+
+    started = time.monotonic()
+    prober.start()
+    while len(prober.snapshot()) < 2:
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - started
+    await prober.stop()
+
+    assert elapsed < 0.18
+    assert set(prober.snapshot()) == {"deepseek-chat", "gpt-4o-mini"}
@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from ai_prompt_enhancement.core.config import Settings
+from ai_prompt_enhancement.services.model import provider_client as provider_client_module
+from ai_prompt_enhancement.services.model.call_metadata import collect_call_metadata
+from ai_prompt_enhancement.services.model.hedging import Hedger, LatencyWindow
+from ai_prompt_enhancement.services.model.model_factory import ModelFactory
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+from ai_prompt_enhancement.services.model.telemetry import TelemetryRegistry
+from ai_prompt_enhancement.services.model.usage_ledger import DEFAULT_PRICES, UsageLedger
+
+pytestmark = pytest.mark.asyncio
+
+KEY = "test:model"
+
+def _hedger(**overrides):
+    options = {"enabled": True, "percentile": 95, "max_rate": 1.0, "min_samples": 5}
+    options.update(overrides)
+    hedger = Hedger(**options)
+    for _ in range(40):
+        hedger._observe(KEY, 0.02)
+    return hedger
+
+def _call(delay, result, calls=None):
+    async def call():
+        if calls is not None:
+            calls.append(result)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f"{result} cancelled")
+            raise
+        return result
+    return call
+
+async def test_latency_window_percentile():
+    """Percentiles should use the nearest-rank method."""
+    window = LatencyWindow(size=100)
+    for value in range(1, 101):
+        window.add(value / 100)
+
+    assert window.percentile(95) == 0.95
+    assert window.percentile(50) == 0.5
+
+async def test_fast_primary_is_not_hedged():
+    """Calls finishing before the hedge delay should not fire a backup."""
+    hedger = _hedger()
+    calls = []
+
+    result = await hedger.run(KEY, _call(0.001, "primary", calls), _call(0, "backup", calls))
+
+    assert result == "primary"
+    assert calls == ["primary"]
+    assert hedger.stats()["providers"][KEY]["fired"] == 0
+
+async def test_slow_primary_is_hedged_and_cancelled():
+    """A straggling primary should be raced by a backup and cancelled when it loses."""
+    hedger = _hedger()
+    calls = []
+
+    with collect_call_metadata() as metadata:
+        result = await hedger.run(KEY, _call(1.0, "primary", calls), _call(0.01, "backup", calls))
+    await asyncio.sleep(0)
+
+    assert result == "backup"
+    assert "primary cancelled" in calls
+    assert metadata["hedges"] == 1 and metadata["hedge_won"] is True
+    stats = hedger.stats()["providers"][KEY]
+    assert stats["fired"] == 1 and stats["won"] == 1
+
+async def test_failed_backup_falls_back_to_primary():
+    """If the backup fails, the primary's response should still be used."""
+    hedger = _hedger()
+
+    async def failing_backup():
+        raise RuntimeError("backup failed")
+
+    result = await hedger.run(KEY, _call(0.1, "primary"), failing_backup)
+
+    assert result == "primary"
+    assert hedger.stats()["providers"][KEY]["won"] == 0
+
+async def test_hedge_rate_is_capped():
+    """Hedges should stop once the budget is used up."""
+    hedger = _hedger(max_rate=0.5, burst=1)
+
+    results = [await hedger.run(KEY, _call(0.1, "primary"), _call(0, "backup")) for _ in range(4)]
+
+    stats = hedger.stats()["providers"][KEY]
+    assert stats["fired"] == 2
+    assert stats["budget_exhausted"] == 2
+    assert results.count("backup") == 2
+
+async def test_disabled_hedger_only_runs_primary():
+    """With hedging disabled the backup must never run."""
+    hedger = _hedger(enabled=False)
+    calls = []
+
+    await hedger.run(KEY, _call(0.1, "primary", calls), _call(0, "backup", calls))
+
+    assert calls == ["primary"]
+
+async def test_alternate_model_usage_is_booked_under_alternate(monkeypatch):
+    """A backup served by the alternate model should be booked under that model, not the primary."""
+    hedger = _hedger()
+    ledger = UsageLedger(prices=DEFAULT_PRICES)
+    registry = TelemetryRegistry(Settings(telemetry_window_seconds=300, telemetry_max_samples=1000))
+    monkeypatch.setattr(provider_client_module, "hedger", hedger)
+    monkeypatch.setattr(provider_client_module, "usage_ledger", ledger)
+    monkeypatch.setattr(provider_client_module, "telemetry", registry)
+    monkeypatch.setattr(provider_client_module.get_settings(), "model_hedge_alternate_model", "gpt-4o-mini")
+
+    def client(provider, delay):
+        async def create(**kwargs):
+            await asyncio.sleep(delay)
+            return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10))
+
+        client = ProviderClient(api_key="test", base_url="http://localhost", provider=provider, mode="async")
+        client._client = MagicMock()
+        client._client.chat.completions.create = create
+        return client
+
+    primary = client("test", 1.0)
+    alternate = client("openai", 0.01)
+    monkeypatch.setattr(ModelFactory, "create_model_service", lambda model: SimpleNamespace(client=alternate))
+    hedger._windows["test:deepseek-chat"] = hedger._windows.pop(KEY)
+
+    with collect_call_metadata() as metadata:
+        await primary.create_chat_completion(model="deepseek-chat", messages=[])
+
+    assert metadata["hedge_won"] is True
+    assert [row["model"] for row in ledger.query(["model"])["rows"]] == ["gpt-4o-mini"]
+    assert metadata["cost_usd"] == pytest.approx(ledger.cost("gpt-4o-mini", 100, 10))
+    assert registry.models() == ["gpt-4o-mini"]
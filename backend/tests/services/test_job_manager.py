@@ -0,0 +1,258 @@
+import asyncio
+import io
+import json
+import os
+import pytest
+import threading
+from types import SimpleNamespace
+
+from ai_prompt_enhancement.services.jobs import job_kinds
+from ai_prompt_enhancement.services.jobs.job_manager import (
+    CANCELLED,
+    COMPLETED,
+    RUNNING,
+    JobError,
+    JobManager,
+)
+from ai_prompt_enhancement.services.jobs.job_store import JobStore
+from ai_prompt_enhancement.services.model.deepseek_service import DeepseekService
+from ai_prompt_enhancement.services.model.model_factory import model_factory
+from ai_prompt_enhancement.services.synthetic_data import generation_service
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeKind:
+    """Job kind whose row i yields {"value": 2 * i} after the spec's delay, recording every run row."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def run(self, job, done):
+        for index in range(job["total"]):
+            if index in done:
+                continue
+            self.calls.append(index)
+            await asyncio.sleep(job["spec"].get("delay", 0))
+            yield index, {"value": index * 2}
+
+    def summarize(self, rows):
+        return {"sum": sum(row["value"] for row in rows)}
+
+
+def make_manager(root, kind, workers=1):
+    manager = JobManager(JobStore(str(root)), workers=workers, keepalive_seconds=0.05)
+    manager.register("fake", kind.run, kind.summarize)
+    return manager
+
+async def wait_for(manager, job_id, *statuses, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while manager.get(job_id)["status"] not in statuses:
+        assert asyncio.get_running_loop().time() < deadline, manager.get(job_id)
+        await asyncio.sleep(0.01)
+    return manager.get(job_id)
+
+async def test_job_runs_and_checkpoints_rows(tmp_path):
+    """A submitted job should run every row, checkpoint it and persist its summary."""
+    kind = FakeKind()
+    manager = make_manager(tmp_path, kind)
+    manager.start()
+    try:
+        job = await manager.submit("fake", {}, total=5)
+        job = await wait_for(manager, job["id"], COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert job["completed"] == 5 and job["summary"] == {"sum": 20}
+    assert sorted(row["index"] for row in manager.rows(job["id"])) == [0, 1, 2, 3, 4]
+    assert make_manager(tmp_path, FakeKind()).get(job["id"])["status"] == COMPLETED
+
+async def test_checkpoints_run_off_the_event_loop(tmp_path, monkeypatch):
+    """Job records should be saved, and rows checkpointed and summarized, on the store thread."""
+    kind = FakeKind()
+    manager = make_manager(tmp_path, kind)
+    threads = []
+    append_row = manager.store.append_row
+    def recording_append_row(*args):
+        threads.append(threading.current_thread())
+        append_row(*args)
+    monkeypatch.setattr(manager.store, "append_row", recording_append_row)
+    monkeypatch.setattr(kind, "summarize", lambda rows: threads.append(threading.current_thread()) or {})
+    saves = []
+    save = manager.store.save
+    monkeypatch.setattr(manager.store, "save", lambda job: saves.append(threading.current_thread()) or save(job))
+    manager.register("fake", kind.run, kind.summarize)
+    manager.start()
+    try:
+        job = await manager.submit("fake", {}, total=5)
+        await wait_for(manager, job["id"], COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert len(threads) == 6 and len(saves) == 3
+    assert threading.main_thread() not in threads and len(set(threads + saves)) == 1
+
+async def test_restart_resumes_from_checkpoint(tmp_path):
+    """An unfinished job should resume after a restart without repeating checkpointed rows."""
+    store = JobStore(str(tmp_path))
+    job = {"id": "job1", "kind": "fake", "spec": {}, "status": RUNNING, "total": 5, "completed": 0, "failed": 0,
+           "summary": None, "error": None, "created_at": "2024-01-01T00:00:00", "started_at": None, "finished_at": None}
+    store.save(job)
+    for index in (0, 1, 2):
+        store.append_row("job1", index, {"value": index * 2})
+    with open(os.path.join(store.job_dir("job1"), "rows.jsonl"), "a") as f:
+        f.write('{"index": 3, "val')  # torn by a crash
+
+    kind = FakeKind()
+    manager = make_manager(tmp_path, kind)
+    assert manager.get("job1")["completed"] == 3
+    manager.start()
+    try:
+        job = await wait_for(manager, "job1", COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert kind.calls == [3, 4]
+    assert job["summary"] == {"sum": 20}
+    assert sorted(row["index"] for row in manager.rows("job1")) == [0, 1, 2, 3, 4]
+
+async def test_shutdown_leaves_job_to_resume(tmp_path):
+    """Stopping the workers mid-job should keep it running on disk and resume it on the next start."""
+    first = FakeKind()
+    manager = make_manager(tmp_path, first)
+    manager.start()
+    job = await manager.submit("fake", {"delay": 0.02}, total=20)
+    while manager.get(job["id"])["completed"] < 3:
+        await asyncio.sleep(0.01)
+    await manager.stop()
+    assert JobStore(str(tmp_path)).load(job["id"])["status"] == RUNNING
+
+    second = FakeKind()
+    resumed = make_manager(tmp_path, second, workers=2)
+    resumed.start()
+    try:
+        await wait_for(resumed, job["id"], COMPLETED)
+    finally:
+        await resumed.stop()
+
+    assert not set(first.calls[:-1]) & set(second.calls)
+    assert sorted(row["index"] for row in resumed.rows(job["id"])) == list(range(20))
+
+async def test_cancel_running_and_queued_jobs(tmp_path):
+    """Cancelling should stop a running job, keep its completed rows, and skip a queued job."""
+    kind = FakeKind()
+    manager = make_manager(tmp_path, kind)
+    manager.start()
+    try:
+        running = await manager.submit("fake", {"delay": 0.02}, total=100)
+        queued = await manager.submit("fake", {}, total=3)
+        while manager.get(running["id"])["completed"] < 2:
+            await asyncio.sleep(0.01)
+
+        assert (await manager.cancel(queued["id"]))["status"] == CANCELLED
+        assert (await manager.cancel(running["id"]))["status"] == CANCELLED
+        with pytest.raises(JobError):
+            await manager.cancel(running["id"])
+        await asyncio.sleep(0.05)
+    finally:
+        await manager.stop()
+
+    rows = list(manager.rows(running["id"]))
+    assert 2 <= len(rows) < 100
+    assert list(manager.rows(queued["id"])) == []
+    assert make_manager(tmp_path, FakeKind()).get(running["id"])["status"] == CANCELLED
+
+async def test_events_follow_progress_until_done(tmp_path):
+    """Subscribers should get progress snapshots and finally the finished job."""
+    manager = make_manager(tmp_path, FakeKind())
+    manager.start()
+    try:
+        job = await manager.submit("fake", {"delay": 0.01}, total=10)
+        snapshots = [snapshot async for snapshot in manager.events(job["id"])]
+    finally:
+        await manager.stop()
+
+    progress = [snapshot["completed"] for snapshot in snapshots]
+    assert progress == sorted(progress)
+    assert snapshots[-1]["status"] == COMPLETED and snapshots[-1]["completed"] == 10
+
+async def test_evaluation_job(tmp_path, monkeypatch, mock_deepseek_service):
+    """An evaluation job should store the CSV, evaluate every row and summarize the batch."""
+    monkeypatch.setattr(model_factory, "create_model_service", lambda *args, **kwargs: mock_deepseek_service)
+    manager = JobManager(JobStore(str(tmp_path)), workers=1)
+    manager.register(job_kinds.EVALUATION, job_kinds.run_evaluation_job, job_kinds.summarize_evaluation_job)
+    monkeypatch.setattr(job_kinds, "job_manager", manager)
+    criteria = [{"name": "clarity", "weight": 1.0, "description": "Measures clarity", "threshold": 0.8}]
+
+    with pytest.raises(ValueError):
+        await job_kinds.submit_evaluation_job(io.BytesIO(b"text\nhello"), criteria)
+    assert os.listdir(tmp_path) == []
+
+    job = await job_kinds.submit_evaluation_job(io.BytesIO(b"prompt\na\nb\n\"\""), criteria, concurrency=2)
+    assert job["total"] == 3
+    manager.start()
+    try:
+        job = await wait_for(manager, job["id"], COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert job["failed"] == 1
+    assert job["summary"] == {"total_prompts": 3, "passed_prompts": 2, "failed_prompts": 1, "average_score": 0.85,
+                              "duplicate_prompts": 0, "memo_hits": 0, "llm_calls_saved": 0}
+
+async def test_generation_job(tmp_path, monkeypatch):
+    """A generation job should make one call per batch, grouped in the job's session, refreshing after the first."""
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        return {"id": str(len(calls)), "data": [{"content": "x"}] * kwargs["batch_size"], "generation_time": 0.5}
+
+    monkeypatch.setattr(job_kinds.generator, "generate_synthetic_data", generate)
+    manager = JobManager(JobStore(str(tmp_path)), workers=1)
+    manager.register(job_kinds.GENERATION, job_kinds.run_generation_job, job_kinds.summarize_generation_job)
+    monkeypatch.setattr(job_kinds, "job_manager", manager)
+
+    job = await job_kinds.submit_generation_job({"template": "t", "model": "gpt-4o-mini", "batch_size": 2, "batches": 3})
+    manager.start()
+    try:
+        job = await wait_for(manager, job["id"], COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert job["summary"] == {"batches": 3, "failed_batches": 0, "generated_items": 6, "generation_time": 1.5}
+    assert {call["session_id"] for call in calls} == {job["id"]}
+    assert sorted(call["force_refresh"] for call in calls) == [False, True, True]
+
+async def test_generation_job_batches_get_distinct_data(tmp_path, monkeypatch):
+    """Concurrent batches of a generation job should each make their own provider call through the real services."""
+    service = DeepseekService()
+    upstream = []
+
+    async def create_chat_completion(**kwargs):
+        upstream.append(kwargs)
+        content = f"item {len(upstream)}"
+        await asyncio.sleep(0.02)
+        message = SimpleNamespace(content=json.dumps({"item": {"content": content, "score": 0.9}}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    monkeypatch.setattr(service.client, "create_chat_completion", create_chat_completion)
+    monkeypatch.setattr(model_factory, "create_model_service", lambda *args, **kwargs: service)
+    monkeypatch.setattr(generation_service.history_service, "add_entry", lambda **kwargs: None)
+    manager = JobManager(JobStore(str(tmp_path)), workers=1)
+    manager.register(job_kinds.GENERATION, job_kinds.run_generation_job, job_kinds.summarize_generation_job)
+    monkeypatch.setattr(job_kinds, "job_manager", manager)
+
+    job = await job_kinds.submit_generation_job({
+        "template": f"Same template {tmp_path}", "model": "deepseek-chat", "batch_size": 1,
+        "batches": 4, "concurrency": 4, "force_refresh": True,
+    })
+    manager.start()
+    try:
+        job = await wait_for(manager, job["id"], COMPLETED)
+    finally:
+        await manager.stop()
+
+    assert len(upstream) == 4
+    contents = {row["result"]["data"][0]["content"] for row in manager.rows(job["id"])}
+    assert contents == {"item 1", "item 2", "item 3", "item 4"}
@@ -0,0 +1,68 @@
+import json
+import pytest
+
+from ai_prompt_enhancement.services.model.json_parser import IncrementalJSONParser, parse_model_json
+
+@pytest.fixture
+def analysis_response():
+    """Fixture for a model analysis response as raw text."""
+    return json.dumps({
+        "metrics": {
+            "clarity": {"score": 0.8, "description": "Clear {braces} and \"quotes\"", "suggestions": ["a"]},
+            "structure": {"score": 0.6, "description": "Ok", "suggestions": []}
+        },
+        "suggestions": ["Add examples"],
+        "enhanced_prompt": "Enhanced"
+    }, indent=2)
+
+def test_reports_metrics_as_they_complete(analysis_response):
+    """Each watched metric should be reported once its object closes."""
+    parser = IncrementalJSONParser(watch=[("metrics", "*")])
+    completed = []
+    for start in range(0, len(analysis_response), 7):
+        completed.extend(parser.feed(analysis_response[start:start + 7]))
+
+    assert [path for path, _ in completed] == [("metrics", "clarity"), ("metrics", "structure")]
+    assert completed[0][1]["description"] == 'Clear {braces} and "quotes"'
+    assert parser.done
+
+def test_metric_reported_before_stream_ends(analysis_response):
+    """A metric must be available before the rest of the document arrives."""
+    parser = IncrementalJSONParser(watch=[("metrics", "*")])
+    cutoff = analysis_response.index('"structure"')
+
+    completed = parser.feed(analysis_response[:cutoff])
+
+    assert [path for path, _ in completed] == [("metrics", "clarity")]
+    assert not parser.done
+
+def test_ignores_leading_markdown_fence(analysis_response):
+    """Text before the JSON document should be skipped."""
+    parser = IncrementalJSONParser(watch=[("metrics", "*")])
+    completed = parser.feed("```json\n" + analysis_response + "\n```")
+
+    assert len(completed) == 2
+
+def test_parse_plain_json(analysis_response):
+    """Well-formed output should parse exactly like json.loads."""
+    assert parse_model_json(analysis_response) == json.loads(analysis_response)
+
+def test_parse_fenced_json_with_trailing_commas():
+    """Markdown fences and trailing commas should be tolerated."""
+    text = '```json\n{"suggestions": ["a", "b",], "score": 0.5,}\n```'
+
+    assert parse_model_json(text) == {"suggestions": ["a", "b"], "score": 0.5}
+
+@pytest.mark.parametrize("cutoff", ['"structure"', '"score": 0.6', '"Ok"', '"Add examples"', '"enhanced_prompt"'])
+def test_parse_truncated_output(analysis_response, cutoff):
+    """Output cut off mid-document should keep everything completed so far."""
+    text = analysis_response[:analysis_response.index(cutoff) + len(cutoff) - 2]
+
+    result = parse_model_json(text)
+
+    assert result["metrics"]["clarity"]["score"] == 0.8
+
+def test_parse_rejects_text_without_json():
+    """Text without any JSON document should raise a decode error."""
+    with pytest.raises(json.JSONDecodeError):
+        parse_model_json("I cannot help with that.")
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+
+from ai_prompt_enhancement.services.model.micro_batcher import MicroBatcher
+from ai_prompt_enhancement.services.model.prompt_messages import (
+    ANALYSIS_SYSTEM_PROMPT,
+    packed_analysis_messages,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeAnalyzeService:
+    """Model service double recording single and packed analyze calls."""
+
+    def __init__(self, fail_packed=False, drop=()):
+        self.fail_packed = fail_packed
+        self.drop = set(drop)
+        self.single_calls = []
+        self.packed_calls = []
+
+    async def analyze_prompt(self, prompt, context=None):
+        self.single_calls.append(prompt)
+        return {"original_prompt": prompt, "enhanced_prompt": f"single: {prompt}", "metadata": {"provider_calls": 1}}
+
+    async def analyze_prompts_packed(self, requests):
+        self.packed_calls.append([prompt for prompt, _ in requests])
+        if self.fail_packed:
+            raise ValueError("Packed analysis response has no results array")
+        return {
+            "results": [
+                None if prompt in self.drop else {"original_prompt": prompt, "enhanced_prompt": f"packed: {prompt}"}
+                for prompt, _ in requests
+            ],
+            "metadata": {"provider_calls": 1, "prompt_tokens": 900},
+        }
+
+
+def make_batcher(**overrides):
+    options = {"enabled": True, "window_seconds": 0.01, "max_size": 4, "max_tokens": 4000}
+    options.update(overrides)
+    return MicroBatcher(**options)
+
+async def test_concurrent_requests_share_one_packed_call():
+    """Requests arriving in the same window should be answered from one provider call."""
+    batcher, service = make_batcher(), FakeAnalyzeService()
+
+    results = await asyncio.gather(*(batcher.analyze(service, f"prompt {i}") for i in range(3)))
+
+    assert service.packed_calls == [["prompt 0", "prompt 1", "prompt 2"]]
+    assert service.single_calls == []
+    assert [result["enhanced_prompt"] for result in results] == [f"packed: prompt {i}" for i in range(3)]
+    assert results[0]["metadata"]["batch_size"] == 3
+    assert results[0]["metadata"]["batch_usage"] == {"prompt_tokens": 900}
+    assert all("prompt_tokens" not in result["metadata"] for result in results)
+    assert batcher.stats()["packed_requests"] == 3
+
+async def test_single_request_uses_normal_call():
+    """A request alone in its window should be sent as a regular analyze call."""
+    batcher, service = make_batcher(), FakeAnalyzeService()
+
+    result = await batcher.analyze(service, "lonely prompt")
+
+    assert service.packed_calls == []
+    assert result["enhanced_prompt"] == "single: lonely prompt"
+
+async def test_failed_packed_call_falls_back_to_single_calls():
+    """Every request of a failed packed call should be retried on its own."""
+    batcher, service = make_batcher(), FakeAnalyzeService(fail_packed=True)
+
+    results = await asyncio.gather(batcher.analyze(service, "a"), batcher.analyze(service, "b"))
+
+    assert sorted(service.single_calls) == ["a", "b"]
+    assert [result["enhanced_prompt"] for result in results] == ["single: a", "single: b"]
+    assert batcher.stats()["fallbacks"] == 1
+
+async def test_missing_results_are_retried_individually():
+    """Only the requests the model left out of a packed answer should be re-sent."""
+    batcher, service = make_batcher(), FakeAnalyzeService(drop={"b"})
+
+    results = await asyncio.gather(*(batcher.analyze(service, prompt) for prompt in ("a", "b", "c")))
+
+    assert service.single_calls == ["b"]
+    assert [result["enhanced_prompt"] for result in results] == ["packed: a", "single: b", "packed: c"]
+
+async def test_size_and_token_limits_flush_early():
+    """A batch should be sent once full, and a request over the token budget should start a new one."""
+    batcher, service = make_batcher(max_size=2, window_seconds=10), FakeAnalyzeService()
+
+    await asyncio.wait_for(asyncio.gather(batcher.analyze(service, "a"), batcher.analyze(service, "b")), timeout=1)
+    assert service.packed_calls == [["a", "b"]]
+
+    batcher, service = make_batcher(max_tokens=50, window_seconds=0.01), FakeAnalyzeService()
+    await asyncio.gather(batcher.analyze(service, "x" * 120), batcher.analyze(service, "y" * 120))
+    assert service.packed_calls == []
+    assert len(service.single_calls) == 2
+
+async def test_identical_requests_are_packed_once():
+    """Identical concurrent requests should occupy a single slot of the batch."""
+    batcher, service = make_batcher(), FakeAnalyzeService()
+
+    results = await asyncio.gather(batcher.analyze(service, "same"), batcher.analyze(service, "same"),
+                                   batcher.analyze(service, "other"))
+
+    assert service.packed_calls == [["same", "other"]]
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert batcher.stats()["deduplicated"] == 1
+
+async def test_disabled_batcher_calls_service_directly():
+    """With batching off every request should be a regular analyze call."""
+    batcher, service = make_batcher(enabled=False), FakeAnalyzeService()
+
+    await asyncio.gather(batcher.analyze(service, "a"), batcher.analyze(service, "b"))
+
+    assert service.packed_calls == []
+    assert service.single_calls == ["a", "b"]
+
+async def test_packed_messages_extend_the_analysis_prefix():
+    """Packed requests should reuse the cached single-analysis instructions as their prefix."""
+    messages = packed_analysis_messages([{"id": "0", "prompt": "p", "context": None}])
+
+    assert messages[0]["content"].startswith(ANALYSIS_SYSTEM_PROMPT)
+    assert '"id": "0"' in messages[-1]["content"]
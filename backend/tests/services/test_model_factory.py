@@ -0,0 +1,32 @@
+import pytest
+
+from ai_prompt_enhancement.services.model.model_factory import ModelFactory
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+async def clean_registry():
+    """Start and finish every test with an empty service registry."""
+    await ModelFactory.close()
+    yield
+    await ModelFactory.close()
+
+async def test_services_are_pooled_per_provider():
+    """The same provider should always be served by one shared instance."""
+    chat = ModelFactory.create_model_service("deepseek-chat")
+    reasoner = ModelFactory().create_model_service("deepseek-reasoner")
+
+    assert chat is reasoner
+
+async def test_unsupported_model():
+    """Unknown models should be rejected."""
+    with pytest.raises(ValueError):
+        ModelFactory.create_model_service("unknown-model")
+
+async def test_close_drops_pooled_services():
+    """Closing the factory should release the pooled instances."""
+    first = ModelFactory.create_model_service("deepseek-chat")
+    await ModelFactory.close()
+    second = ModelFactory.create_model_service("deepseek-chat")
+
+    assert first is not second
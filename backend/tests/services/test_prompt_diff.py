@@ -0,0 +1,91 @@
+import random
+import re
+import time
+import pytest
+
+from ai_prompt_enhancement.services.model.prompt_messages import COMPARISON_SYSTEM_PROMPT
+from ai_prompt_enhancement.services.prompt_refinement.prompt_diff import (
+    STYLES,
+    diff_prompts,
+    highlight_comparison,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def spans(html, style):
+    return re.findall(rf"<span style='{re.escape(STYLES[style])}'>(.*?)</span>", html)
+
+def strip_tags(html):
+    return re.sub(r"<[^>]+>", "", html).replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+async def test_identical_prompts_have_no_highlights():
+    """Unchanged prompts should be rendered as plain text."""
+    diff = diff_prompts("Write a poem.", "Write a poem.")
+
+    assert diff.enhanced_html == "Write a poem."
+    assert diff.inserted == diff.replaced == diff.removed == diff.moved == 0
+
+async def test_insertions_and_rewordings_are_highlighted():
+    """Added words should be green in the enhanced prompt; reworded words purple, and struck in the original."""
+    diff = diff_prompts("Write a short poem about cats.", "Write a long poem about cats in three stanzas.")
+
+    assert spans(diff.enhanced_html, "replaced") == ["long"]
+    assert spans(diff.enhanced_html, "inserted") == ["in three stanzas"]
+    assert spans(diff.original_html, "removed") == ["short"]
+
+async def test_moved_runs_are_detected():
+    """A sentence moved elsewhere should be marked as moved in both prompts, not removed and added."""
+    original = "Summarize the article. Use a formal tone throughout the text."
+    enhanced = "Use a formal tone throughout the text. Summarize the article in five bullet points."
+
+    diff = diff_prompts(original, enhanced)
+
+    assert diff.moved == 3
+    assert spans(diff.original_html, "moved") == spans(diff.enhanced_html, "moved") == ["Summarize the article"]
+    assert spans(diff.enhanced_html, "inserted") == ["in five bullet points."]
+
+async def test_long_reordered_prompt_diffs_quickly():
+    """Move detection on a reordered and partly rewritten prompt of thousands of words should stay fast."""
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(400)] + ["the", "a", "of", "and", "to"] * 40
+    sentences = [" ".join(rng.choice(vocabulary) for _ in range(12)) + "." for _ in range(250)]
+    reordered = rng.sample(sentences, len(sentences))
+    rewritten = [" ".join(word if rng.random() > 0.15 else f"new{word}" for word in sentence.split())
+                 for sentence in reordered]
+
+    started = time.perf_counter()
+    diff = diff_prompts(" ".join(sentences), " ".join(rewritten))
+
+    assert time.perf_counter() - started < 2.0
+    assert diff.moved > 1000
+
+async def test_text_and_whitespace_are_preserved_and_escaped():
+    """Removing the markup should give back the exact prompt, with HTML in the prompt escaped."""
+    original = "Return <json>\n\n- one item"
+    enhanced = "Return <json> only\n\n- one  item\n- two items & more"
+
+    diff = diff_prompts(original, enhanced)
+
+    assert "<json>" not in diff.enhanced_html
+    assert strip_tags(diff.enhanced_html) == enhanced
+    assert strip_tags(diff.original_html) == original
+
+async def test_comparison_results_get_local_highlights():
+    """Both prompt versions should get a highlighted prompt, replacing model-written HTML."""
+    comparison = {
+        "original_prompt": {"prompt": "Write a poem", "metrics": {}},
+        "enhanced_prompt": {"prompt": "Write a rhyming poem", "metrics": {}, "highlighted prompt": "<b>old</b>"},
+    }
+
+    highlight_comparison(comparison)
+
+    assert spans(comparison["enhanced_prompt"]["highlighted_prompt"], "inserted") == ["rhyming"]
+    assert comparison["original_prompt"]["highlighted_prompt"] == "Write a poem"
+    assert "highlighted prompt" not in comparison["enhanced_prompt"]
+    assert highlight_comparison({"error": "failed"}) == {"error": "failed"}
+
+async def test_comparison_template_no_longer_requests_html():
+    """The model should not be asked to write highlighted HTML any more."""
+    assert "highlighted" not in COMPARISON_SYSTEM_PROMPT
+    assert "<span" not in COMPARISON_SYSTEM_PROMPT
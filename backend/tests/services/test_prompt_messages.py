@@ -0,0 +1,50 @@
+import json
+import pytest
+
+from ai_prompt_enhancement.core.config import Settings
+from ai_prompt_enhancement.services.model.prompt_messages import (
+    analysis_messages,
+    comparison_messages,
+    generation_messages,
+)
+from ai_prompt_enhancement.services.model.telemetry import TelemetryRegistry
+
+pytestmark = pytest.mark.asyncio
+
+async def test_static_instructions_form_a_stable_prefix():
+    """Requests for different prompts should share everything but the last message."""
+    first = analysis_messages("Write a haiku about autumn", "Poetry class")
+    second = analysis_messages("Summarize this article {with braces}")
+
+    assert first[:-1] == second[:-1]
+    assert "haiku" not in first[0]["content"]
+    assert first[-1]["role"] == "user" and "Write a haiku about autumn" in first[-1]["content"]
+    assert "{with braces}" in second[-1]["content"]
+    assert "No additional context provided" in second[-1]["content"]
+
+async def test_system_prompts_have_no_template_artifacts():
+    """Static prompts are sent verbatim, so they must not contain escaped braces or placeholders."""
+    for messages in (analysis_messages("p"), comparison_messages({"original_prompt": "p"}), generation_messages("t")):
+        system = messages[0]["content"]
+        assert "{{" not in system and "}}" not in system
+        assert "{prompt}" not in system and "{context}" not in system
+
+async def test_comparison_payload_goes_last():
+    """The comparison input should be the JSON user message after the static instructions."""
+    payload = {"original_prompt": "a", "enhanced_prompt": "b"}
+    first = comparison_messages(payload)
+    second = comparison_messages({"original_prompt": "c", "enhanced_prompt": "d"})
+
+    assert first[0] == second[0]
+    assert json.loads(first[-1]["content"]) == payload
+
+async def test_telemetry_reports_prompt_cache_hit_rate():
+    """Cached prompt tokens reported by the provider should be tracked per model."""
+    registry = TelemetryRegistry(Settings(telemetry_window_seconds=300))
+    registry.record("deepseek-chat", 1.0, prompt_tokens=1000, completion_tokens=10, cached_tokens=900)
+    registry.record("deepseek-chat", 1.0, prompt_tokens=1000, completion_tokens=10, cached_tokens=0)
+
+    status = registry.status("deepseek-chat")
+
+    assert status["cached_tokens"] == 900
+    assert status["prompt_cache_hit_rate"] == 0.45
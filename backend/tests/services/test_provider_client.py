@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+
+pytestmark = pytest.mark.asyncio
+
+async def test_async_mode_awaits_async_client():
+    """Async mode should await the AsyncOpenAI client directly."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", mode="async")
+    client._client = MagicMock()
+    client._client.chat.completions.create = AsyncMock(return_value="response")
+
+    result = await client.create_chat_completion(model="deepseek-chat", messages=[])
+
+    assert result == "response"
+    client._client.chat.completions.create.assert_awaited_once_with(model="deepseek-chat", messages=[])
+
+async def test_thread_mode_does_not_block_event_loop():
+    """Thread mode should run blocking calls off the event loop thread."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", mode="thread", thread_pool_size=8)
+    loop_thread = threading.get_ident()
+    call_threads = []
+
+    def blocking_create(**kwargs):
+        call_threads.append(threading.get_ident())
+        time.sleep(0.2)
+        return kwargs["model"]
+
+    client._client = MagicMock()
+    client._client.chat.completions.create.side_effect = blocking_create
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.create_chat_completion(model=f"m{i}") for i in range(8)))
+    elapsed = time.perf_counter() - start
+
+    assert results == [f"m{i}" for i in range(8)]
+    assert loop_thread not in call_threads
+    assert elapsed < 1.0
+    await client.close()
+
+async def test_invalid_mode_rejected():
+    """Unknown client modes should be rejected."""
+    with pytest.raises(ValueError):
+        ProviderClient(api_key="test", base_url="http://localhost", mode="blocking")
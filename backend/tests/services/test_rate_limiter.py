@@ -0,0 +1,96 @@
+import asyncio
+import time
+import pytest
+
+from ai_prompt_enhancement.services.model.rate_limiter import ProviderLimiter, estimate_tokens
+
+pytestmark = pytest.mark.asyncio
+
+async def test_window_bounds_in_flight_calls():
+    """No more calls than the concurrency window should run at once."""
+    limiter = ProviderLimiter("test", rpm=10_000, tpm=1_000_000, max_concurrency=3, initial_concurrency=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        permit = await limiter.acquire(10)
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0.02)
+        limiter.release(permit)
+
+    await asyncio.gather(*(call() for _ in range(10)))
+
+    assert peak == 3
+    assert limiter.stats()["admitted"] == 10
+
+async def test_callers_admitted_in_arrival_order():
+    """Queued callers should be served first come, first served."""
+    limiter = ProviderLimiter("test", rpm=10_000, tpm=1_000_000, max_concurrency=1)
+    order = []
+
+    async def call(i):
+        permit = await limiter.acquire(1)
+        order.append(i)
+        await asyncio.sleep(0.005)
+        limiter.release(permit)
+
+    await asyncio.gather(*(call(i) for i in range(5)))
+
+    assert order == [0, 1, 2, 3, 4]
+
+async def test_request_budget_delays_instead_of_failing():
+    """Calls beyond the RPM budget should wait for the bucket to refill."""
+    limiter = ProviderLimiter("test", rpm=600, tpm=1_000_000, max_concurrency=10)
+    limiter.requests.tokens = 1
+
+    start = time.monotonic()
+    for _ in range(2):
+        limiter.release(await limiter.acquire(1))
+
+    # 600 rpm refills one request every 0.1s
+    assert time.monotonic() - start >= 0.09
+
+async def test_token_budget_reconciled_with_usage():
+    """Unused estimated tokens should be returned to the budget."""
+    limiter = ProviderLimiter("test", rpm=600, tpm=1000, max_concurrency=10)
+
+    permit = await limiter.acquire(800)
+    limiter.release(permit, tokens_used=100)
+
+    assert limiter.tokens.tokens == pytest.approx(900, abs=1)
+
+async def test_throttling_shrinks_window_once_per_burst():
+    """A burst of 429s should halve the window once, then successes grow it back."""
+    limiter = ProviderLimiter("test", rpm=10_000, tpm=1_000_000, max_concurrency=8)
+    permits = [await limiter.acquire(1) for _ in range(4)]
+
+    for permit in permits:
+        limiter.release(permit, throttled=True)
+
+    assert limiter.window == 4
+    assert limiter.stats()["decreases"] == 1
+
+    limiter.release(await limiter.acquire(1))
+    assert limiter.window == pytest.approx(4.25)
+
+async def test_cancelled_waiter_leaves_queue():
+    """A caller cancelled while queued should not hold up the ones behind it."""
+    limiter = ProviderLimiter("test", rpm=10_000, tpm=1_000_000, max_concurrency=1)
+    held = await limiter.acquire(1)
+    cancelled = asyncio.ensure_future(limiter.acquire(1))
+    waiting = asyncio.ensure_future(limiter.acquire(1))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    limiter.release(held)
+
+    permit = await asyncio.wait_for(waiting, 1)
+    limiter.release(permit)
+    assert limiter.in_flight == 0
+
+async def test_estimate_tokens():
+    """Token estimates should cover prompt characters and the output cap."""
+    messages = [{"role": "user", "content": "x" * 400}]
+
+    assert estimate_tokens(messages, 50) == 150
@@ -0,0 +1,110 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from ai_prompt_enhancement.services.core import result_cache as result_cache_module
+from ai_prompt_enhancement.services.core.result_cache import ResultCache
+from ai_prompt_enhancement.services.prompt_service import PromptService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def cache():
+    """Fixture for a small, empty result cache."""
+    return ResultCache(ttl_seconds=60, max_entries=2)
+
+@pytest.fixture
+def model_service():
+    """Fixture for a model service returning a fixed analysis."""
+    service = MagicMock()
+    service.analyze_prompt = AsyncMock(return_value={
+        "metrics": {"clarity": {"score": 0.8, "description": "Clear", "suggestions": []}},
+        "suggestions": ["Add examples"],
+        "enhanced_prompt": "Enhanced",
+    })
+    return service
+
+@pytest.fixture
+def prompt_service(monkeypatch, cache, model_service):
+    """Fixture for PromptService wired to a fresh cache and the fake model service."""
+    monkeypatch.setattr("ai_prompt_enhancement.services.prompt_service.result_cache", cache)
+    service = PromptService(storage_service=MagicMock())
+    service.model_factory = MagicMock()
+    service.model_factory.resolve_model_service.side_effect = lambda model: (model, model_service)
+    return service
+
+async def test_key_ignores_whitespace_differences():
+    """Prompts differing only in whitespace should share a key."""
+    first = ResultCache.make_key("analyze", "deepseek-chat", "v1", "Write  a\n poem", None)
+    second = ResultCache.make_key("analyze", "deepseek-chat", "v1", " Write a poem ", None)
+
+    assert first == second
+    assert first != ResultCache.make_key("analyze", "gpt-4", "v1", "Write a poem", None)
+    assert first != ResultCache.make_key("analyze", "deepseek-chat", "v2", "Write a poem", None)
+
+async def test_hit_and_miss_counters(cache):
+    """Lookups should be counted per operation."""
+    cache.get("analyze", "key")
+    cache.set("key", {"value": 1})
+    assert cache.get("analyze", "key") == {"value": 1}
+
+    assert cache.stats()["operations"]["analyze"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+async def test_lru_eviction(cache):
+    """The least recently used entry should be evicted when the cache is full."""
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("analyze", "a")
+    cache.set("c", 3)
+
+    assert cache.get("analyze", "b") is None
+    assert cache.get("analyze", "a") == 1
+
+async def test_expired_entries_are_dropped(monkeypatch, cache):
+    """Entries older than the TTL should be treated as misses."""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+    cache.set("a", 1)
+    now[0] += 61
+
+    assert cache.get("analyze", "a") is None
+    assert cache.stats()["entries"] == 0
+
+async def test_repeated_analysis_served_from_cache(prompt_service, model_service):
+    """A second identical analysis should not call the model."""
+    request = {"prompt_text": "Write a poem", "model": "deepseek-chat"}
+
+    first = await prompt_service.analyze_prompt(request)
+    second = await prompt_service.analyze_prompt({"prompt_text": "Write  a poem ", "model": "deepseek-chat"})
+
+    assert model_service.analyze_prompt.await_count == 1
+    assert second == first
+
+async def test_cache_hit_does_not_replay_call_metadata(cache):
+    """A hit should report a cached result with no cost rather than the original call's metadata."""
+    cache.set("a", {"value": 1, "metadata": {"attempts": 3, "cost_usd": 0.02}})
+
+    hit = cache.get("analyze", "a")
+
+    assert hit["metadata"]["cached"] is True
+    assert hit["metadata"]["attempts"] == 0 and hit["metadata"]["cost_usd"] == 0.0
+
+async def test_force_refresh_bypasses_cache(prompt_service, model_service):
+    """force_refresh should always call the model."""
+    request = {"prompt_text": "Write a poem", "model": "deepseek-chat"}
+
+    await prompt_service.analyze_prompt(request)
+    await prompt_service.analyze_prompt({**request, "force_refresh": True})
+
+    assert model_service.analyze_prompt.await_count == 2
+
+async def test_error_results_are_not_cached(prompt_service, model_service):
+    """Error payloads from the model service should not be cached."""
+    model_service.analyze_prompt.return_value = {
+        "metrics": {}, "suggestions": [], "enhanced_prompt": "", "error": "API request failed"
+    }
+    request = {"prompt_text": "Write a poem", "model": "deepseek-chat"}
+
+    await prompt_service.analyze_prompt(request)
+    await prompt_service.analyze_prompt(request)
+
+    assert model_service.analyze_prompt.await_count == 2
@@ -0,0 +1,94 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+from ai_prompt_enhancement.services.model import retry as retry_module
+from ai_prompt_enhancement.services.model.call_metadata import collect_call_metadata
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+from ai_prompt_enhancement.services.model.retry import RetryPolicy, is_retryable, retry_after
+
+pytestmark = pytest.mark.asyncio
+
+def _error(cls, status, headers=None):
+    request = httpx.Request("POST", "http://localhost/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls(f"HTTP {status}", response=response, body=None)
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(retry_module.asyncio, "sleep", fake_sleep)
+    return delays
+
+async def test_classifies_retryable_errors():
+    """Rate limits and server errors are transient, bad requests are not."""
+    assert is_retryable(_error(RateLimitError, 429))
+    assert is_retryable(_error(InternalServerError, 503))
+    assert not is_retryable(_error(BadRequestError, 400))
+    assert not is_retryable(ValueError("bad json"))
+
+async def test_parses_retry_after_headers():
+    """Both delta-seconds, millisecond and HTTP-date hints should be understood."""
+    assert retry_after(_error(RateLimitError, 429, {"retry-after": "3"})) == 3.0
+    assert retry_after(_error(RateLimitError, 429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(_error(RateLimitError, 429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after(_error(RateLimitError, 429)) is None
+
+async def test_retries_transient_errors_until_success(no_sleep):
+    """Transient failures should be retried and counted in the call metadata."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8, deadline=60)
+    operation = AsyncMock(side_effect=[_error(InternalServerError, 503), "ok"])
+
+    with collect_call_metadata() as metadata:
+        assert await policy.call(operation) == "ok"
+
+    assert metadata == {"provider_calls": 1, "attempts": 2, "retries": 1}
+    assert 0 <= no_sleep[0] <= 0.5
+
+async def test_honours_retry_after(no_sleep):
+    """A Retry-After hint should set the backoff delay."""
+    policy = RetryPolicy(max_attempts=2, base_delay=0.5, max_delay=8, deadline=60)
+    operation = AsyncMock(side_effect=[_error(RateLimitError, 429, {"retry-after": "4"}), "ok"])
+
+    await policy.call(operation)
+
+    assert 4 <= no_sleep[0] <= 4.5
+
+async def test_permanent_errors_are_not_retried():
+    """Non-retryable errors should propagate after one attempt."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8, deadline=60)
+    operation = AsyncMock(side_effect=_error(BadRequestError, 400))
+
+    with pytest.raises(BadRequestError):
+        await policy.call(operation)
+    assert operation.await_count == 1
+
+async def test_stops_when_backoff_exceeds_deadline():
+    """No retry should be scheduled past the request deadline."""
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=8, deadline=10)
+    operation = AsyncMock(side_effect=_error(RateLimitError, 429, {"retry-after": "30"}))
+
+    with pytest.raises(RateLimitError):
+        await policy.call(operation)
+    assert operation.await_count == 1
+
+async def test_provider_client_retries_and_records_attempts():
+    """ProviderClient calls should go through the retry policy."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="test", mode="async")
+    client._client = MagicMock()
+    client._client.chat.completions.create = AsyncMock(
+        side_effect=[_error(RateLimitError, 429), _error(InternalServerError, 502), "response"]
+    )
+
+    with collect_call_metadata() as metadata:
+        result = await client.create_chat_completion(model="retry-model", messages=[])
+
+    assert result == "response"
+    assert metadata["attempts"] == 3
+    assert metadata["retries"] == 2
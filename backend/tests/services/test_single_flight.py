@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+from ai_prompt_enhancement.services.core.single_flight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def service():
+    """Fixture for a model service stand-in counting upstream calls."""
+    flight = SingleFlight()
+
+    class FakeModelService:
+        def __init__(self):
+            self.flight = flight
+            self.calls = 0
+
+        @flight.coalesce("analyze")
+        async def analyze_prompt(self, prompt: str, context=None):
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return {"prompt": prompt, "suggestions": []}
+
+    return FakeModelService()
+
+async def test_identical_concurrent_calls_are_collapsed(service):
+    """Concurrent identical calls should share one upstream request."""
+    results = await asyncio.gather(
+        service.analyze_prompt("Write a poem"),
+        service.analyze_prompt("Write  a poem", context=None),
+        service.analyze_prompt(prompt="Write a poem"),
+    )
+
+    assert service.calls == 1
+    assert all(result == results[0] for result in results)
+    assert service.flight.stats()["operations"]["analyze"] == {"calls": 3, "executed": 1, "collapsed": 2}
+
+async def test_callers_receive_independent_copies(service):
+    """Mutating one caller's result must not affect the others."""
+    first, second = await asyncio.gather(
+        service.analyze_prompt("Write a poem"),
+        service.analyze_prompt("Write a poem"),
+    )
+    first["suggestions"].append("changed")
+
+    assert second["suggestions"] == []
+
+async def test_joined_callers_do_not_report_the_call_cost():
+    """Only the caller that made the provider call should carry its usage and cost."""
+    flight = SingleFlight()
+
+    @flight.coalesce("analyze")
+    async def analyze_prompt(service, prompt):
+        await asyncio.sleep(0.05)
+        return {"prompt": prompt, "metadata": {"provider_calls": 1, "prompt_tokens": 100, "cost_usd": 0.002}}
+
+    results = await asyncio.gather(*(analyze_prompt(object, "Write a poem") for _ in range(3)))
+
+    assert sum(result["metadata"]["cost_usd"] for result in results) == 0.002
+    assert [result["metadata"].get("coalesced", False) for result in results] == [False, True, True]
+    assert results[1]["metadata"]["provider_calls"] == 0 and results[1]["metadata"]["prompt_tokens"] == 0
+
+async def test_different_payloads_are_not_collapsed(service):
+    """Calls with different inputs should each go upstream."""
+    await asyncio.gather(
+        service.analyze_prompt("Write a poem"),
+        service.analyze_prompt("Write a story"),
+    )
+
+    assert service.calls == 2
+
+async def test_sequential_calls_are_not_collapsed(service):
+    """A call made after the previous one finished should go upstream again."""
+    await service.analyze_prompt("Write a poem")
+    await service.analyze_prompt("Write a poem")
+
+    assert service.calls == 2
+
+async def test_cancelled_caller_does_not_cancel_shared_call(service):
+    """Cancelling the first caller should leave the shared call running for the rest."""
+    first = asyncio.ensure_future(service.analyze_prompt("Write a poem"))
+    second = asyncio.ensure_future(service.analyze_prompt("Write a poem"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert (await second)["prompt"] == "Write a poem"
+    assert service.calls == 1
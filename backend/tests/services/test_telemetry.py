@@ -0,0 +1,137 @@
+import asyncio
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from openai import BadRequestError, InternalServerError
+
+from ai_prompt_enhancement.core.config import Settings
+from ai_prompt_enhancement.services.model import provider_client as provider_client_module
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+from ai_prompt_enhancement.services.model.telemetry import CallSample, ModelTelemetry, TelemetryRegistry
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Record provider calls into a fresh registry."""
+    registry = TelemetryRegistry(Settings(telemetry_window_seconds=300, telemetry_max_samples=1000))
+    monkeypatch.setattr(provider_client_module, "telemetry", registry)
+    return registry
+
+def _client():
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="telemetry-test", mode="async")
+    client.retry_policy.max_attempts = 1
+    client._client = MagicMock()
+    return client
+
+async def test_window_aggregates(registry):
+    """Percentiles, RPM, error rate and token totals should describe the recorded calls."""
+    for latency in range(1, 101):
+        registry.record("model", latency / 100, prompt_tokens=10, completion_tokens=5)
+    registry.record("model", 0.5, outcome="APITimeoutError")
+
+    status = registry.status("model")
+
+    assert status["calls"] == 101
+    assert status["requests_per_minute"] == 101
+    assert status["latency_p50"] == 0.5
+    assert status["latency_p95"] == 0.95
+    assert status["latency_p99"] == 0.99
+    assert status["error_rate"] == pytest.approx(1 / 101)
+    assert status["prompt_tokens"] == 1000 and status["completion_tokens"] == 500
+    assert status["status"] == "healthy"
+
+async def test_old_samples_leave_the_window():
+    """Samples older than the window should not count in the aggregates."""
+    telemetry = ModelTelemetry(window_seconds=60, max_samples=100)
+    telemetry.record(CallSample(finished=1000.0, latency=1.0, ttft=None, prompt_tokens=None,
+                                completion_tokens=None, cached_tokens=0, outcome="InternalServerError"))
+
+    assert telemetry.summary(now=1030.0)["error_rate"] == 1.0
+    summary = telemetry.summary(now=1061.0)
+
+    assert summary["calls"] == 0
+    assert summary["error_rate"] == 0.0
+    assert telemetry.outcomes() == {"InternalServerError": 1}
+
+async def test_histogram_counts_every_call(registry):
+    """Each call should land in the first bucket whose bound covers its latency."""
+    registry.record("model", 0.1)
+    registry.record("model", 0.3)
+    registry.record("model", 100.0)
+
+    histogram = registry.stats()["model"]["latency_histogram"]
+
+    assert histogram["0.25"] == 1 and histogram["0.5"] == 1 and histogram["+Inf"] == 1
+
+async def test_idle_and_degraded_status(registry):
+    """Models without calls are idle; a high error rate marks them degraded."""
+    assert registry.status("unused")["status"] == "idle"
+
+    registry.record("failing", 1.0, outcome="InternalServerError")
+    registry.record("failing", 1.0)
+
+    assert registry.status("failing")["status"] == "degraded"
+
+async def test_provider_calls_are_recorded(registry):
+    """ProviderClient should record latency, tokens and outcome of each call."""
+    client = _client()
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=34, total_tokens=46)
+    request = httpx.Request("POST", "http://localhost/chat/completions")
+    client._client.chat.completions.create = AsyncMock(side_effect=[
+        SimpleNamespace(usage=usage),
+        BadRequestError("HTTP 400", response=httpx.Response(400, request=request), body=None),
+    ])
+
+    await client.create_chat_completion(model="telemetry-model", messages=[])
+    with pytest.raises(BadRequestError):
+        await client.create_chat_completion(model="telemetry-model", messages=[])
+
+    stats = registry.stats()["telemetry-model"]
+    assert stats["calls"] == 2
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 34
+    assert stats["outcomes"] == {"success": 1, "BadRequestError": 1}
+
+async def test_queue_wait_and_backoff_are_not_provider_latency(registry, monkeypatch):
+    """Each attempt should be timed from when it is sent, with the permit wait reported apart."""
+    class SlowLimiter:
+        async def acquire(self, tokens):
+            await asyncio.sleep(0.05)
+
+        def release(self, permit, tokens_used=None, throttled=False):
+            pass
+
+    monkeypatch.setattr(provider_client_module, "rate_limiters", MagicMock(get=lambda provider, model: SlowLimiter()))
+    client = _client()
+    client.retry_policy.max_attempts = 2
+    client.retry_policy.base_delay = client.retry_policy.max_delay = 0.05
+    request = httpx.Request("POST", "http://localhost/chat/completions")
+    client._client.chat.completions.create = AsyncMock(side_effect=[
+        InternalServerError("HTTP 503", response=httpx.Response(503, request=request), body=None),
+        SimpleNamespace(usage=None),
+    ])
+
+    await client.create_chat_completion(model="telemetry-model", messages=[])
+
+    stats = registry.stats()["telemetry-model"]
+    assert stats["outcomes"] == {"InternalServerError": 1, "success": 1}
+    assert stats["latency_p99"] < 0.04
+    assert stats["queue_wait_p50"] >= 0.05
+
+async def test_stream_records_time_to_first_token(registry):
+    """Streamed calls should record the time to the first delta."""
+    client = _client()
+
+    async def stream():
+        for text in ("Hello", " world"):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    client._client.chat.completions.create = AsyncMock(return_value=stream())
+
+    deltas = [delta async for delta in client.stream_chat_completion(model="telemetry-model", messages=[])]
+
+    assert deltas == ["Hello", " world"]
+    stats = registry.stats()["telemetry-model"]
+    assert stats["calls"] == 1
+    assert stats["ttft_p50"] is not None
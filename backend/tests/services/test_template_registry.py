@@ -0,0 +1,64 @@
+import pytest
+
+from ai_prompt_enhancement.services.core.template_registry import (
+    TemplateError,
+    TemplateRegistry,
+    normalize_template,
+)
+from ai_prompt_enhancement.services.model.prompt_messages import ANALYSIS_INPUT
+from ai_prompt_enhancement.services.prompt_refinement.prompt_templates import ANALYSIS_INPUT_TEMPLATE
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry()
+
+async def test_normalization():
+    """Line endings and trailing whitespace should be normalized, indentation kept."""
+    assert normalize_template("\r\n  Task:  \r\n    - one \n\n") == "Task:\n    - one"
+
+async def test_render_matches_str_format():
+    """Rendering should give the same text as formatting the normalized template."""
+    rendered = ANALYSIS_INPUT.render(prompt="Write a {poem}", context="None")
+
+    assert rendered == normalize_template(ANALYSIS_INPUT_TEMPLATE).format(prompt="Write a {poem}", context="None")
+
+async def test_placeholders_are_validated(registry):
+    """Templates whose placeholders differ from the declared ones should be rejected at registration."""
+    with pytest.raises(TemplateError):
+        registry.register("missing", "Prompt: {prompt}", ["prompt", "context"])
+    with pytest.raises(TemplateError):
+        registry.register("attribute", "Prompt: {prompt.text}", ["prompt"])
+    with pytest.raises(TemplateError):
+        registry.register("malformed", "Prompt: {prompt", ["prompt"])
+
+async def test_render_requires_exact_values(registry):
+    """Missing or unknown values should raise instead of producing a broken prompt."""
+    template = registry.register("input", "Prompt: {prompt}\nContext: {context}", ["prompt", "context"])
+
+    with pytest.raises(TemplateError):
+        template.render(prompt="x")
+    with pytest.raises(TemplateError):
+        template.render(prompt="x", context="y", model="z")
+    assert registry.render("input", prompt="x", context="y") == "Prompt: x\nContext: y"
+
+async def test_static_templates_keep_braces(registry):
+    """Static templates should be sent verbatim, including JSON examples."""
+    template = registry.register("system", 'Respond with {"score": 0.5}')
+
+    assert template.render() == 'Respond with {"score": 0.5}'
+
+async def test_register_and_versions(registry):
+    """Re-registering the same text should be a no-op; different text should conflict and change the version."""
+    first = registry.register("system", "Be concise.")
+
+    assert registry.register("system", "Be concise.  \n") is first
+    with pytest.raises(TemplateError):
+        registry.register("system", "Be thorough.")
+    other = TemplateRegistry()
+    other.register("system", "Be thorough.")
+    assert other.version("system") != registry.version("system")
+    with pytest.raises(TemplateError):
+        registry.get("unknown")
@@ -0,0 +1,145 @@
+import pytest
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_prompt_enhancement.api import middleware as middleware_module
+from ai_prompt_enhancement.api.middleware import UsageTrackingMiddleware
+from ai_prompt_enhancement.services.model import provider_client as provider_client_module
+from ai_prompt_enhancement.services.model.call_metadata import collect_call_metadata
+from ai_prompt_enhancement.services.model.provider_client import ProviderClient
+from ai_prompt_enhancement.services.model.usage_ledger import DEFAULT_PRICES, UsageLedger, usage_counts
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def ledger(monkeypatch):
+    """Book provider calls into a fresh, in-memory ledger."""
+    ledger = UsageLedger(prices=DEFAULT_PRICES)
+    monkeypatch.setattr(provider_client_module, "usage_ledger", ledger)
+    monkeypatch.setattr(middleware_module, "usage_ledger", ledger)
+    return ledger
+
+async def test_cost_uses_cached_input_price(ledger):
+    """Cached prompt tokens should be billed at the cached input price."""
+    cost = ledger.cost("deepseek-chat", prompt_tokens=1_000_000, completion_tokens=1_000_000, cached_tokens=500_000)
+
+    assert cost == pytest.approx(0.5 * 0.27 + 0.5 * 0.07 + 1.10)
+
+async def test_dated_model_names_use_base_price(ledger):
+    """Snapshot model names should fall back to their base model's price."""
+    assert ledger.price("gpt-4o-mini-2024-07-18") == DEFAULT_PRICES["gpt-4o-mini"]
+    assert ledger.cost("unknown-model", 1000, 1000) == 0.0
+
+async def test_usage_counts_reads_cached_tokens():
+    """Cached tokens should be read from both OpenAI and DeepSeek usage shapes."""
+    openai_usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20,
+                                   prompt_tokens_details=SimpleNamespace(cached_tokens=64))
+    deepseek_usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_cache_hit_tokens=32)
+
+    assert usage_counts(openai_usage) == (100, 20, 64)
+    assert usage_counts(deepseek_usage) == (100, 20, 32)
+    assert usage_counts(None) == (None, None, 0)
+
+async def test_query_groups_and_filters(ledger):
+    """Usage should be aggregated by the requested fields and filtered."""
+    with ledger.track_request("/api/v1/prompts/analyze") as usage:
+        ledger.record("deepseek-chat", 1000, 200)
+        ledger.record("deepseek-chat", 1000, 200)
+    with ledger.track_request("/api/v1/prompts/compare"):
+        ledger.record("gpt-4o-mini", 500, 100)
+
+    assert usage["calls"] == 2 and usage["prompt_tokens"] == 2000
+
+    by_endpoint = ledger.query(["endpoint"])
+    assert [row["endpoint"] for row in by_endpoint["rows"]] == ["/api/v1/prompts/analyze", "/api/v1/prompts/compare"]
+    assert by_endpoint["total"]["calls"] == 3
+    assert by_endpoint["total"]["completion_tokens"] == 500
+
+    filtered = ledger.query(["model", "day"], model="gpt-4o-mini")
+    assert len(filtered["rows"]) == 1 and filtered["rows"][0]["prompt_tokens"] == 500
+
+    assert ledger.query(["endpoint"], start="2999-01-01")["total"]["calls"] == 0
+    with pytest.raises(ValueError):
+        ledger.query(["user"])
+
+async def test_ledger_persists_between_instances(tmp_path):
+    """A flushed ledger should be loaded back by a new instance."""
+    path = str(tmp_path / "usage" / "ledger.json")
+    ledger = UsageLedger(prices=DEFAULT_PRICES, path=path)
+    ledger.record("deepseek-chat", 100, 50, cached_tokens=40)
+    ledger.flush()
+
+    reloaded = UsageLedger(prices=DEFAULT_PRICES, path=path)
+
+    assert reloaded.query(["model"])["rows"][0]["cached_tokens"] == 40
+
+async def test_periodic_flush_runs_off_the_event_loop(tmp_path, monkeypatch):
+    """A flush due while recording should write the ledger on its background thread."""
+    path = str(tmp_path / "ledger.json")
+    ledger = UsageLedger(prices=DEFAULT_PRICES, path=path, flush_seconds=0)
+    threads = []
+    write = ledger._write
+    monkeypatch.setattr(ledger, "_write", lambda entries: threads.append(threading.current_thread()) or write(entries))
+
+    ledger.record("deepseek-chat", 100, 50)
+    ledger.flush()
+
+    assert threads and threading.main_thread() not in threads
+    assert UsageLedger(prices=DEFAULT_PRICES, path=path).query(["model"])["total"]["calls"] == 1
+
+async def test_provider_calls_record_usage_and_metadata(ledger):
+    """Completions should be booked in the ledger and reported in the call metadata."""
+    client = ProviderClient(api_key="test", base_url="http://localhost", provider="usage-test", mode="async")
+    client._client = MagicMock()
+    usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100, total_tokens=1100, prompt_cache_hit_tokens=600)
+    client._client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(usage=usage))
+
+    with collect_call_metadata() as metadata:
+        await client.create_chat_completion(model="deepseek-chat", messages=[])
+
+    assert metadata["prompt_tokens"] == 1000
+    assert metadata["cached_tokens"] == 600
+    assert metadata["cost_usd"] == pytest.approx(ledger.cost("deepseek-chat", 1000, 100, 600))
+    assert ledger.query(["endpoint"])["rows"][0]["endpoint"] == "internal"
+
+async def test_middleware_adds_usage_headers(ledger):
+    """Responses should carry the usage of the provider calls made for them."""
+    app = FastAPI()
+    app.add_middleware(UsageTrackingMiddleware)
+
+    @app.get("/llm")
+    async def llm():
+        ledger.record("deepseek-chat", 120, 30)
+        return {"ok": True}
+
+    @app.get("/plain")
+    async def plain():
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.get("/llm")
+
+    assert response.headers["X-Usage-Prompt-Tokens"] == "120"
+    assert response.headers["X-Usage-Completion-Tokens"] == "30"
+    assert "X-Usage-Cost-USD" not in client.get("/plain").headers
+    assert ledger.query(["endpoint"])["rows"][0]["endpoint"] == "/llm"
+
+async def test_middleware_books_route_templates(ledger):
+    """Paths with ids should be booked under their route template, not one entry per id."""
+    app = FastAPI()
+    app.add_middleware(UsageTrackingMiddleware)
+
+    @app.get("/jobs/{job_id}")
+    async def job(job_id: str):
+        ledger.record("deepseek-chat", 10, 5)
+        return {"id": job_id}
+
+    client = TestClient(app)
+    for job_id in ("a", "b", "c"):
+        client.get(f"/jobs/{job_id}")
+
+    rows = ledger.query(["endpoint"])["rows"]
+    assert [(row["endpoint"], row["calls"]) for row in rows] == [("/jobs/{job_id}", 3)]